@@ -0,0 +1,54 @@
+"""
+Micro-benchmark do custo de normalização de e-mails em um cadastro.
+
+Em um cadastro o endereço passa pelo validador do formulário, por
+`UniqueEmail` (via `User.get_by_email`) e pelo setter `User.email`. Antes do
+cache, cada etapa executava a validação completa do email_validator; agora a
+primeira etapa valida e as demais reaproveitam o resultado.
+
+Uso:
+    python -m benchmarks.email_normalization [quantidade de cadastros]
+"""
+import sys
+import timeit
+
+from moviedb.models.autenticacao import normalizar_email
+
+ETAPAS_POR_CADASTRO = 3
+
+
+def cadastro_sem_cache(email: str) -> None:
+    for _ in range(ETAPAS_POR_CADASTRO):
+        normalizar_email.__wrapped__(email)
+
+
+def cadastro_com_cache(email: str) -> None:
+    for _ in range(ETAPAS_POR_CADASTRO):
+        normalizar_email(email)
+
+
+def medir(funcao, quantidade: int) -> float:
+    enderecos = [f"Usuario.{i}@Example.com" for i in range(quantidade)]
+    normalizar_email.cache_clear()
+    inicio = timeit.default_timer()
+    for email in enderecos:
+        funcao(email)
+    return (timeit.default_timer() - inicio) / quantidade
+
+
+def main() -> None:
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    # aquece os imports do email_validator
+    normalizar_email.__wrapped__("aquecimento@example.com")
+
+    antes = medir(cadastro_sem_cache, quantidade)
+    depois = medir(cadastro_com_cache, quantidade)
+    print(f"cadastros: {quantidade}")
+    print(f"sem cache: {antes * 1e6:8.1f} µs por cadastro")
+    print(f"com cache: {depois * 1e6:8.1f} µs por cadastro")
+    print(f"ganho:     {antes / depois:8.2f}x")
+    print(f"cache:     {normalizar_email.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
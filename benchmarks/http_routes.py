@@ -0,0 +1,228 @@
+"""
+Benchmark das rotas dos blueprints `root` e `auth` e do carregamento do usuário
+pelo Flask-Login.
+
+Cria a aplicação com `create_app` sobre um banco SQLite temporário populado,
+com o transporte de e-mail falso, e mede, para cada cenário, a vazão e os
+percentis de latência das requisições feitas pelo cliente de testes do Flask
+(sem servidor HTTP, sem rede). O resultado pode ser gravado em JSON e comparado
+com o de outro commit para detectar regressões.
+
+Uso:
+    python -m benchmarks.http_routes [--requisicoes N] [--saida resultado.json]
+                                     [--comparar base.json] [--tolerancia 0.15]
+
+Termina com código 1 se, comparado com a base, o p50 ou o p90 de algum cenário
+piorar mais que a tolerância.
+"""
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+import sqlalchemy as sa
+
+from benchmarks.keyset_pagination import criar_app, popular
+
+EMAIL = 'benchmark@example.com'
+SENHA = 'senha-do-benchmark'
+AQUECIMENTO = 5
+
+
+def semear(quantidade_inativos: int) -> List[str]:
+    """
+    Cria o usuário ativo usado no login e os usuários inativos usados na
+    validação de e-mail.
+
+    Returns:
+        Um token de validação de e-mail para cada usuário inativo.
+    """
+    from moviedb import db
+    from moviedb.infra.tokens import create_jwt_token
+    from moviedb.models import User
+    from moviedb.models.enumeracoes import JWTAction
+
+    usuario = User()
+    usuario.nome = 'Benchmark'
+    usuario.email = EMAIL
+    usuario.password = SENHA
+    usuario.ativo = True
+    db.session.add(usuario)
+
+    # todos os inativos compartilham o hash, para não calcular milhares deles
+    inativos = [{'id': uuid.uuid4(), 'nome': f"Inativo {i}", 'ativo': False,
+                 'email_normalizado': f"inativo{i}@example.com",
+                 'password_hash': usuario.password_hash}
+                for i in range(quantidade_inativos)]
+    if inativos:
+        db.session.execute(sa.insert(User), inativos)
+    db.session.commit()
+    return [create_jwt_token(action=JWTAction.VALIDAR_EMAIL, sub=linha['email_normalizado'],
+                             expires_in=3600)
+            for linha in inativos]
+
+
+def medir(requisicao: Callable[[int], None], quantidade: int) -> Dict[str, float]:
+    """
+    Executa `requisicao(i)` `quantidade` vezes, após um aquecimento, e calcula as
+    estatísticas de latência (em milissegundos) e a vazão (requisições/s).
+    """
+    for i in range(AQUECIMENTO):
+        requisicao(-1 - i)
+    latencias = []
+    for i in range(quantidade):
+        inicio = perf_counter()
+        requisicao(i)
+        latencias.append((perf_counter() - inicio) * 1e3)
+    percentis = statistics.quantiles(latencias, n=100, method='inclusive')
+    return {'requisicoes': quantidade,
+            'vazao': quantidade / (sum(latencias) / 1e3),
+            'media_ms': statistics.fmean(latencias),
+            'p50_ms': percentis[49],
+            'p90_ms': percentis[89],
+            'p99_ms': percentis[98],
+            'max_ms': max(latencias)}
+
+
+def cenarios(app, tokens: List[str]) -> Dict[str, Callable[[int], None]]:
+    from moviedb.infra.modulos import user_cache
+    from moviedb.models import User
+
+    cliente = app.test_client()
+    logado = app.test_client()
+    logado.post('/auth/login', data={'email': EMAIL, 'password': SENHA})
+    with app.app_context():
+        id_login = User.get_by_email(EMAIL).get_id()
+    carregar_usuario = app.login_manager._user_callback
+
+    def esperar(resposta, *codigos):
+        if resposta.status_code not in codigos:
+            raise RuntimeError(f"{resposta.request.path}: status {resposta.status_code}")
+
+    def login_post(i):
+        # um cliente novo por requisição, senão a partir da segunda já estaria logado
+        esperar(app.test_client().post('/auth/login', data={'email': EMAIL, 'password': SENHA}), 200)
+
+    def register_post(i):
+        esperar(cliente.post('/auth/register',
+                             data={'nome': 'Novo Usuário', 'email': f"novo{uuid.uuid4().hex}@example.com",
+                                   'password': SENHA, 'password2': SENHA}), 302)
+
+    def valida_email(i):
+        esperar(cliente.get(f"/auth/valida_email/{tokens[i]}"), 302)
+
+    def user_loader(limpar_cache: bool):
+        def executar(i):
+            with app.test_request_context('/'):
+                if limpar_cache:
+                    user_cache.clear()
+                if carregar_usuario(id_login) is None:
+                    raise RuntimeError("usuário não carregado")
+        return executar
+
+    return {
+        'GET /': lambda i: esperar(cliente.get('/'), 200),
+        'GET /auth/login': lambda i: esperar(cliente.get('/auth/login'), 200),
+        'POST /auth/login': login_post,
+        'GET /auth/register': lambda i: esperar(cliente.get('/auth/register'), 200),
+        'POST /auth/register': register_post,
+        'GET /auth/valida_email/<token>': valida_email,
+        'GET / (logado)': lambda i: esperar(logado.get('/'), 200),
+        'user_loader (cache)': user_loader(False),
+        'user_loader (banco)': user_loader(True),
+    }
+
+
+def metadados() -> Dict[str, Optional[str]]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit,
+            'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'plataforma': platform.platform()}
+
+
+def comparar(base: Dict, atual: Dict, tolerancia: float) -> List[str]:
+    """
+    Compara os percentis p50 e p90 de cada cenário com os da base.
+
+    Returns:
+        A lista dos cenários que pioraram mais que a tolerância.
+    """
+    print(f"\ncomparação com {base['meta'].get('commit')} (tolerância {tolerancia:.0%})")
+    regressoes = []
+    for nome, resultado in atual['resultados'].items():
+        anterior = base['resultados'].get(nome)
+        if anterior is None:
+            continue
+        variacoes = {p: resultado[p] / anterior[p] - 1 for p in ('p50_ms', 'p90_ms') if anterior[p] > 0}
+        piorou = any(variacao > tolerancia for variacao in variacoes.values())
+        if piorou:
+            regressoes.append(nome)
+        print(f"{'REGRESSÃO' if piorou else 'ok':>10}  {nome:<32} " +
+              ' '.join(f"{p[:-3]} {v:+.1%}" for p, v in variacoes.items()))
+    return regressoes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requisicoes', type=int, default=200,
+                        help="requisições medidas por cenário")
+    parser.add_argument('--filmes', type=int, default=1000, help="filmes no banco")
+    parser.add_argument('--saida', help="arquivo JSON onde gravar o resultado")
+    parser.add_argument('--comparar', help="arquivo JSON de uma execução anterior")
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help="piora relativa aceita no p50/p90 (padrão: 0.15)")
+    args = parser.parse_args()
+
+    resultado = {'meta': metadados(), 'resultados': {}}
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(diretorio, WTF_CSRF_ENABLED=False, LOG_LEVEL='WARNING',
+                        APP_NAME='MovieDB', APP_BASE_URL='http://localhost',
+                        EMAIL_SENDER='benchmark@example.com', RATE_LIMIT_ENABLED=False)
+        with app.app_context():
+            popular(args.filmes)
+            tokens = semear(args.requisicoes)
+
+        print(f"{'cenário':<32} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        for nome, requisicao in cenarios(app, tokens).items():
+            if nome.startswith('GET /auth/valida_email'):
+                # os tokens são de uso único: o aquecimento usa os do fim da lista
+                medicao = medir(requisicao, args.requisicoes - AQUECIMENTO)
+            else:
+                medicao = medir(requisicao, args.requisicoes)
+            resultado['resultados'][nome] = medicao
+            print(f"{nome:<32} {medicao['vazao']:>9.1f} {medicao['p50_ms']:>8.2f} "
+                  f"{medicao['p90_ms']:>8.2f} {medicao['p99_ms']:>8.2f}")
+
+        from moviedb.infra.modulos import email_queue
+        email_queue.stop(timeout=5)
+
+    if args.saida:
+        with open(args.saida, 'w') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            base = json.load(f)
+        regressoes = comparar(base, resultado, args.tolerancia)
+        if regressoes:
+            print(f"\n{len(regressoes)} cenário(s) com regressão")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
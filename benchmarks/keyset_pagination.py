@@ -0,0 +1,90 @@
+"""
+Compara o custo de páginas profundas com OFFSET e com paginação por cursor
+(`BasicRepositoryMixin.paginate`).
+
+Cria um banco SQLite temporário com N filmes e mede o tempo para obter uma
+página em diferentes profundidades, ordenando pela chave primária.
+
+Uso:
+    python -m benchmarks.keyset_pagination [quantidade de filmes]
+"""
+import json
+import os
+import sys
+import tempfile
+import timeit
+import uuid
+
+import sqlalchemy as sa
+
+POR_PAGINA = 20
+PROFUNDIDADES = (1, 100, 1000, 5000)
+
+
+def criar_app(diretorio: str, **configuracao):
+    from moviedb import create_app
+
+    arquivo = os.path.join(diretorio, 'config.json')
+    with open(arquivo, 'w') as f:
+        json.dump({'SECRET_KEY': 'benchmark',
+                   'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(diretorio, 'bench.db')}",
+                   'EMAIL_TRANSPORT': 'fake',
+                   **configuracao}, f)
+    return create_app(arquivo)
+
+
+def popular(quantidade: int) -> None:
+    from moviedb import db
+    from moviedb.models import Filme
+
+    db.create_all()
+    linhas = [{'id': uuid.uuid4(), 'titulo_original': f"Filme {i}", 'titulo_nacional': f"Filme {i}",
+               'ano_lancamento': 1950 + i % 75, 'lancado': True, 'duracao': 90}
+              for i in range(quantidade)]
+    db.session.execute(sa.insert(Filme), linhas)
+    db.session.commit()
+
+
+def pagina_offset(pagina: int):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    stmt = (sa.select(Filme).order_by(Filme.id).
+            offset((pagina - 1) * POR_PAGINA).limit(POR_PAGINA))
+    return db.session.execute(stmt).scalars().all()
+
+
+def cursor_da_pagina(pagina: int):
+    from moviedb.models import Filme
+
+    cursor = None
+    for _ in range(pagina - 1):
+        cursor = Filme.paginate(per_page=POR_PAGINA, cursor=cursor).next_cursor
+    return cursor
+
+
+def main() -> None:
+    import logging
+    from moviedb.models import Filme
+
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(diretorio)
+        logging.getLogger().setLevel(logging.WARNING)
+        with app.app_context():
+            popular(quantidade)
+            print(f"filmes: {quantidade}, {POR_PAGINA} por página")
+            print(f"{'página':>8} {'OFFSET (ms)':>12} {'cursor (ms)':>12}")
+            for pagina in PROFUNDIDADES:
+                if (pagina - 1) * POR_PAGINA >= quantidade:
+                    break
+                cursor = cursor_da_pagina(pagina)
+                repeticoes = 20
+                offset = timeit.timeit(lambda: pagina_offset(pagina), number=repeticoes) / repeticoes
+                keyset = timeit.timeit(lambda: Filme.paginate(per_page=POR_PAGINA, cursor=cursor),
+                                       number=repeticoes) / repeticoes
+                print(f"{pagina:>8} {offset * 1e3:>12.2f} {keyset * 1e3:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Verifica o roteamento das consultas entre o banco principal e a réplica de
+leitura (`moviedb.infra.database.RoutingSession`), usando dois arquivos SQLite:
+o principal é populado e copiado para a réplica, que a partir daí não recebe
+mais nenhuma escrita (simulando uma réplica atrasada).
+
+Cada cenário é executado em um contexto de aplicação próprio, como uma
+requisição, e informa em qual banco cada comando foi executado. Termina com
+código 1 se algum cenário não for roteado como esperado.
+
+Uso:
+    python -m benchmarks.read_replicas
+"""
+import shutil
+import sys
+import tempfile
+from collections import Counter
+from typing import Callable, Dict
+
+import sqlalchemy as sa
+
+from benchmarks.keyset_pagination import criar_app, popular
+
+
+def cenarios() -> Dict[str, tuple[Callable[[], bool], set]]:
+    """
+    Os cenários verificados: nome -> (função que retorna se o resultado está
+    correto, bancos que devem ter sido usados).
+    """
+    from moviedb import db
+    from moviedb.models import Filme, User
+
+    def paginar():
+        return len(Filme.paginate(per_page=20).items) == 20
+
+    def listar_por_ano():
+        return len(Filme.listar_por_ano(1990)) > 0
+
+    def buscar():
+        return len(Filme.buscar("Filme 1")) > 0
+
+    def get_by_id():
+        primeiro = db.session.execute(sa.select(Filme).limit(1)).scalar_one()
+        return Filme.get_by_id(primeiro.id) is primeiro
+
+    def contar():
+        return Filme.count() == 200
+
+    def usuario():
+        return User.get_by_email("ninguem@example.com") is None
+
+    def for_update():
+        stmt = sa.select(Filme).limit(1).with_for_update()
+        return db.session.execute(stmt).scalar_one_or_none() is not None
+
+    def escrever_e_ler():
+        filme = Filme(titulo_original="Novo", titulo_nacional="Novo", ano_lancamento=2024,
+                      lancado=False, duracao=100)
+        db.session.add(filme)
+        db.session.commit()
+        # a réplica não tem o filme: só é encontrado se a leitura for ao principal
+        return (len(Filme.get_by_titulo("Novo")) == 1 and
+                len(Filme.listar_por_ano(2024, lancado=False)) == 1)
+
+    def nova_requisicao():
+        # fora da requisição que escreveu, a leitura volta à réplica (atrasada)
+        return len(Filme.get_by_titulo("Novo")) == 0
+
+    return {'Filme.paginate': (paginar, {'réplica'}),
+            'Filme.listar_por_ano': (listar_por_ano, {'réplica'}),
+            'Filme.buscar': (buscar, {'réplica'}),
+            'Filme.get_by_id': (get_by_id, {'réplica'}),
+            'Filme.count': (contar, {'réplica'}),
+            'User.get_by_email': (usuario, {'principal'}),
+            'SELECT ... FOR UPDATE': (for_update, {'principal'}),
+            'escrita e leitura': (escrever_e_ler, {'principal'}),
+            'requisição seguinte': (nova_requisicao, {'réplica'})}
+
+
+def main() -> int:
+    import logging
+    from moviedb import db
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        replica = f"{diretorio}/replica.db"
+        app = criar_app(diretorio, LOG_LEVEL='WARNING', DB_REPLICA_URIS=[f"sqlite:///{replica}"])
+        logging.getLogger().setLevel(logging.WARNING)
+
+        with app.app_context():
+            popular(200)
+            nomes = {db.engine: 'principal', db.engines['replica_0']: 'réplica'}
+            for engine in nomes:
+                engine.dispose()
+        shutil.copy(f"{diretorio}/bench.db", replica)
+
+        comandos: Counter = Counter()
+        for engine, nome in nomes.items():
+            sa.event.listen(engine, 'before_cursor_execute',
+                            lambda *args, nome=nome: comandos.update([nome]))
+
+        falhas = []
+        print(f"{'cenário':<24} {'principal':>10} {'réplica':>8}  resultado")
+        for cenario, (funcao, esperados) in cenarios().items():
+            comandos.clear()
+            with app.app_context():
+                correto = funcao()
+            usados = {nome for nome, quantidade in comandos.items() if quantidade}
+            ok = correto and usados == esperados
+            if not ok:
+                falhas.append(cenario)
+            print(f"{cenario:<24} {comandos['principal']:>10} {comandos['réplica']:>8}  "
+                  f"{'ok' if ok else 'FALHOU'}")
+
+        for engine in nomes:
+            engine.dispose()
+
+    if falhas:
+        print(f"\n{len(falhas)} cenário(s) com roteamento incorreto: {', '.join(falhas)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Mede se as leituras prosseguem enquanto há escritas em andamento no SQLite,
+comparando o perfil padrão com o perfil de produção (SQLITE_PRODUCTION: WAL,
+`synchronous=NORMAL`, `busy_timeout`, mmap).
+
+Uma thread escritora executa transações que inserem filmes, atualizam todos
+os existentes (o suficiente para exceder o cache de páginas e exigir o
+bloqueio exclusivo do arquivo no modo padrão) e permanecem abertas por alguns
+milissegundos antes do commit; enquanto isso, threads
+leitoras consultam a lista de filmes. São informadas a latência das leituras
+e a quantidade de erros "database is locked". Cada perfil é medido em um
+processo novo, com um banco próprio.
+
+Termina com código 1 se, no perfil de produção, alguma leitura falhar.
+
+Uso:
+    python -m benchmarks.sqlite_concurrency [--duracao 3] [--leitores 4]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from time import perf_counter, sleep
+from typing import Any, Dict
+
+import sqlalchemy as sa
+
+from benchmarks.keyset_pagination import criar_app, popular
+
+PERFIS = {'padrão': {'SQLITE_PRODUCTION': False},
+          'produção': {'SQLITE_PRODUCTION': True}}
+
+
+def escrever(app, parar: threading.Event, resultado: Dict[str, Any]) -> None:
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        while not parar.is_set():
+            lote = resultado['transacoes'] + resultado['erros']
+            linhas = [{'id': uuid.uuid4(), 'titulo_original': f"Novo {lote}-{i}",
+                       'titulo_nacional': f"Novo {lote}-{i}", 'ano_lancamento': 2024,
+                       'lancado': False, 'duracao': 100} for i in range(500)]
+            try:
+                db.session.execute(sa.insert(Filme), linhas)
+                db.session.execute(sa.update(Filme).values(duracao=Filme.duracao + 1))
+                sleep(0.05)
+                db.session.commit()
+                resultado['transacoes'] += 1
+            except sa.exc.OperationalError:
+                db.session.rollback()
+                resultado['erros'] += 1
+
+
+def ler(app, parar: threading.Event, resultado: Dict[str, Any]) -> None:
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        while not parar.is_set():
+            inicio = perf_counter()
+            try:
+                db.session.execute(sa.select(Filme).order_by(Filme.id).limit(20)).scalars().all()
+                db.session.execute(sa.select(sa.func.count()).select_from(Filme)).scalar_one()
+                resultado['latencias'].append(perf_counter() - inicio)
+            except sa.exc.OperationalError:
+                resultado['erros'] += 1
+            finally:
+                db.session.rollback()
+                db.session.remove()
+            sleep(0.001)
+
+
+def medir(perfil: str, duracao: float, leitores: int) -> Dict[str, Any]:
+    """
+    Executa a medição de um perfil no processo atual.
+
+    Returns:
+        Transações de escrita concluídas, leituras, erros e percentis de
+        latência das leituras (ms).
+    """
+    import logging
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app = criar_app(diretorio, LOG_LEVEL='WARNING', SQLITE_BUSY_TIMEOUT=5000, **PERFIS[perfil])
+        logging.getLogger().setLevel(logging.WARNING)
+        with app.app_context():
+            from moviedb import db
+
+            popular(20000)
+            modo = db.session.execute(sa.text('PRAGMA journal_mode')).scalar_one()
+            db.session.remove()
+
+        parar = threading.Event()
+        escrita = {'transacoes': 0, 'erros': 0}
+        leitura = {'latencias': [], 'erros': 0}
+        threads = [threading.Thread(target=escrever, args=(app, parar, escrita))]
+        threads += [threading.Thread(target=ler, args=(app, parar, leitura)) for _ in range(leitores)]
+        for thread in threads:
+            thread.start()
+        sleep(duracao)
+        parar.set()
+        for thread in threads:
+            thread.join()
+
+    latencias = sorted(leitura['latencias']) or [0.0]
+    return {'journal_mode': modo,
+            'escritas': escrita['transacoes'],
+            'erros_escrita': escrita['erros'],
+            'leituras': len(leitura['latencias']),
+            'erros_leitura': leitura['erros'],
+            'p50': statistics.median(latencias) * 1e3,
+            'p95': latencias[int(len(latencias) * 0.95) - 1 if len(latencias) > 1 else 0] * 1e3,
+            'max': latencias[-1] * 1e3}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--duracao', type=float, default=3.0, help="segundos de medição por perfil")
+    parser.add_argument('--leitores', type=int, default=4, help="quantidade de threads leitoras")
+    parser.add_argument('--perfil', choices=PERFIS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.perfil:
+        print(json.dumps(medir(args.perfil, args.duracao, args.leitores)))
+        return 0
+
+    resultados = {}
+    for perfil in PERFIS:
+        processo = subprocess.run([sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+                                   '--perfil', perfil, '--duracao', str(args.duracao),
+                                   '--leitores', str(args.leitores)],
+                                  capture_output=True, text=True, check=True)
+        resultados[perfil] = json.loads(processo.stdout.strip().splitlines()[-1])
+
+    print(f"{'perfil':<10} {'journal':>8} {'escritas':>9} {'leituras':>9} {'erros':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'máx ms':>8}")
+    for perfil, r in resultados.items():
+        print(f"{perfil:<10} {r['journal_mode']:>8} {r['escritas']:>9} {r['leituras']:>9} "
+              f"{r['erros_leitura'] + r['erros_escrita']:>6} "
+              f"{r['p50']:>8.2f} {r['p95']:>8.2f} {r['max']:>8.2f}")
+
+    return 1 if resultados['produção']['erros_leitura'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Mede o tempo de inicialização da aplicação: o custo de importação de cada
+módulo carregado por `create_app` (via `python -X importtime`) e o tempo total
+de `create_app`.
+
+A medição é feita em um processo novo, para que nenhum módulo já esteja
+carregado. Termina com código 1 se o tempo total ultrapassar o orçamento.
+
+Uso:
+    python -m benchmarks.startup [--top 25] [--orcamento 1500] [--aquecer]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+_LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)$')
+
+_SCRIPT = """
+import time, sys
+inicio = time.perf_counter()
+from moviedb import create_app
+app = create_app(sys.argv[1])
+print("create_app:", time.perf_counter() - inicio, file=sys.stderr)
+"""
+
+
+def medir(config: str) -> Tuple[List[Tuple[str, int, int]], float]:
+    """
+    Executa `create_app` em um processo novo com `-X importtime`.
+
+    Returns:
+        A lista (módulo, tempo próprio µs, tempo acumulado µs) e o tempo total
+        de `create_app`, em segundos.
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ambiente = dict(os.environ, PYTHONPATH=os.pathsep.join([raiz, os.environ.get('PYTHONPATH', '')]))
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', _SCRIPT, config],
+                              capture_output=True, text=True, env=ambiente, check=True)
+    modulos, total = [], 0.0
+    for linha in processo.stderr.splitlines():
+        encontrado = _LINHA.match(linha)
+        if encontrado:
+            proprio, acumulado, nome = encontrado.groups()
+            modulos.append((nome, int(proprio), int(acumulado)))
+        elif linha.startswith('create_app:'):
+            total = float(linha.split()[1])
+    return modulos, total
+
+
+def por_pacote(modulos: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """
+    Soma o tempo próprio de importação por pacote de primeiro nível.
+    """
+    pacotes: Dict[str, int] = defaultdict(int)
+    for nome, proprio, _ in modulos:
+        pacotes[nome.split('.')[0]] += proprio
+    return dict(pacotes)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--top', type=int, default=25, help="quantidade de módulos listados")
+    parser.add_argument('--orcamento', type=float, default=1500,
+                        help="tempo máximo aceitável de create_app, em ms")
+    parser.add_argument('--aquecer', action='store_true',
+                        help="inclui o aquecimento (STARTUP_WARMUP) no tempo medido")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        config = os.path.join(diretorio, 'config.json')
+        with open(config, 'w') as f:
+            json.dump({'SECRET_KEY': 'benchmark',
+                       'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(diretorio, 'bench.db')}",
+                       'EMAIL_TRANSPORT': 'fake',
+                       'LOG_LEVEL': 'WARNING',
+                       'STARTUP_WARMUP': args.aquecer}, f)
+        modulos, total = medir(config)
+
+    importacao = sum(proprio for _, proprio, _ in modulos)
+    print(f"create_app: {total * 1e3:.1f} ms (importações: {importacao / 1e3:.1f} ms, "
+          f"{len(modulos)} módulos)\n")
+
+    print(f"{'pacote':<28} {'ms':>8}")
+    for pacote, tempo in sorted(por_pacote(modulos).items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{pacote:<28} {tempo / 1e3:>8.1f}")
+
+    print(f"\n{'módulo (acumulado)':<48} {'ms':>8}")
+    for nome, _, acumulado in sorted(modulos, key=lambda item: -item[2])[:args.top]:
+        print(f"{nome:<48} {acumulado / 1e3:>8.1f}")
+
+    if total * 1e3 > args.orcamento:
+        print(f"\ncreate_app acima do orçamento de {args.orcamento:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
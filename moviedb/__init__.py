@@ -6,8 +6,10 @@ import sys
 
 from flask import Flask
 
-from moviedb.infra import app_logging
-from moviedb.infra.modulos import bootstrap, db, migrate, login_manager
+from moviedb.infra import app_logging, database
+from moviedb.infra.modulos import bootstrap, db, migrate, login_manager, user_cache, \
+    email_queue, password_hasher, token_service, row_counts, metrics, \
+    slow_queries, page_cache, static_assets, compression, rate_limiter, poster_store
 
 
 def create_app(config_filename: str = "config.dev.json") -> Flask:
@@ -27,7 +29,7 @@ def create_app(config_filename: str = "config.dev.json") -> Flask:
     # chamando o log
     app_logging.configure_logging(logging.DEBUG)
 
-    app.logger.debug("configurando a aplicação a partir do arquivo '%s'" % config_filename)
+    app.logger.debug("configurando a aplicação a partir do arquivo '%s'", config_filename)
 
     try:
         app.config.from_file(config_filename, load=json.load)
@@ -36,6 +38,11 @@ def create_app(config_filename: str = "config.dev.json") -> Flask:
         app.logger.error("Config file not found")
         exit(1)
 
+    app_logging.configure_logging(logging.getLevelName(app.config.get('LOG_LEVEL', 'DEBUG')),
+                                  json_format=app.config.get('LOG_FORMAT', 'console') == 'json',
+                                  async_mode=bool(app.config.get('LOG_ASYNC', False)),
+                                  sampling=app.config.get('LOG_SAMPLING'))
+
     if "SQLALCHEMY_DATABASE_URI" not in app.config:
         app.logger.fatal("No database URI")
         sys.exit(1)
@@ -51,17 +58,37 @@ def create_app(config_filename: str = "config.dev.json") -> Flask:
     if "SECRET_KEY" not in app.config or app.config.get("SECRET_KEY") is None:
         app.logger.warning("No secret key defined")
         app.config["SECRET_KEY"] = os.urandom(32).hex()
-        app.logger.warning("Secret key generated: '%s'" % app.config["SECRET_KEY"])
+        app.logger.warning("Secret key generated: '%s'", app.config["SECRET_KEY"])
         app.logger.warning("Para não invalidar os logins persistentes e os JWT "
                            "gerados efetuados nesta instância da aplicação, "
                            "adicione a chave acima ao arquivo de configuração")
 
 
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = database.opcoes_do_engine(app.config,
+                                                                      app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["SQLALCHEMY_BINDS"] = database.binds_das_replicas(app.config)
+
+    from moviedb.infra.json_provider import FastJSONProvider
+    app.json = FastJSONProvider(app)
+
     app.logger.debug("registrando módulos")
     bootstrap.init_app(app)
     db.init_app(app)
+    database.configurar_engines(app, db)
     migrate.init_app(app, db, compare_type=True)
     login_manager.init_app(app)
+    user_cache.init_app(app, db.session)
+    row_counts.init_app(app, db.session)
+    email_queue.init_app(app, db.session)
+    password_hasher.init_app(app)
+    token_service.init_app(app)
+    metrics.init_app(app, db)
+    slow_queries.init_app(app, db)
+    page_cache.init_app(app)
+    static_assets.init_app(app)
+    compression.init_app(app)
+    rate_limiter.init_app(app)
+    poster_store.init_app(app)
 
     app.logger.debug("definindo as mensagens padrão")
     login_manager.login_view = 'auth.login'
@@ -74,6 +101,20 @@ def create_app(config_filename: str = "config.dev.json") -> Flask:
     app.register_blueprint(root_bp)
     from moviedb.blueprints.auth import bp as auth_bp
     app.register_blueprint(auth_bp)
+    from moviedb.blueprints.filmes import bp as filmes_bp
+    app.register_blueprint(filmes_bp)
+    from moviedb.blueprints.api import bp as api_bp
+    app.register_blueprint(api_bp)
+    from moviedb.blueprints.posters import bp as posters_bp
+    app.register_blueprint(posters_bp)
+
+    app.logger.debug("configurando os templates")
+    from moviedb.infra.templates import configurar_templates
+    configurar_templates(app)
+
+    app.logger.debug("registrando comandos")
+    from moviedb.infra.catalogo import filmes_cli
+    app.cli.add_command(filmes_cli)
 
     app.logger.debug("definindo processadores de contexto")
     @app.context_processor
@@ -86,15 +127,28 @@ def create_app(config_filename: str = "config.dev.json") -> Flask:
     @login_manager.user_loader
     def user_load(user_id):
         from moviedb.models.autenticacao import User
+        from moviedb.infra.user_cache import UserSnapshot
+        import hmac
         import uuid
 
-        id_usuario, final_da_senha = user_id.split('|', 1)
+        # evita a consulta ao banco em toda requisição autenticada
+        usuario_em_cache = user_cache.get(user_id)
+        if usuario_em_cache is not None:
+            return usuario_em_cache
+
+        id_usuario, _, token_sessao = user_id.partition('|')
         try:
             auth_id = uuid.UUID(id_usuario)
         except ValueError:
             return None
         usuario = User.get_by_id(auth_id)
-        return usuario if usuario and usuario.password.endswith(final_da_senha) else None
+        if usuario is None or not hmac.compare_digest(usuario.token_sessao, token_sessao):
+            return None
+        return user_cache.put(user_id, UserSnapshot.from_user(usuario))
+
+    if app.config.get('STARTUP_WARMUP', False):
+        from moviedb.infra.startup import aquecer
+        aquecer(app, db)
 
     app.logger.info("aplicação criada")
 
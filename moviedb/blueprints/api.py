@@ -0,0 +1,163 @@
+import hashlib
+from typing import Any, Dict, Iterable, List
+
+import sqlalchemy as sa
+from flask import Blueprint, Response, jsonify, request
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import HTTPException
+
+from moviedb.models.filmes import Filme
+
+bp = Blueprint(name='api',
+               import_name=__name__,
+               url_prefix='/api')
+
+POR_PAGINA_PADRAO = 20
+POR_PAGINA_MAXIMO = 100
+CAMPOS_FILME = tuple(coluna.key for coluna in sa.inspect(Filme).column_attrs
+                     if coluna.key not in ('id', 'versao'))
+ORDENACOES = ('id', 'titulo_nacional', 'titulo_original', 'ano_lancamento')
+
+
+@bp.app_errorhandler(HTTPException)
+def erro_http(e: HTTPException):
+    """
+    Responde em JSON os erros HTTP da API, inclusive os 404 e 405 de URLs sob
+    `/api` que não correspondem a nenhuma rota (e que, por isso, não são
+    associados ao blueprint). Os demais erros seguem o tratamento padrão.
+
+    Os cabeçalhos do erro (como `Allow` no 405 e `Retry-After` no 429 e no 503)
+    são mantidos na resposta JSON.
+    """
+    if request.blueprint != bp.name and \
+            request.path != bp.url_prefix and not request.path.startswith(f"{bp.url_prefix}/"):
+        return e
+    cabecalhos = [(nome, valor) for nome, valor in e.get_headers() if nome.lower() != 'content-type']
+    return jsonify(erro=e.name, mensagem=e.description), e.code, cabecalhos
+
+
+def requisicao_invalida(mensagem: str):
+    return jsonify(erro="Bad Request", mensagem=mensagem), 400
+
+
+def campos_solicitados(texto: str | None) -> List[str]:
+    """
+    Interpreta o parâmetro `fields` (nomes separados por vírgula).
+
+    Returns:
+        Os campos pedidos, na ordem informada, ou todos se `texto` for vazio.
+
+    Raises:
+        ValueError: Se algum campo não existir.
+    """
+    if not texto:
+        return list(CAMPOS_FILME)
+    campos = list(dict.fromkeys(nome.strip() for nome in texto.split(',') if nome.strip()))
+    desconhecidos = [nome for nome in campos if nome not in CAMPOS_FILME and nome != 'id']
+    if desconhecidos:
+        raise ValueError(f"Campos desconhecidos: {', '.join(desconhecidos)}")
+    return [nome for nome in campos if nome != 'id']
+
+
+def etag(*partes: Any) -> str:
+    """
+    Calcula um ETag forte a partir das versões das linhas e dos parâmetros da
+    representação (campos, ordenação, cursores).
+    """
+    return hashlib.sha256(repr(partes).encode()).hexdigest()[:32]
+
+
+def serializar(filme: Filme, campos: Iterable[str]) -> Dict[str, Any]:
+    dados = {'id': filme.id}
+    for campo in campos:
+        dados[campo] = getattr(filme, campo)
+    return dados
+
+
+def _nao_modificado(valor: str) -> Response | None:
+    # comparação fraca, como pede a RFC 9110 para o If-None-Match; o sufixo que
+    # a compressão acrescenta ao ETag já foi retirado do cabeçalho
+    if request.if_none_match.contains_weak(valor):
+        resposta = Response(status=304)
+        resposta.set_etag(valor)
+        return resposta
+    return None
+
+
+@bp.route('/filmes')
+def listar_filmes():
+    """
+    Lista os filmes, paginados por cursor.
+
+    Parâmetros da query string:
+
+    - fields: campos retornados, separados por vírgula (padrão: todos; `id`
+      sempre é incluído). Apenas essas colunas são lidas do banco.
+    - order_by: 'id' (padrão), 'titulo_nacional', 'titulo_original' ou 'ano_lancamento'
+    - desc: '1' para ordem decrescente
+    - per_page: itens por página (padrão 20, máximo 100)
+    - cursor: `next_cursor` ou `prev_cursor` de uma página anterior
+
+    Returns:
+        Response: JSON com `items`, `next_cursor` e `prev_cursor`, ou 304 se o
+        ETag informado em `If-None-Match` ainda for válido.
+    """
+    ordem = request.args.get('order_by', 'id')
+    if ordem not in ORDENACOES:
+        return requisicao_invalida(f"Ordenação inválida: '{ordem}'")
+    descendente = request.args.get('desc', '0') in ('1', 'true')
+    try:
+        por_pagina = int(request.args.get('per_page', POR_PAGINA_PADRAO))
+    except ValueError:
+        return requisicao_invalida("'per_page' precisa ser um número inteiro")
+    por_pagina = min(max(por_pagina, 1), POR_PAGINA_MAXIMO)
+    try:
+        campos = campos_solicitados(request.args.get('fields'))
+        carregar = {campo for campo in campos + [ordem, 'versao'] if campo != 'id'}
+        pagina = Filme.paginate(order_by=ordem, descending=descendente, per_page=por_pagina,
+                                cursor=request.args.get('cursor'),
+                                options=[load_only(*(getattr(Filme, campo) for campo in carregar))])
+    except ValueError as e:
+        return requisicao_invalida(str(e))
+
+    valor = etag(campos, [(filme.id, filme.versao) for filme in pagina.items],
+                 pagina.next_cursor, pagina.prev_cursor)
+    resposta = _nao_modificado(valor)
+    if resposta is not None:
+        return resposta
+
+    resposta = jsonify(items=[serializar(filme, campos) for filme in pagina.items],
+                       next_cursor=pagina.next_cursor,
+                       prev_cursor=pagina.prev_cursor)
+    resposta.set_etag(valor)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
+
+
+@bp.route('/filmes/<uuid:filme_id>')
+def detalhar_filme(filme_id):
+    """
+    Retorna um filme. Aceita o parâmetro `fields`, como a listagem.
+
+    Returns:
+        Response: JSON com os campos do filme, 304 se o ETag informado em
+        `If-None-Match` ainda for válido, ou 404 se o filme não existir.
+    """
+    try:
+        campos = campos_solicitados(request.args.get('fields'))
+    except ValueError as e:
+        return requisicao_invalida(str(e))
+    filme = Filme.get_by_id(filme_id, options=[load_only(*(getattr(Filme, campo)
+                                                           for campo in campos + ['versao']))])
+    if filme is None:
+        return jsonify(erro="Not Found", mensagem="Filme não encontrado"), 404
+
+    valor = etag(campos, filme.id, filme.versao)
+    resposta = _nao_modificado(valor)
+    if resposta is not None:
+        return resposta
+
+    resposta = jsonify(serializar(filme, campos))
+    resposta.set_etag(valor)
+    resposta.headers['Cache-Control'] = 'no-cache'
+    return resposta
@@ -4,11 +4,12 @@ from urllib.parse import urlsplit
 from flask import Blueprint, flash, redirect, request, url_for, render_template, current_app
 from flask_login import current_user, login_required, login_user, logout_user, user_unauthorized
 
-from forms.auth import SetNewPasswordForm, AskToResetPasswordForm
-from infra.tokens import create_jwt_token, verify_jwt_token
-from models.enumeracoes import JWTAction
+from moviedb.forms.auth import SetNewPasswordForm, AskToResetPasswordForm
+from moviedb.infra.tokens import create_jwt_token, verify_jwt_token, consume_jwt_token
+from moviedb.models.enumeracoes import JWTAction
 from moviedb.forms.auth import RegistrationForm, LoginForm
 from moviedb import db
+from moviedb.infra.modulos import rate_limiter
 from moviedb.models.autenticacao import User
 
 bp = Blueprint(name='auth',
@@ -16,6 +17,7 @@ bp = Blueprint(name='auth',
                url_prefix='/auth')
 
 @bp.route('/register', methods=['GET', 'POST'])
+@rate_limiter.limit
 def register():
     """
     Exibe o formulário de registro de usuário e processa o cadastro.
@@ -51,7 +53,7 @@ def register():
 
         token = create_jwt_token(action=JWTAction.VALIDAR_EMAIL,
                                  sub=usuario.email)
-        current_app.logger.debug(f"token de validação de email: {token}")
+        current_app.logger.debug("token de validação de email: %s", token)
         body = render_template('auth/email_confirmation.jinja2',
                                nome=usuario.nome,
                                url=url_for('auth.valida_email', token=token))
@@ -67,6 +69,7 @@ def register():
                            form=form)
 
 @bp.route('/login', methods=['GET', 'POST'])
+@rate_limiter.limit
 def login():
     """
     Exibe o formulário de login e processa a autenticação do usuário.
@@ -91,10 +94,12 @@ def login():
         if usuario is None or not usuario.check_password(form.password.data):
             flash("Usuário ou senha invalidos!", category="warning")
             return redirect(url_for('auth.login'))
-        if not usuario.is_active():
+        if not usuario.is_active:
             flash("Usuário impedido de usar o sistema!", category="danger")
             return redirect(url_for('auth.login'))
 
+        # grava o hash atualizado, caso check_password tenha recalculado
+        db.session.commit()
         login_user(usuario, remember=form.remember_me.data)
         flash("Usuário logado!", category="success")
         next_page = request.args.get('next')
@@ -146,17 +151,18 @@ def valida_email(token):
         return redirect(request.referrer if request.referrer else url_for('root.index'))
 
     claims = verify_jwt_token(token)
-    current_app.logger.debug(f"claims: {claims}")
+    current_app.logger.debug("claims: %s", claims)
     if not(claims.get('valid', False) and {'sub', 'action'}.issubset(claims)):
         flash("Token incorreto", category="warning")
         return redirect(url_for('root.index'))
 
-    current_app.logger.debug(f"claims.get('sub'): {claims.get('sub')}")
+    current_app.logger.debug("claims.get('sub'): %s", claims.get('sub'))
     usuario = User.get_by_email(claims.get('sub'))
-    current_app.logger.debug(f"usuario: {usuario}")
+    current_app.logger.debug("usuario: %s", usuario)
     if (usuario is not None and
             not usuario.ativo and
-            claims.get('action') == JWTAction.VALIDAR_EMAIL):
+            claims.get('action') == JWTAction.VALIDAR_EMAIL and
+            consume_jwt_token(claims)):
         usuario.ativo = True
         flash(f"Email {usuario.email} validado!", category='success')
         db.session.commit()
@@ -179,6 +185,11 @@ def reset_password(token):
     if usuario is not None and claims.get('action') == JWTAction.RESET_PASSWORD:
         form = SetNewPasswordForm()
         if form.validate_on_submit():
+            # o token é de uso único: o jti é gravado no mesmo commit da nova
+            # senha, e uma segunda submissão é rejeitada antes de alterá-la
+            if not consume_jwt_token(claims):
+                flash("Token invalido", category="warning")
+                return redirect(url_for('root.index'))
             usuario.password = form.password.data
             db.session.commit()
             flash("Senha alterada com sucesso!", category="success")
@@ -192,6 +203,7 @@ def reset_password(token):
     return redirect(url_for('root.index'))
 
 @bp.route('/new_password', methods=['GET', 'POST'])
+@rate_limiter.limit
 def new_password():
     if current_user.is_authenticated:
         flash("Acesso não autorizado para usuários logados", category="warning")
@@ -211,6 +223,7 @@ def new_password():
                                    nome=usuario.nome,
                                    url = url_for('auth.reset_password', token=token))
             usuario.send_email(subject="Altere sua Senha", body=body)
+            db.session.commit()
             return redirect(url_for('auth.login'))
         current_app.logger.debug("Pedido de reset de senha para usuário inexistente (%s)",email)
         return redirect(url_for('auth.login'))
@@ -0,0 +1,43 @@
+from flask import Blueprint, Response, abort, request, stream_with_context
+from flask_login import login_required
+
+from moviedb.infra.catalogo import exportar_filmes, parametros_exportacao
+
+bp = Blueprint(name='filmes',
+               import_name=__name__,
+               url_prefix='/filmes')
+
+TIPOS_EXPORTACAO = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+@bp.route('/export')
+@login_required
+def export():
+    """
+    Exporta o catálogo de filmes em CSV ou NDJSON, como uma resposta em blocos
+    (chunked), sem montar o resultado inteiro em memória.
+
+    Parâmetros da query string:
+
+    - formato: 'csv' (padrão) ou 'ndjson'
+    - colunas: nomes das colunas separados por vírgula (padrão: todas)
+    - ano_de, ano_ate: intervalo do ano de lançamento (inclusive)
+    - lancado: 'sim' ou 'não'
+
+    Returns:
+        Response: O arquivo exportado, ou 400 se algum parâmetro for inválido.
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in TIPOS_EXPORTACAO:
+        abort(400, description="Formato inválido")
+    try:
+        parametros = parametros_exportacao(request.args)
+        trechos = exportar_filmes(formato, **parametros)
+    except ValueError as e:
+        abort(400, description=str(e))
+
+    return Response(stream_with_context(trechos),
+                    content_type=TIPOS_EXPORTACAO[formato],
+                    headers={'Content-Disposition': f'attachment; filename=filmes.{formato}'})
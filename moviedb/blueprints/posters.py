@@ -0,0 +1,35 @@
+from flask import Blueprint, abort, send_file
+
+from moviedb.infra.assets import UM_ANO
+from moviedb.infra.modulos import poster_store
+from moviedb.infra.posters import FORMATOS
+
+bp = Blueprint(name='posters',
+               import_name=__name__,
+               url_prefix='/posters')
+
+
+@bp.route('/<digest>/<int:largura>.<extensao>')
+def miniatura(digest, largura, extensao):
+    """
+    Serve a miniatura de um pôster, gerando-a se ainda não existir.
+
+    O endereço muda junto com o conteúdo do pôster, então a resposta pode ser
+    guardada indefinidamente pelo navegador e por caches intermediários.
+
+    Args:
+        digest: O SHA-256 do pôster original.
+        largura: Uma das larguras de POSTER_WIDTHS.
+        extensao: 'webp' ou 'jpg'.
+
+    Returns:
+        Response: A imagem, ou 404 se o pôster, a largura ou o formato não existirem.
+    """
+    formato = FORMATOS.get(extensao)
+    caminho = poster_store.miniatura(digest, largura, formato) if formato else None
+    if caminho is None:
+        abort(404)
+    response = send_file(caminho, mimetype=f"image/{formato}", max_age=UM_ANO)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -1,11 +1,14 @@
 from flask import Blueprint, render_template
 
+from moviedb.infra.modulos import page_cache
+
 bp = Blueprint('root',
                __name__,
                url_prefix='/')
 
 @bp.route('/')
 @bp.route('/index')
+@page_cache.cached
 def index():
     return render_template("root/index.jinja2",
                            title="página principal")
\ No newline at end of file
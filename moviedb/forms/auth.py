@@ -2,9 +2,26 @@ import re
 
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField
-from wtforms.validators import InputRequired, Length, Email, EqualTo, ValidationError
+from wtforms.validators import InputRequired, Length, EqualTo, ValidationError
+
+from moviedb.models.autenticacao import User, normalizar_email
+
+class EmailValido(object):
+    """
+    Validador WTForms equivalente ao `wtforms.validators.Email`, mas que usa a
+    função `normalizar_email` (com cache), evitando validar o mesmo endereço
+    novamente em `UniqueEmail`, `User.get_by_email` e no setter `User.email`.
+    """
+    def __init__(self, message: str = 'Endereço de e-mail inválido'):
+        self.message = message
+
+    def __call__(self, form, field):
+        from email_validator.exceptions import EmailNotValidError
+        try:
+            normalizar_email(field.data or '')
+        except EmailNotValidError:
+            raise ValidationError(self.message)
 
-from moviedb.models.autenticacao import User
 
 class UniqueEmail(object):
     def __init__(self, message: str = 'Email ja registrado!'):
@@ -93,7 +110,7 @@ class RegistrationForm(FlaskForm):
         label='E-mail',
         validators=[
             InputRequired(message='E-mail requerido!'),
-            Email(message='Informe um E-mail válido!'),
+            EmailValido(message='Informe um E-mail válido!'),
             Length(max=180, message="O e-mail deve no máximo 180 caracteres."),
             UniqueEmail("Email já registrado!")
         ]
@@ -123,7 +140,7 @@ class LoginForm(FlaskForm):
         label='E-mail',
         validators=[
             InputRequired(message='E-mail requerido!'),
-            Email(message='Informe um E-mail válido!'),
+            EmailValido(message='Informe um E-mail válido!'),
             Length(max=180, message="O e-mail deve no máximo 180 caracteres.")
         ])
     password = PasswordField(
@@ -157,7 +174,7 @@ class AskToResetPasswordForm(FlaskForm):
         label='E-mail',
         validators=[
             InputRequired(message='E-mail requerido!'),
-            Email(message='Informe um E-mail válido!'),
+            EmailValido(message='Informe um E-mail válido!'),
             Length(max=180, message='O email deve ter até 180 caracteres.')
         ]
     )
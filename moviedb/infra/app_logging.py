@@ -1,12 +1,55 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
 
 def configure_logging(logging_level: int = logging.DEBUG,
-                      enable_http_log: bool = False) -> None:
+                      enable_http_log: bool = False,
+                      json_format: bool = False,
+                      async_mode: bool = False,
+                      sampling: Optional[Dict[str, float]] = None) -> None:
+    """
+    Configura o log da aplicação. Pode ser chamada mais de uma vez; a
+    configuração anterior é substituída.
+
+    Args:
+        logging_level: O nível mínimo das mensagens.
+        enable_http_log: Se True, mantém as mensagens de acesso do servidor HTTP.
+        json_format: Se True, escreve uma linha JSON por mensagem (produção); caso
+            contrário, usa o formato colorido para o console.
+        async_mode: Se True, as mensagens são colocadas em uma fila e escritas por
+            uma thread separada (`QueueListener`), fora do caminho da requisição.
+        sampling: Taxa de amostragem (entre 0 e 1) das mensagens abaixo de WARNING
+            por logger, por exemplo {"sqlalchemy.engine": 0.1}. Vale também para
+            os loggers descendentes.
+    """
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging_level)
-    # console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    console_handler.setFormatter(MainConsoleFormatter())
+    console_handler.setFormatter(JsonFormatter() if json_format else MainConsoleFormatter())
+
+    handler: logging.Handler = console_handler
+    if async_mode:
+        handler = PreparedQueueHandler(queue.SimpleQueue())
+        handler.setLevel(logging_level)
+        _listener = logging.handlers.QueueListener(handler.queue, console_handler,
+                                                   respect_handler_level=True)
+        _listener.start()
+
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
 
     # Desativar as mensagens do servidor HTTP
     # https://stackoverflow.com/a/18379764
@@ -15,7 +58,55 @@ def configure_logging(logging_level: int = logging.DEBUG,
     else:
         logging.getLogger('werkzeug').setLevel(logging.ERROR)
 
-    logging.basicConfig(handlers=[console_handler], level=logging_level)
+    logging.basicConfig(handlers=[handler], level=logging_level, force=True)
+
+
+@atexit.register
+def _stop_listener() -> None:
+    # escreve as mensagens que ainda estiverem na fila
+    if _listener is not None:
+        _listener.stop()
+
+
+class PreparedQueueHandler(logging.handlers.QueueHandler):
+    """
+    `QueueHandler` que entrega o registro à fila com a mensagem já montada, mas
+    sem formatá-lo: a formatação fica a cargo do handler do `QueueListener`,
+    na thread de escrita.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Descarta aleatoriamente parte das mensagens abaixo de WARNING de loggers
+    muito verbosos. As mensagens de WARNING ou acima nunca são descartadas.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {nome: max(0.0, min(1.0, float(taxa))) for nome, taxa in rates.items()}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        nome = record.name
+        while True:
+            taxa = self.rates.get(nome)
+            if taxa is not None:
+                return taxa >= 1.0 or random.random() < taxa
+            if '.' not in nome:
+                return True
+            nome = nome.rsplit('.', 1)[0]
 
 
 class MainConsoleFormatter(logging.Formatter):
@@ -35,13 +126,45 @@ class MainConsoleFormatter(logging.Formatter):
         logging.CRITICAL: RED + FORMAT + RESET,
     }
 
+    def __init__(self):
+        super().__init__()
+        # um formatador por nível, criados uma única vez
+        self.formatters = {nivel: logging.Formatter(log_format)
+                           for nivel, log_format in type(self).FORMATS.items()}
+        self.default_formatter = logging.Formatter(type(self).GREY +
+                                                   type(self).FORMAT +
+                                                   type(self).RESET)
+
     def format(self, record):
-        # log_format = self.FORMATS.get(record.levelno)
-        log_format = type(self).FORMATS.get(
-            record.levelno,
-            type(self).GREY +
-            type(self).FORMAT +
-            type(self).RESET
-        )
-        formatter = logging.Formatter(log_format)
-        return formatter.format(record)
\ No newline at end of file
+        return self.formatters.get(record.levelno, self.default_formatter).format(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada mensagem como uma linha JSON, com os campos `ts`, `level`,
+    `logger` e `message`, além de `exception` e dos atributos passados em
+    `extra=` quando existirem.
+    """
+
+    _ATRIBUTOS_PADRAO = frozenset(vars(logging.makeLogRecord({})).keys()) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['exception'] = record.exc_text
+        if record.stack_info:
+            dados['stack'] = self.formatStack(record.stack_info)
+        for chave, valor in record.__dict__.items():
+            if chave not in self._ATRIBUTOS_PADRAO and not chave.startswith('_'):
+                dados[chave] = valor
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+_EXCEPTION_FORMATTER = logging.Formatter()
@@ -0,0 +1,188 @@
+"""
+Arquivos estáticos com impressão digital (hash do conteúdo no nome) e
+pré-comprimidos.
+
+O comando `flask assets build` copia os arquivos de `static/` para
+`static/dist/` com o hash do conteúdo no nome (`css/site.3f2a9c1b0d4e.css`),
+gera as variantes `.gz` e `.br` e grava o manifesto `static/dist/manifest.json`.
+Com o manifesto presente, `url_for('static', filename='css/site.css')` passa a
+gerar o endereço do arquivo com hash, que é servido com
+`Cache-Control: immutable` e na codificação aceita pelo navegador, sem
+compressão por requisição. Sem o manifesto, os arquivos são servidos
+normalmente pelo Flask.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from typing import Dict, Optional
+
+import click
+from flask import Flask, current_app, request, send_from_directory
+from flask.cli import AppGroup
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+# extensões que não se beneficiam de compressão
+JA_COMPRIMIDOS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif',
+                            '.woff', '.woff2', '.gz', '.br', '.zip'})
+UM_ANO = 365 * 24 * 60 * 60
+
+
+def nome_com_hash(caminho: str, conteudo: bytes) -> str:
+    """
+    Insere os 12 primeiros dígitos do SHA-256 do conteúdo antes da extensão.
+
+    Args:
+        caminho: O caminho relativo do arquivo, por exemplo 'css/site.css'.
+        conteudo: O conteúdo do arquivo.
+
+    Returns:
+        O novo caminho, por exemplo 'css/site.3f2a9c1b0d4e.css'.
+    """
+    base, extensao = os.path.splitext(caminho)
+    return f"{base}.{hashlib.sha256(conteudo).hexdigest()[:12]}{extensao}"
+
+
+def construir_assets(origem: str, nivel_gzip: int = 9, qualidade_brotli: int = 11) -> Dict[str, str]:
+    """
+    Gera os arquivos com hash, as variantes comprimidas e o manifesto.
+
+    O diretório `origem/dist` é recriado a cada execução.
+
+    Args:
+        origem: O diretório dos arquivos estáticos.
+        nivel_gzip: Nível de compressão do gzip (1 a 9).
+        qualidade_brotli: Qualidade da compressão brotli (0 a 11).
+
+    Returns:
+        O manifesto: caminho original -> caminho com hash (relativos a `origem`).
+    """
+    destino = os.path.join(origem, DIST)
+    shutil.rmtree(destino, ignore_errors=True)
+    manifesto: Dict[str, str] = {}
+    for raiz, diretorios, arquivos in os.walk(origem):
+        if os.path.abspath(raiz) == os.path.abspath(origem) and DIST in diretorios:
+            diretorios.remove(DIST)
+        for arquivo in sorted(arquivos):
+            completo = os.path.join(raiz, arquivo)
+            relativo = os.path.relpath(completo, origem).replace(os.sep, '/')
+            with open(completo, 'rb') as f:
+                conteudo = f.read()
+
+            gerado = nome_com_hash(relativo, conteudo)
+            saida = os.path.join(destino, gerado)
+            os.makedirs(os.path.dirname(saida), exist_ok=True)
+            with open(saida, 'wb') as f:
+                f.write(conteudo)
+            if os.path.splitext(arquivo)[1].lower() not in JA_COMPRIMIDOS:
+                # mtime fixo: o mesmo conteúdo gera sempre o mesmo .gz
+                with open(saida + '.gz', 'wb') as f:
+                    f.write(gzip.compress(conteudo, compresslevel=nivel_gzip, mtime=0))
+                if brotli is not None:
+                    with open(saida + '.br', 'wb') as f:
+                        f.write(brotli.compress(conteudo, quality=qualidade_brotli))
+            manifesto[relativo] = f"{DIST}/{gerado}"
+
+    with open(os.path.join(destino, MANIFEST), 'w') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    return manifesto
+
+
+class StaticAssets:
+    """
+    Integra o manifesto dos arquivos estáticos ao `url_for` e serve os arquivos
+    com hash com cache de longa duração e negociação de `Content-Encoding`.
+
+    As chaves de configuração usadas são:
+
+    - STATIC_ASSETS_ENABLED: true
+    """
+
+    def __init__(self):
+        self.manifest: Dict[str, str] = {}
+        self.immutable: frozenset = frozenset()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Carrega o manifesto (se existir), registra o comando `flask assets` e
+        substitui a view dos arquivos estáticos.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        app.extensions['static_assets'] = self
+        app.cli.add_command(assets_cli)
+        if not app.config.get('STATIC_ASSETS_ENABLED', True) or app.static_folder is None:
+            return
+
+        self.load(os.path.join(app.static_folder, DIST, MANIFEST))
+        if not self.manifest:
+            app.logger.debug("sem manifesto de arquivos estáticos; rode 'flask assets build'")
+            return
+        app.url_defaults(self._url_defaults)
+        app.view_functions['static'] = self.send_static
+
+    def load(self, caminho: str) -> None:
+        try:
+            with open(caminho) as f:
+                self.manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.manifest = {}
+        self.immutable = frozenset(self.manifest.values())
+
+    def _url_defaults(self, endpoint: str, values: dict) -> None:
+        if endpoint == 'static' and values.get('filename') in self.manifest:
+            values['filename'] = self.manifest[values['filename']]
+
+    def send_static(self, filename: str):
+        """
+        Serve um arquivo estático. Os arquivos com hash são servidos com
+        `Cache-Control: immutable` e, quando o navegador aceitar, na variante
+        brotli ou gzip gerada previamente.
+        """
+        pasta = current_app.static_folder
+        if filename not in self.immutable:
+            return current_app.send_static_file(filename)
+
+        tipo = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        codificacao, arquivo = self._variante(pasta, filename)
+        response = send_from_directory(pasta, arquivo, mimetype=tipo, max_age=UM_ANO)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if codificacao is not None:
+            response.headers['Content-Encoding'] = codificacao
+        return response
+
+    @staticmethod
+    def _variante(pasta: str, filename: str) -> tuple[Optional[str], str]:
+        aceitas = request.accept_encodings
+        for codificacao, sufixo in (('br', '.br'), ('gzip', '.gz')):
+            if aceitas[codificacao] and os.path.isfile(os.path.join(pasta, filename + sufixo)):
+                return codificacao, filename + sufixo
+        return None, filename
+
+
+assets_cli = AppGroup('assets', help="Gera os arquivos estáticos com hash e pré-comprimidos.")
+
+
+@assets_cli.command('build')
+@click.option('--gzip-level', 'nivel_gzip', default=9, show_default=True,
+              help="Nível de compressão do gzip.")
+@click.option('--brotli-quality', 'qualidade_brotli', default=11, show_default=True,
+              help="Qualidade da compressão brotli.")
+def build(nivel_gzip: int, qualidade_brotli: int):
+    """Gera static/dist/ e o manifesto usado por url_for('static', ...)."""
+    manifesto = construir_assets(current_app.static_folder, nivel_gzip, qualidade_brotli)
+    for original, gerado in manifesto.items():
+        click.echo(f"{original} -> {gerado}")
+    if brotli is None:
+        click.echo("módulo 'brotli' não instalado: variantes .br não geradas", err=True)
@@ -0,0 +1,210 @@
+"""
+Busca textual no catálogo de filmes.
+
+No SQLite o índice é uma tabela virtual FTS5 com uma cópia dos textos de cada
+filme, ligada ao `id` do filme pela tabela `filmes_fts_ids` e mantida por
+triggers; no PostgreSQL é um índice GIN sobre a
+função `filmes_documento_busca`, que o próprio banco mantém atualizado. Nos dois
+casos os acentos são ignorados, tanto no texto indexado quanto na consulta, e
+os títulos pesam mais que a sinopse na ordenação dos resultados.
+
+O índice é criado pela migração correspondente ou, quando as tabelas são
+criadas com `db.create_all()`, pelo evento `after_create` registrado em
+`registrar_eventos`.
+"""
+import re
+from typing import List, Optional
+
+import sqlalchemy as sa
+
+FTS_TABLE = 'filmes_fts'
+
+FTS_IDS_TABLE = 'filmes_fts_ids'
+
+# a tabela FTS5 guarda a própria cópia dos textos; o rowid de cada linha vem de
+# `filmes_fts_ids`, que liga o `id` do filme (UUID) a um inteiro estável (INTEGER
+# PRIMARY KEY não é renumerado pelo VACUUM, ao contrário do rowid implícito de
+# `filmes`). Os triggers localizam a linha do índice por esse inteiro, em uma
+# B-tree, sem percorrer a tabela FTS5.
+_SQLITE_DDL = [
+    f"""CREATE TABLE IF NOT EXISTS {FTS_IDS_TABLE} (
+        fts_rowid INTEGER PRIMARY KEY,
+        id CHAR(32) NOT NULL UNIQUE)""",
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        titulo_original, titulo_nacional, sinopse,
+        tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS filmes_fts_ai AFTER INSERT ON filmes BEGIN
+        INSERT INTO {FTS_IDS_TABLE}(id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, titulo_original, titulo_nacional, sinopse)
+        VALUES ((SELECT fts_rowid FROM {FTS_IDS_TABLE} WHERE id = new.id),
+                new.titulo_original, new.titulo_nacional, new.sinopse);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS filmes_fts_ad AFTER DELETE ON filmes BEGIN
+        DELETE FROM {FTS_TABLE}
+        WHERE rowid = (SELECT fts_rowid FROM {FTS_IDS_TABLE} WHERE id = old.id);
+        DELETE FROM {FTS_IDS_TABLE} WHERE id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS filmes_fts_au AFTER UPDATE OF
+        titulo_original, titulo_nacional, sinopse, id ON filmes BEGIN
+        UPDATE {FTS_IDS_TABLE} SET id = new.id WHERE id = old.id;
+        UPDATE {FTS_TABLE} SET titulo_original = new.titulo_original,
+                               titulo_nacional = new.titulo_nacional,
+                               sinopse = new.sinopse
+        WHERE rowid = (SELECT fts_rowid FROM {FTS_IDS_TABLE} WHERE id = new.id);
+    END""",
+    f"DELETE FROM {FTS_TABLE}",
+    f"DELETE FROM {FTS_IDS_TABLE}",
+    f"INSERT INTO {FTS_IDS_TABLE}(id) SELECT id FROM filmes",
+    f"""INSERT INTO {FTS_TABLE}(rowid, titulo_original, titulo_nacional, sinopse)
+        SELECT ids.fts_rowid, filmes.titulo_original, filmes.titulo_nacional, filmes.sinopse
+        FROM filmes JOIN {FTS_IDS_TABLE} AS ids ON ids.id = filmes.id""",
+]
+
+_SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS filmes_fts_au",
+    "DROP TRIGGER IF EXISTS filmes_fts_ad",
+    "DROP TRIGGER IF EXISTS filmes_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+    f"DROP TABLE IF EXISTS {FTS_IDS_TABLE}",
+]
+
+_POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # unaccent() não é IMMUTABLE; a versão com o dicionário explícito, dentro de
+    # uma função IMMUTABLE, pode ser usada em um índice
+    """CREATE OR REPLACE FUNCTION filmes_documento_busca(titulo_original text,
+                                                        titulo_nacional text,
+                                                        sinopse text)
+    RETURNS tsvector LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT setweight(to_tsvector('portuguese'::regconfig,
+                   public.unaccent('public.unaccent'::regdictionary, coalesce($1, ''))), 'A') ||
+               setweight(to_tsvector('portuguese'::regconfig,
+                   public.unaccent('public.unaccent'::regdictionary, coalesce($2, ''))), 'A') ||
+               setweight(to_tsvector('portuguese'::regconfig,
+                   public.unaccent('public.unaccent'::regdictionary, coalesce($3, ''))), 'B')
+    $$""",
+    """CREATE OR REPLACE FUNCTION filmes_consulta_busca(consulta text)
+    RETURNS tsquery LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT to_tsquery('portuguese'::regconfig,
+                          public.unaccent('public.unaccent'::regdictionary, $1))
+    $$""",
+    """CREATE INDEX IF NOT EXISTS ix_filmes_busca ON filmes
+        USING gin (filmes_documento_busca(titulo_original, titulo_nacional, sinopse))""",
+]
+
+_POSTGRESQL_DROP = [
+    "DROP INDEX IF EXISTS ix_filmes_busca",
+    "DROP FUNCTION IF EXISTS filmes_consulta_busca(text)",
+    "DROP FUNCTION IF EXISTS filmes_documento_busca(text, text, text)",
+]
+
+
+def criar_indice(connection) -> None:
+    """
+    Cria o índice de busca textual (e os mecanismos de sincronização) e o
+    preenche com as linhas já existentes.
+
+    Args:
+        connection: Conexão SQLAlchemy com o banco de dados.
+    """
+    comandos = {'sqlite': _SQLITE_DDL, 'postgresql': _POSTGRESQL_DDL}.get(connection.dialect.name, [])
+    for comando in comandos:
+        connection.execute(sa.text(comando))
+
+
+def remover_indice(connection) -> None:
+    """
+    Remove o índice de busca textual.
+
+    Args:
+        connection: Conexão SQLAlchemy com o banco de dados.
+    """
+    comandos = {'sqlite': _SQLITE_DROP, 'postgresql': _POSTGRESQL_DROP}.get(connection.dialect.name, [])
+    for comando in comandos:
+        connection.execute(sa.text(comando))
+
+
+def registrar_eventos(tabela: sa.Table) -> None:
+    """
+    Cria o índice junto com a tabela quando ela é criada por `metadata.create_all()`.
+
+    Args:
+        tabela: A tabela `filmes`.
+    """
+    sa.event.listen(tabela, 'after_create',
+                    lambda target, connection, **kw: criar_indice(connection))
+    sa.event.listen(tabela, 'before_drop',
+                    lambda target, connection, **kw: remover_indice(connection))
+
+
+def incluir_no_autogenerate(name, type_, parent_names) -> bool:
+    """
+    Filtro `include_name` do Alembic que ignora a tabela virtual do FTS5, suas
+    tabelas auxiliares e `filmes_fts_ids`, evitando que o autogenerate tente
+    removê-las.
+    """
+    return not (type_ == 'table' and name is not None and name.startswith(FTS_TABLE))
+
+
+def termos_da_consulta(texto: str) -> List[str]:
+    """
+    Extrai as palavras de uma consulta livre, descartando a sintaxe de
+    consulta do banco (aspas, operadores, parênteses).
+
+    Args:
+        texto: O texto digitado pelo usuário.
+
+    Returns:
+        A lista de palavras, na ordem em que aparecem.
+    """
+    return re.findall(r'\w+', texto or '')
+
+
+def buscar(model, texto: str, limite: int = 20, deslocamento: int = 0) -> Optional[sa.Select]:
+    """
+    Monta a consulta de busca textual sobre `model` (a classe `Filme`), ordenada
+    por relevância. Todas as palavras precisam estar presentes; a última é
+    tratada como prefixo, para permitir a busca enquanto o usuário digita.
+
+    Args:
+        model: A classe mapeada da tabela `filmes`.
+        texto: O texto digitado pelo usuário.
+        limite: Quantidade máxima de resultados.
+        deslocamento: Quantidade de resultados a pular.
+
+    Returns:
+        Um `Select` de `model`, ou None se a consulta não tiver nenhuma palavra.
+    """
+    from moviedb import db
+
+    termos = termos_da_consulta(texto)
+    if not termos:
+        return None
+
+    dialeto = db.session.get_bind(mapper=sa.inspect(model)).dialect.name
+    if dialeto == 'sqlite':
+        consulta = ' '.join(f'"{termo}"' for termo in termos) + '*'
+        fts = sa.table(FTS_TABLE, sa.column('rowid'))
+        ids = sa.table(FTS_IDS_TABLE, sa.column('fts_rowid'), sa.column('id'))
+        stmt = (sa.select(model).
+                join(ids, ids.c.id == model.id).
+                join(fts, fts.c.rowid == ids.c.fts_rowid).
+                where(sa.text(f"{FTS_TABLE} MATCH :consulta").bindparams(consulta=consulta)).
+                order_by(sa.text(f"bm25({FTS_TABLE}, 10.0, 10.0, 1.0)")))
+    elif dialeto == 'postgresql':
+        consulta = ' & '.join(termos[:-1] + [f"{termos[-1]}:*"])
+        documento = sa.func.filmes_documento_busca(model.titulo_original,
+                                                   model.titulo_nacional,
+                                                   model.sinopse)
+        tsquery = sa.func.filmes_consulta_busca(consulta)
+        stmt = (sa.select(model).
+                where(documento.op('@@')(tsquery)).
+                order_by(sa.func.ts_rank(documento, tsquery).desc()))
+    else:
+        # sem índice textual: recorre ao LIKE, sem ordenação por relevância
+        condicoes = [sa.or_(model.titulo_original.ilike(f"%{termo}%"),
+                            model.titulo_nacional.ilike(f"%{termo}%"),
+                            model.sinopse.ilike(f"%{termo}%")) for termo in termos]
+        stmt = sa.select(model).where(*condicoes).order_by(model.titulo_nacional)
+
+    return stmt.limit(limite).offset(deslocamento)
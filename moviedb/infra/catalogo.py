@@ -0,0 +1,433 @@
+import csv
+import io
+import json
+import sys
+import uuid
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from time import perf_counter
+from typing import Any, Dict, FrozenSet, IO, Iterable, Iterator, List, Optional, Tuple
+
+import click
+import sqlalchemy as sa
+from flask.cli import AppGroup
+
+VERDADEIROS = {'1', 'true', 't', 'sim', 's', 'yes', 'y'}
+FALSOS = {'0', 'false', 'f', 'nao', 'não', 'n', 'no'}
+
+
+def converter_booleano(valor: Any) -> Optional[bool]:
+    """
+    Converte textos como 'sim', 'true', '0' em booleano.
+
+    Returns:
+        O booleano correspondente, ou None se o valor não for reconhecido.
+    """
+    if isinstance(valor, bool):
+        return valor
+    texto = str(valor).strip().lower()
+    if texto in VERDADEIROS:
+        return True
+    if texto in FALSOS:
+        return False
+    return None
+
+
+def detectar_formato(nome: str, formato: Optional[str]) -> str:
+    if formato:
+        return formato
+    return 'ndjson' if nome.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def ler_linhas(arquivo: IO[str], formato: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Lê as linhas de um arquivo CSV (com cabeçalho) ou NDJSON, uma por vez.
+
+    Args:
+        arquivo: Arquivo de texto aberto (pode ser a entrada padrão).
+        formato: 'csv' ou 'ndjson'.
+
+    Yields:
+        Tuplas (número da linha, dicionário com os campos).
+    """
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for registro in leitor:
+            yield leitor.line_num, registro
+        return
+    for numero, linha in enumerate(arquivo, start=1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            registro = json.loads(linha)
+        except json.JSONDecodeError as e:
+            registro = e
+        yield numero, registro
+
+
+def _converter(coluna: sa.Column, valor: Any) -> Any:
+    if isinstance(coluna.type, sa.Boolean):
+        booleano = converter_booleano(valor)
+        if booleano is not None:
+            return booleano
+        raise ValueError(f"valor booleano inválido para '{coluna.name}': {valor!r}")
+    if isinstance(coluna.type, sa.Integer):
+        if isinstance(valor, bool):
+            raise ValueError(f"valor inteiro inválido para '{coluna.name}': {valor!r}")
+        try:
+            return int(str(valor).strip())
+        except ValueError:
+            raise ValueError(f"valor inteiro inválido para '{coluna.name}': {valor!r}")
+    if isinstance(coluna.type, sa.Numeric):
+        try:
+            return Decimal(str(valor).strip())
+        except InvalidOperation:
+            raise ValueError(f"valor decimal inválido para '{coluna.name}': {valor!r}")
+    if isinstance(coluna.type, sa.String):
+        texto = str(valor)
+        if coluna.type.length is not None and len(texto) > coluna.type.length:
+            raise ValueError(f"'{coluna.name}' excede {coluna.type.length} caracteres")
+        return texto
+    return valor
+
+
+def validar_linha(tabela: sa.Table, registro: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida um registro contra as restrições das colunas da tabela (obrigatoriedade,
+    tipo e tamanho) e converte os valores para os tipos Python correspondentes.
+    Campos desconhecidos são ignorados e campos ausentes recebem o valor padrão da
+    coluna (ou None); a chave primária é sempre gerada.
+
+    Args:
+        tabela: A tabela de destino.
+        registro: Os campos lidos do arquivo.
+
+    Returns:
+        O dicionário pronto para ser inserido.
+
+    Raises:
+        ValueError: Se algum campo violar as restrições da tabela.
+    """
+    if not isinstance(registro, dict):
+        raise ValueError(f"registro inválido: {registro}")
+    linha: Dict[str, Any] = {}
+    for coluna in tabela.columns:
+        if coluna.primary_key:
+            continue
+        valor = registro.get(coluna.name)
+        if valor is None or (isinstance(valor, str) and valor.strip() == ''):
+            if not coluna.nullable and coluna.default is None and coluna.server_default is None:
+                raise ValueError(f"campo obrigatório ausente: '{coluna.name}'")
+            # todas as linhas de um executemany precisam ter as mesmas chaves
+            padrao = coluna.default
+            linha[coluna.name] = padrao.arg if padrao is not None and padrao.is_scalar else None
+            continue
+        linha[coluna.name] = _converter(coluna, valor)
+    return linha
+
+
+def colunas_informadas(tabela: sa.Table, registro: Dict[str, Any]) -> FrozenSet[str]:
+    """
+    As colunas da tabela presentes no registro lido (no cabeçalho do CSV ou nas
+    chaves do objeto NDJSON), mesmo que vazias. A chave primária é ignorada.
+    """
+    return frozenset(coluna.name for coluna in tabela.columns
+                     if not coluna.primary_key and coluna.name in registro)
+
+
+def upsert_statement(tabela: sa.Table, dialeto: str, chave_natural: List[str],
+                     versao: Optional[str] = None, colunas: Optional[Iterable[str]] = None):
+    """
+    Monta o INSERT ... ON CONFLICT DO UPDATE para o dialeto em uso.
+
+    Args:
+        tabela: A tabela de destino.
+        dialeto: Nome do dialeto SQLAlchemy ('sqlite' ou 'postgresql').
+        chave_natural: Colunas da restrição de unicidade usada no conflito.
+        versao: Coluna de versão da linha, incrementada quando a linha é atualizada.
+        colunas: Colunas informadas na entrada; só elas são atualizadas nas
+            linhas já existentes (padrão: todas). Se nenhuma coluna além da
+            chave natural for informada, as linhas existentes ficam como estão.
+
+    Raises:
+        click.ClickException: Se o dialeto não suportar upsert.
+    """
+    if dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise click.ClickException(f"Upsert não suportado para o banco '{dialeto}'")
+    stmt = insert(tabela)
+    colunas = None if colunas is None else set(colunas)
+    atualizar = {coluna.name: stmt.excluded[coluna.name] for coluna in tabela.columns
+                 if not coluna.primary_key and coluna.name not in chave_natural and
+                 coluna.name != versao and (colunas is None or coluna.name in colunas)}
+    if not atualizar:
+        return stmt.on_conflict_do_nothing(index_elements=chave_natural)
+    if versao is not None:
+        atualizar[versao] = tabela.c[versao] + 1
+    return stmt.on_conflict_do_update(index_elements=chave_natural, set_=atualizar)
+
+
+def importar_filmes(arquivo: IO[str], formato: str, tamanho_lote: int,
+                    relatar_erro=None, relatar_lote=None) -> Dict[str, Any]:
+    """
+    Importa filmes em lotes, com upsert pela chave natural (título original e ano
+    de lançamento). Nos filmes já cadastrados, só as colunas presentes na entrada
+    são atualizadas. Apenas um lote fica em memória por vez. Deve ser chamada dentro
+    de um contexto de aplicação.
+
+    Args:
+        arquivo: Arquivo de texto aberto (CSV com cabeçalho ou NDJSON).
+        formato: 'csv' ou 'ndjson'.
+        tamanho_lote: Quantidade de linhas por INSERT/commit.
+        relatar_erro: Função chamada com (número da linha, mensagem) para linhas inválidas.
+        relatar_lote: Função chamada com o total de linhas gravadas após cada lote.
+
+    Returns:
+        Dicionário com 'lidas', 'gravadas', 'invalidas', 'segundos' e 'linhas_por_segundo'.
+    """
+    from moviedb import db
+    from moviedb.models.filmes import Filme
+
+    tabela = Filme.__table__
+    chave_natural = list(Filme.NATURAL_KEY)
+    dialeto = db.session.get_bind(mapper=sa.inspect(Filme)).dialect.name
+    # um comando para cada conjunto de colunas informadas (no CSV, o cabeçalho)
+    comandos: Dict[FrozenSet[str], Any] = {}
+
+    lidas = gravadas = invalidas = 0
+    inicio = perf_counter()
+    linhas = ler_linhas(arquivo, formato)
+    while True:
+        bloco = list(islice(linhas, tamanho_lote))
+        if not bloco:
+            break
+        # um mesmo comando não pode atualizar duas vezes a mesma linha: as
+        # linhas repetidas são combinadas, prevalecendo a última
+        lote: Dict[tuple, Tuple[Dict[str, Any], FrozenSet[str]]] = {}
+        for numero, registro in bloco:
+            lidas += 1
+            try:
+                linha = validar_linha(tabela, registro)
+            except ValueError as e:
+                invalidas += 1
+                if relatar_erro is not None:
+                    relatar_erro(numero, str(e))
+                continue
+            linha['id'] = uuid.uuid4()
+            informadas = colunas_informadas(tabela, registro)
+            chave = tuple(linha[c] for c in chave_natural)
+            if chave in lote:
+                anterior, informadas_antes = lote[chave]
+                linha = {**anterior, **{nome: linha[nome] for nome in informadas}}
+                informadas = informadas_antes | informadas
+            lote[chave] = (linha, informadas)
+        grupos: Dict[FrozenSet[str], List[Dict[str, Any]]] = {}
+        for linha, informadas in lote.values():
+            grupos.setdefault(informadas, []).append(linha)
+        for informadas, linhas_do_grupo in grupos.items():
+            if informadas not in comandos:
+                comandos[informadas] = upsert_statement(tabela, dialeto, chave_natural,
+                                                        versao=Filme.versao.key, colunas=informadas)
+            db.session.execute(comandos[informadas], linhas_do_grupo)
+        if lote:
+            db.session.commit()
+            gravadas += len(lote)
+            if relatar_lote is not None:
+                relatar_lote(gravadas)
+
+    segundos = perf_counter() - inicio
+    return {'lidas': lidas,
+            'gravadas': gravadas,
+            'invalidas': invalidas,
+            'segundos': segundos,
+            'linhas_por_segundo': (lidas / segundos) if segundos else 0.0}
+
+
+def _valor_exportado(valor: Any) -> Any:
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    if isinstance(valor, Decimal):
+        return format(valor.normalize(), 'f')
+    return str(valor)
+
+
+def consulta_exportacao(colunas: Optional[List[str]] = None,
+                        ano_de: Optional[int] = None,
+                        ano_ate: Optional[int] = None,
+                        lancado: Optional[bool] = None) -> Tuple[List[str], sa.Select]:
+    """
+    Monta a consulta da exportação, selecionando apenas as colunas pedidas.
+
+    Args:
+        colunas: Nomes das colunas a exportar (padrão: todas).
+        ano_de: Ano de lançamento mínimo (inclusive).
+        ano_ate: Ano de lançamento máximo (inclusive).
+        lancado: Filtra pela situação de lançamento.
+
+    Returns:
+        Tupla (nomes das colunas, consulta).
+
+    Raises:
+        ValueError: Se alguma coluna não existir.
+    """
+    from moviedb.models.filmes import Filme
+
+    tabela = Filme.__table__
+    nomes = list(colunas) if colunas else [coluna.name for coluna in tabela.columns]
+    desconhecidas = [nome for nome in nomes if nome not in tabela.columns]
+    if desconhecidas:
+        raise ValueError(f"Colunas desconhecidas: {', '.join(desconhecidas)}")
+
+    condicoes = []
+    if ano_de is not None:
+        condicoes.append(tabela.c.ano_lancamento >= ano_de)
+    if ano_ate is not None:
+        condicoes.append(tabela.c.ano_lancamento <= ano_ate)
+    if lancado is not None:
+        condicoes.append(tabela.c.lancado == lancado)
+
+    # a ordem da chave natural é atendida pelo índice da restrição de unicidade
+    stmt = (sa.select(*(tabela.c[nome] for nome in nomes)).
+            where(*condicoes).
+            order_by(*(tabela.c[nome] for nome in Filme.NATURAL_KEY)))
+    return nomes, stmt
+
+
+def exportar_filmes(formato: str,
+                    colunas: Optional[List[str]] = None,
+                    ano_de: Optional[int] = None,
+                    ano_ate: Optional[int] = None,
+                    lancado: Optional[bool] = None,
+                    linhas_por_bloco: int = 1000) -> Iterator[str]:
+    """
+    Gera o catálogo em CSV (com cabeçalho) ou NDJSON, em blocos de texto.
+
+    As linhas são lidas do banco com `yield_per` (cursor no servidor, quando o
+    driver suporta), então a memória usada não depende do tamanho da tabela.
+    Deve ser consumido dentro de um contexto de aplicação (em respostas HTTP,
+    use `stream_with_context`).
+
+    Args:
+        formato: 'csv' ou 'ndjson'.
+        colunas: Nomes das colunas a exportar (padrão: todas).
+        ano_de: Ano de lançamento mínimo (inclusive).
+        ano_ate: Ano de lançamento máximo (inclusive).
+        lancado: Filtra pela situação de lançamento.
+        linhas_por_bloco: Quantidade de linhas por bloco de texto gerado.
+
+    Yields:
+        Trechos do arquivo exportado.
+
+    Raises:
+        ValueError: Se alguma coluna não existir (antes de gerar qualquer trecho).
+    """
+    from moviedb import db
+
+    nomes, stmt = consulta_exportacao(colunas, ano_de, ano_ate, lancado)
+
+    def gerar() -> Iterator[str]:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer) if formato == 'csv' else None
+        if escritor is not None:
+            escritor.writerow(nomes)
+
+        resultado = db.session.execute(stmt.execution_options(yield_per=linhas_por_bloco))
+        for bloco in resultado.partitions():
+            for linha in bloco:
+                valores = [_valor_exportado(valor) for valor in linha]
+                if escritor is not None:
+                    escritor.writerow(valores)
+                else:
+                    buffer.write(json.dumps(dict(zip(nomes, valores)), ensure_ascii=False))
+                    buffer.write('\n')
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return gerar()
+
+
+def parametros_exportacao(valores: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converte os parâmetros textuais da exportação (query string ou CLI).
+
+    Raises:
+        ValueError: Se algum parâmetro for inválido.
+    """
+    parametros: Dict[str, Any] = {}
+    if valores.get('colunas'):
+        parametros['colunas'] = [nome.strip() for nome in valores['colunas'].split(',') if nome.strip()]
+    for chave in ('ano_de', 'ano_ate'):
+        if valores.get(chave) not in (None, ''):
+            try:
+                parametros[chave] = int(valores[chave])
+            except ValueError:
+                raise ValueError(f"'{chave}' precisa ser um número inteiro")
+    if valores.get('lancado') not in (None, ''):
+        parametros['lancado'] = converter_booleano(valores['lancado'])
+        if parametros['lancado'] is None:
+            raise ValueError("'lancado' precisa ser verdadeiro ou falso")
+    return parametros
+
+
+filmes_cli = AppGroup('filmes', help="Importa e exporta o catálogo de filmes.")
+
+
+@filmes_cli.command('import')
+@click.argument('arquivo', type=click.File('r', encoding='utf-8'), default='-')
+@click.option('--format', 'formato', type=click.Choice(['csv', 'ndjson']), default=None,
+              help="Formato da entrada (padrão: pela extensão do arquivo, ou csv).")
+@click.option('--batch-size', 'tamanho_lote', default=5000, show_default=True,
+              help="Quantidade de linhas por lote.")
+@click.option('--max-errors', 'max_erros', default=20, show_default=True,
+              help="Quantidade máxima de erros exibidos.")
+def import_command(arquivo, formato, tamanho_lote, max_erros):
+    """Importa filmes de ARQUIVO (CSV ou NDJSON; '-' para a entrada padrão)."""
+    formato = detectar_formato(arquivo.name, formato)
+    erros_exibidos = 0
+
+    def relatar_erro(numero, mensagem):
+        nonlocal erros_exibidos
+        if erros_exibidos < max_erros:
+            click.echo(f"linha {numero}: {mensagem}", err=True)
+        erros_exibidos += 1
+
+    inicio = perf_counter()
+
+    def relatar_lote(gravadas):
+        decorrido = perf_counter() - inicio
+        click.echo(f"{gravadas} filmes gravados ({gravadas / decorrido:,.0f} linhas/s)", err=True)
+
+    resultado = importar_filmes(arquivo, formato, tamanho_lote, relatar_erro, relatar_lote)
+    click.echo(f"{resultado['lidas']} linhas lidas, {resultado['gravadas']} gravadas, "
+               f"{resultado['invalidas']} inválidas em {resultado['segundos']:.1f}s "
+               f"({resultado['linhas_por_segundo']:,.0f} linhas/s)")
+    if resultado['invalidas']:
+        sys.exit(1)
+
+
+@filmes_cli.command('export')
+@click.argument('arquivo', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--format', 'formato', type=click.Choice(['csv', 'ndjson']), default=None,
+              help="Formato da saída (padrão: pela extensão do arquivo, ou csv).")
+@click.option('--columns', 'colunas', default=None,
+              help="Colunas separadas por vírgula (padrão: todas).")
+@click.option('--ano-de', default=None, help="Ano de lançamento mínimo.")
+@click.option('--ano-ate', default=None, help="Ano de lançamento máximo.")
+@click.option('--lancado', default=None, help="Somente filmes lançados (sim) ou não (não).")
+def export_command(arquivo, formato, colunas, ano_de, ano_ate, lancado):
+    """Exporta o catálogo para ARQUIVO (CSV ou NDJSON; '-' para a saída padrão)."""
+    formato = detectar_formato(arquivo.name, formato)
+    try:
+        parametros = parametros_exportacao({'colunas': colunas, 'ano_de': ano_de,
+                                            'ano_ate': ano_ate, 'lancado': lancado})
+        for trecho in exportar_filmes(formato, **parametros):
+            arquivo.write(trecho)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
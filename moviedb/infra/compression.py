@@ -0,0 +1,168 @@
+import gzip
+import re
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, g, request
+from werkzeug.http import parse_etags
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+COMPRESSIVEIS = ('text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+                 'application/javascript', 'application/json', 'application/x-ndjson',
+                 'application/xml', 'image/svg+xml')
+
+# sufixo acrescentado ao ETag da representação comprimida
+_SUFIXO_ETAG = re.compile(r'-(?:gzip|br)"')
+
+
+def gzip_stream(partes: Iterable[bytes], nivel: int) -> Iterator[bytes]:
+    """
+    Comprime um fluxo com gzip sem acumulá-lo: cada parte é enviada assim que
+    comprimida (`Z_SYNC_FLUSH`), preservando o streaming da resposta.
+    """
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        dados = compressor.compress(parte) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+def brotli_stream(partes: Iterable[bytes], qualidade: int) -> Iterator[bytes]:
+    """
+    Comprime um fluxo com brotli sem acumulá-lo. Veja `gzip_stream`.
+    """
+    compressor = brotli.Compressor(quality=qualidade)
+    for parte in partes:
+        dados = compressor.process(parte) + compressor.flush()
+        if dados:
+            yield dados
+    yield compressor.finish()
+
+
+class Compression:
+    """
+    Compressão gzip/brotli das respostas dinâmicas, negociada pelo cabeçalho
+    `Accept-Encoding`.
+
+    Não são comprimidas as respostas pequenas, as de tipos que não se
+    beneficiam (imagens, arquivos já comprimidos), as que já têm
+    `Content-Encoding` (como os arquivos estáticos pré-comprimidos) e as
+    servidas diretamente de arquivo. Também não são comprimidas as páginas que
+    contêm o token CSRF: o tamanho comprimido de um segredo refletido junto com
+    texto controlado pelo atacante permite deduzi-lo (BREACH). As respostas em
+    streaming são comprimidas parte a parte, sem serem acumuladas em memória.
+
+    O ETag forte da resposta continua forte, mas recebe o sufixo da codificação
+    (`"abc"` passa a `"abc-gzip"`), já que os bytes enviados são outros. O
+    sufixo é retirado do `If-None-Match` antes de a view compará-lo com o ETag
+    que ela calcula, e devolvido ao ETag das respostas `304`.
+
+    As chaves de configuração usadas são:
+
+    - COMPRESSION_ENABLED: true
+    - COMPRESSION_LEVEL: 6 (gzip, 1 a 9)
+    - COMPRESSION_BROTLI_QUALITY: 4 (0 a 11)
+    - COMPRESSION_MIN_SIZE: 500 (bytes; não se aplica a respostas em streaming)
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.level = 6
+        self.brotli_quality = 4
+        self.min_size = 500
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Configura a compressão e registra o hook `after_request`.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        self.enabled = bool(app.config.get('COMPRESSION_ENABLED', True))
+        self.level = int(app.config.get('COMPRESSION_LEVEL', self.level))
+        self.brotli_quality = int(app.config.get('COMPRESSION_BROTLI_QUALITY', self.brotli_quality))
+        self.min_size = int(app.config.get('COMPRESSION_MIN_SIZE', self.min_size))
+        app.extensions['compression'] = self
+        if self.enabled:
+            app.before_request(self.remover_codificacao_das_condicoes)
+            app.after_request(self.compress)
+
+    @staticmethod
+    def remover_codificacao_das_condicoes() -> None:
+        """
+        Retira o sufixo da codificação dos ETags do cabeçalho `If-None-Match`,
+        para que as views os comparem com os ETags que elas mesmas calculam.
+        """
+        valor = request.environ.get('HTTP_IF_NONE_MATCH')
+        if valor and _SUFIXO_ETAG.search(valor):
+            g.if_none_match_codificado = parse_etags(valor)
+            request.environ['HTTP_IF_NONE_MATCH'] = _SUFIXO_ETAG.sub('"', valor)
+
+    def compress(self, response: Response) -> Response:
+        """
+        Comprime a resposta, se o cliente aceitar e ela for elegível.
+        """
+        if response.status_code == 304:
+            return self._etag_do_304(response)
+        if not self._elegivel(response):
+            return response
+        codificacao = self._negociar()
+        if codificacao is None:
+            return response
+
+        response.vary.add('Accept-Encoding')
+        if response.is_streamed:
+            partes = response.iter_encoded()
+            if codificacao == 'br':
+                response.response = brotli_stream(partes, self.brotli_quality)
+            else:
+                response.response = gzip_stream(partes, self.level)
+            response.headers.pop('Content-Length', None)
+        else:
+            dados = response.get_data()
+            if len(dados) < self.min_size:
+                return response
+            if codificacao == 'br':
+                response.set_data(brotli.compress(dados, quality=self.brotli_quality))
+            else:
+                response.set_data(gzip.compress(dados, compresslevel=self.level, mtime=0))
+
+        response.headers['Content-Encoding'] = codificacao
+        # a representação comprimida não é idêntica byte a byte à original
+        etag, fraco = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{codificacao}", weak=fraco)
+        return response
+
+    def _etag_do_304(self, response: Response) -> Response:
+        # o 304 repete o ETag que o cliente tem, com o sufixo da codificação
+        condicao = g.get('if_none_match_codificado')
+        etag, fraco = response.get_etag()
+        codificacao = self._negociar()
+        if condicao is not None and etag and codificacao is not None:
+            if condicao.contains_weak(f"{etag}-{codificacao}"):
+                response.set_etag(f"{etag}-{codificacao}", weak=fraco)
+                response.vary.add('Accept-Encoding')
+        return response
+
+    @staticmethod
+    def _elegivel(response: Response) -> bool:
+        csrf_field = current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')
+        return (request.method != 'HEAD' and
+                g.get(csrf_field) is None and
+                200 <= response.status_code < 300 and
+                response.status_code != 204 and
+                not response.direct_passthrough and
+                'Content-Encoding' not in response.headers and
+                'no-transform' not in response.headers.get('Cache-Control', '') and
+                response.mimetype in COMPRESSIVEIS)
+
+    @staticmethod
+    def _negociar() -> Optional[str]:
+        opcoes = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(opcoes)
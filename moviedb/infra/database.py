@@ -0,0 +1,195 @@
+"""
+Configuração dos engines do SQLAlchemy a partir do arquivo de configuração.
+
+As chaves abaixo são traduzidas para `SQLALCHEMY_ENGINE_OPTIONS` (as opções
+definidas diretamente nessa chave têm precedência):
+
+- DB_POOL_SIZE: conexões mantidas no pool
+- DB_MAX_OVERFLOW: conexões extras permitidas em picos
+- DB_POOL_TIMEOUT: segundos de espera por uma conexão livre
+- DB_POOL_RECYCLE: segundos após os quais uma conexão é reaberta
+- DB_POOL_PRE_PING: testa a conexão antes de usá-la
+- DB_QUERY_CACHE_SIZE: tamanho do cache de comandos compilados do SQLAlchemy
+- DB_STATEMENT_CACHE_SIZE: tamanho do cache de comandos preparados do driver
+  (`cached_statements` no sqlite3, `prepared_statement_cache_size` no asyncpg)
+
+Com SQLite, SQLITE_PRODUCTION ativa um perfil para uso com vários processos e
+threads: journal WAL (leituras não esperam pelas escritas), `synchronous=NORMAL`,
+espera por bloqueios (`busy_timeout`) e leitura via mmap. Os valores podem ser
+ajustados com SQLITE_BUSY_TIMEOUT (ms, padrão 5000) e SQLITE_MMAP_SIZE (bytes,
+padrão 268435456).
+
+Réplicas de leitura são declaradas em DB_REPLICA_URIS e registradas como binds
+(`replica_0`, `replica_1`, ...). A `RoutingSession` envia a elas as consultas
+somente leitura sobre as tabelas de DB_REPLICA_TABLES (padrão: `filmes`) e
+todo o resto ao banco principal. Depois da primeira escrita (flush ou comando
+DML), a sessão passa a usar apenas o principal até o fim da requisição, de
+forma que quem escreveu sempre lê o que escreveu.
+"""
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional
+
+import sqlalchemy as sa
+from flask import Flask, current_app
+from flask_sqlalchemy.session import Session
+
+PREFIXO_REPLICA = 'replica_'
+
+_OPCOES_DO_POOL = {
+    'DB_POOL_SIZE': ('pool_size', int),
+    'DB_MAX_OVERFLOW': ('max_overflow', int),
+    'DB_POOL_TIMEOUT': ('pool_timeout', float),
+    'DB_POOL_RECYCLE': ('pool_recycle', int),
+    'DB_POOL_PRE_PING': ('pool_pre_ping', bool),
+    'DB_QUERY_CACHE_SIZE': ('query_cache_size', int),
+}
+
+
+def opcoes_do_engine(config: Dict[str, Any], uri: str) -> Dict[str, Any]:
+    """
+    Monta as opções de `create_engine` a partir das chaves DB_* da configuração.
+
+    Args:
+        config: O dicionário de configuração da aplicação.
+        uri: A URI do banco, usada para decidir as opções específicas do driver.
+
+    Returns:
+        As opções, já combinadas com SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    url = sa.make_url(uri)
+    memoria = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    opcoes: Dict[str, Any] = {}
+    for chave, (opcao, tipo) in _OPCOES_DO_POOL.items():
+        if config.get(chave) is None:
+            continue
+        # o SQLite em memória usa um pool de uma conexão por thread, sem overflow
+        if memoria and opcao in ('pool_size', 'max_overflow', 'pool_timeout'):
+            continue
+        opcoes[opcao] = tipo(config[chave])
+
+    if config.get('DB_STATEMENT_CACHE_SIZE') is not None:
+        tamanho = int(config['DB_STATEMENT_CACHE_SIZE'])
+        if url.get_backend_name() == 'sqlite':
+            opcoes['connect_args'] = {'cached_statements': tamanho}
+        elif url.get_driver_name() == 'asyncpg':
+            opcoes['connect_args'] = {'prepared_statement_cache_size': tamanho}
+
+    configuradas = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if 'connect_args' in opcoes and 'connect_args' in configuradas:
+        configuradas['connect_args'] = {**opcoes['connect_args'], **configuradas['connect_args']}
+    return {**opcoes, **configuradas}
+
+
+def pragmas_sqlite(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Retorna os PRAGMAs do perfil de produção do SQLite.
+    """
+    return {'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': int(config.get('SQLITE_BUSY_TIMEOUT', 5000)),
+            'mmap_size': int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}
+
+
+def binds_das_replicas(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Acrescenta as réplicas de DB_REPLICA_URIS a SQLALCHEMY_BINDS, com as mesmas
+    opções de engine do banco principal.
+
+    Args:
+        config: O dicionário de configuração da aplicação.
+
+    Returns:
+        O novo valor de SQLALCHEMY_BINDS.
+    """
+    binds = dict(config.get('SQLALCHEMY_BINDS') or {})
+    for indice, uri in enumerate(config.get('DB_REPLICA_URIS') or []):
+        binds[f"{PREFIXO_REPLICA}{indice}"] = {'url': uri, **opcoes_do_engine(config, uri)}
+    return binds
+
+
+@dataclass(frozen=True)
+class Replicas:
+    """
+    As réplicas de leitura da aplicação e as tabelas cujas leituras elas atendem.
+    """
+    engines: List[sa.Engine]
+    tabelas: FrozenSet[str]
+
+
+def configurar_engines(app: Flask, db: Any) -> None:
+    """
+    Registra as réplicas de leitura e aplica o perfil de produção do SQLite (se
+    ativado) a cada conexão nova dos engines SQLite da aplicação. Deve ser
+    chamada logo após `db.init_app`.
+
+    Args:
+        app: A aplicação Flask.
+        db: A extensão Flask-SQLAlchemy.
+    """
+    with app.app_context():
+        chaves = sorted(chave for chave in db.engines
+                        if isinstance(chave, str) and chave.startswith(PREFIXO_REPLICA))
+        app.extensions['replicas'] = Replicas(
+            engines=[db.engines[chave] for chave in chaves],
+            tabelas=frozenset(app.config.get('DB_REPLICA_TABLES', ['filmes'])))
+    if chaves:
+        app.logger.debug("%d réplica(s) de leitura para %s", len(chaves),
+                         ', '.join(sorted(app.extensions['replicas'].tabelas)))
+
+    if not app.config.get('SQLITE_PRODUCTION', False):
+        return
+    pragmas = pragmas_sqlite(app.config)
+
+    def ao_conectar(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for nome, valor in pragmas.items():
+                cursor.execute(f"PRAGMA {nome} = {valor}")
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                sa.event.listen(engine, 'connect', ao_conectar)
+
+
+class RoutingSession(Session):
+    """
+    Sessão que distribui as consultas entre o banco principal e as réplicas.
+
+    Vão para uma réplica (sorteada uma vez por sessão) os SELECTs sem `FOR
+    UPDATE` cuja entidade principal é de uma das tabelas de DB_REPLICA_TABLES,
+    enquanto a sessão ainda não escreveu nada. Flushes, comandos DML, SQL
+    textual e `Session.connection()` usam o banco principal; os três primeiros
+    fixam a sessão no principal, o que vale até o fim da requisição (a sessão
+    de `db.session` é descartada ao final de cada contexto da aplicação).
+    """
+
+    def __init__(self, db: Any, **kwargs: Any) -> None:
+        super().__init__(db, **kwargs)
+        self.fixada_no_principal = False
+        self._replica: Optional[sa.Engine] = None
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, bind: Any = None, **kwargs: Any):
+        if bind is not None:
+            return bind
+        principal = super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self._flushing or (clause is not None and not _somente_leitura(clause)):
+            self.fixada_no_principal = True
+            return principal
+        if self.fixada_no_principal or mapper is None or clause is None:
+            return principal
+
+        replicas: Optional[Replicas] = current_app.extensions.get('replicas')
+        if not replicas or not replicas.engines or \
+                sa.inspect(mapper).local_table.name not in replicas.tabelas:
+            return principal
+        if self._replica is None:
+            self._replica = random.choice(replicas.engines)
+        return self._replica
+
+
+def _somente_leitura(clause: Any) -> bool:
+    return isinstance(clause, (sa.Select, sa.CompoundSelect)) and clause._for_update_arg is None
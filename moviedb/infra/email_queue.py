@@ -0,0 +1,343 @@
+import abc
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+import click
+import sqlalchemy as sa
+from flask import Flask, current_app
+from flask.cli import AppGroup
+
+
+def agora_utc() -> datetime:
+    """
+    Retorna o instante atual em UTC, sem fuso horário, no mesmo formato usado
+    pelo `CURRENT_TIMESTAMP` do banco de dados.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class EmailTransport(abc.ABC):
+    """
+    Interface dos transportes de e-mail usados pelos workers da fila.
+
+    Cada mensagem é um dicionário com as chaves 'From', 'To', 'Subject' e 'TextBody'.
+    """
+
+    @abc.abstractmethod
+    def send_batch(self, mensagens: List[Dict[str, str]]) -> List[Optional[str]]:
+        """
+        Envia um lote de mensagens.
+
+        Args:
+            mensagens: Lista de mensagens a serem enviadas.
+
+        Returns:
+            Uma lista com um item por mensagem: None se ela foi aceita, ou a
+            descrição do erro caso contrário.
+
+        Raises:
+            Exception: Se o lote inteiro não puder ser enviado (erro de rede, etc.).
+        """
+
+
+class PostmarkTransport(EmailTransport):
+    """
+    Transporte que usa o endpoint de lotes do Postmark. Um único `PostmarkClient`
+    é criado por transporte, de forma que a sessão HTTP (e suas conexões
+    keep-alive) é reaproveitada por todos os envios.
+    """
+
+    def __init__(self, server_token: str):
+        self.server_token = server_token
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from postmarker.core import PostmarkClient
+                    self._client = PostmarkClient(server_token=self.server_token)
+        return self._client
+
+    def send_batch(self, mensagens: List[Dict[str, str]]) -> List[Optional[str]]:
+        respostas = self.client.emails.send_batch(*mensagens)
+        return [None if resposta.get('ErrorCode', 0) == 0 else resposta.get('Message', 'erro')
+                for resposta in respostas]
+
+
+class FakeTransport(EmailTransport):
+    """
+    Transporte local que apenas guarda as mensagens em memória, para testes e
+    desenvolvimento. As mensagens "enviadas" ficam disponíveis em `outbox`.
+    """
+
+    def __init__(self):
+        self.outbox: List[Dict[str, str]] = []
+        self._lock = threading.Lock()
+
+    def send_batch(self, mensagens: List[Dict[str, str]]) -> List[Optional[str]]:
+        with self._lock:
+            self.outbox.extend(mensagens)
+        return [None] * len(mensagens)
+
+
+class EmailQueue:
+    """
+    Fila persistente de e-mails, armazenada na tabela `fila_emails`.
+
+    Os handlers das requisições chamam `enqueue()`, que apenas adiciona a mensagem
+    à sessão corrente; ela é gravada junto com o commit da requisição. Um conjunto
+    de threads (iniciado sob demanda no primeiro envio) ou o comando
+    `flask emails worker` retira as mensagens da fila em lotes, envia pelo
+    transporte configurado e reagenda as falhas com backoff exponencial.
+
+    As chaves de configuração usadas são:
+
+    - EMAIL_TRANSPORT: "postmark" ou "fake"
+    - EMAIL_WORKER_THREADS: 1 (0 desativa as threads no processo da aplicação)
+    - EMAIL_BATCH_SIZE: 50 (máximo de 500, limite do Postmark)
+    - EMAIL_MAX_ATTEMPTS: 5
+    - EMAIL_RETRY_BACKOFF: 30 (segundos, dobrando a cada tentativa)
+    - EMAIL_POLL_INTERVAL: 5 (segundos)
+    - EMAIL_LEASE_TIMEOUT: 300 (segundos até uma mensagem presa em envio ser retomada)
+    """
+
+    PENDING_KEY = 'email_queue_pending'
+
+    def __init__(self):
+        self.app: Optional[Flask] = None
+        self.transport: Optional[EmailTransport] = None
+        self.worker_threads = 1
+        self.batch_size = 50
+        self.max_attempts = 5
+        self.retry_backoff = 30.0
+        self.poll_interval = 5.0
+        self.lease_timeout = 300.0
+        self._threads: List[threading.Thread] = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app: Flask, session: Any = None) -> None:
+        """
+        Configura a fila a partir do dicionário de configuração da aplicação.
+
+        Args:
+            app: A aplicação Flask.
+            session: A sessão cujos commits devem acordar os workers.
+        """
+        self.app = app
+        self.worker_threads = int(app.config.get('EMAIL_WORKER_THREADS', self.worker_threads))
+        self.batch_size = min(int(app.config.get('EMAIL_BATCH_SIZE', self.batch_size)), 500)
+        self.max_attempts = int(app.config.get('EMAIL_MAX_ATTEMPTS', self.max_attempts))
+        self.retry_backoff = float(app.config.get('EMAIL_RETRY_BACKOFF', self.retry_backoff))
+        self.poll_interval = float(app.config.get('EMAIL_POLL_INTERVAL', self.poll_interval))
+        self.lease_timeout = float(app.config.get('EMAIL_LEASE_TIMEOUT', self.lease_timeout))
+
+        transporte = app.config.get('EMAIL_TRANSPORT', 'postmark').lower()
+        if transporte == 'fake':
+            self.transport = FakeTransport()
+        elif transporte == 'postmark':
+            self.transport = PostmarkTransport(app.config.get('SERVER_TOKEN'))
+        else:
+            raise ValueError(f"Transporte de e-mail desconhecido: '{transporte}'")
+
+        app.extensions['email_queue'] = self
+        app.cli.add_command(emails_cli)
+
+        if session is not None and not self._listening:
+            sa.event.listen(session, 'after_commit', self._after_commit)
+            self._listening = True
+
+    def enqueue(self, destinatario: str, assunto: str, corpo: str) -> None:
+        """
+        Adiciona uma mensagem à fila. A mensagem só é gravada (e enviada) após o
+        commit da sessão corrente.
+
+        Args:
+            destinatario: Endereço de e-mail do destinatário.
+            assunto: Assunto do e-mail.
+            corpo: Corpo do e-mail em texto simples.
+        """
+        from moviedb.models.emails import MensagemEmail
+        from moviedb import db
+
+        mensagem = MensagemEmail(destinatario=destinatario,
+                                 assunto=assunto,
+                                 corpo=corpo,
+                                 proxima_tentativa=agora_utc())
+        db.session.add(mensagem)
+        db.session.info[self.PENDING_KEY] = True
+        self.start()
+
+    def start(self) -> None:
+        """
+        Inicia as threads de envio neste processo, caso ainda não estejam rodando.
+        As threads são iniciadas sob demanda para que processos que nunca enviam
+        e-mails (comandos de CLI, processo mestre antes do fork) não as criem.
+        """
+        if self.worker_threads <= 0 or self.app is None:
+            return
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.worker_threads:
+                thread = threading.Thread(target=self.run,
+                                          name=f"email-worker-{len(self._threads)}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping.clear()
+
+    def run(self, app: Optional[Flask] = None) -> None:
+        """
+        Laço principal de um worker: processa lotes enquanto houver mensagens e
+        espera por um commit com novas mensagens (ou pelo intervalo de polling).
+        """
+        app = app or self.app
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    enviados = self.process_batch()
+            except Exception as e:
+                app.logger.exception("Erro no worker de e-mail: %s", e)
+                enviados = 0
+            if enviados == 0:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def process_batch(self) -> int:
+        """
+        Reserva um lote de mensagens prontas para envio, envia pelo transporte
+        e registra o resultado de cada uma. Deve ser chamado dentro de um
+        contexto de aplicação.
+
+        Returns:
+            A quantidade de mensagens processadas (com sucesso ou não).
+        """
+        from moviedb.models.emails import MensagemEmail
+        from moviedb.models.enumeracoes import StatusEmail
+        from moviedb import db
+
+        mensagens = self._claim_batch()
+        if not mensagens:
+            return 0
+
+        remetente = current_app.config.get('EMAIL_SENDER')
+        conteudo = [{'From': remetente,
+                     'To': mensagem.destinatario,
+                     'Subject': mensagem.assunto,
+                     'TextBody': mensagem.corpo} for mensagem in mensagens]
+        inicio = perf_counter()
+        try:
+            erros = self.transport.send_batch(conteudo)
+        except Exception as e:
+            current_app.logger.error("Erro ao enviar lote de %d e-mails: %s", len(mensagens), e)
+            erros = [str(e) or type(e).__name__] * len(mensagens)
+        metrics = current_app.extensions.get('metrics')
+        if metrics is not None:
+            falhas = sum(1 for erro in erros if erro is not None)
+            metrics.observe_email(type(self.transport).__name__, perf_counter() - inicio,
+                                  len(erros) - falhas, falhas)
+
+        agora = agora_utc()
+        for mensagem, erro in zip(mensagens, erros):
+            mensagem.lote = None
+            if erro is None:
+                mensagem.status = StatusEmail.ENVIADO
+                mensagem.data_envio = agora
+                mensagem.ultimo_erro = None
+                continue
+            mensagem.tentativas += 1
+            mensagem.ultimo_erro = erro
+            if mensagem.tentativas >= self.max_attempts:
+                mensagem.status = StatusEmail.FALHOU
+                current_app.logger.error("Desistindo do e-mail para %s: %s", mensagem.destinatario, erro)
+            else:
+                mensagem.status = StatusEmail.PENDENTE
+                mensagem.proxima_tentativa = agora + self._backoff(mensagem.tentativas)
+        db.session.commit()
+        current_app.logger.debug("Lote de %d e-mails processado", len(mensagens))
+        return len(mensagens)
+
+    def _claim_batch(self) -> List[Any]:
+        from moviedb.models.emails import MensagemEmail
+        from moviedb.models.enumeracoes import StatusEmail
+        from moviedb import db
+
+        agora = agora_utc()
+        # mensagens em envio cujo prazo expirou pertencem a um worker que morreu
+        prontas = (sa.select(MensagemEmail.id).
+                   where(MensagemEmail.status.in_([StatusEmail.PENDENTE, StatusEmail.ENVIANDO]),
+                         MensagemEmail.proxima_tentativa <= agora).
+                   order_by(MensagemEmail.proxima_tentativa).
+                   limit(self.batch_size))
+        ids = db.session.execute(prontas).scalars().all()
+        if not ids:
+            db.session.rollback()
+            return []
+
+        lote = uuid.uuid4()
+        db.session.execute(
+            sa.update(MensagemEmail).
+            where(MensagemEmail.id.in_(ids),
+                  MensagemEmail.status.in_([StatusEmail.PENDENTE, StatusEmail.ENVIANDO]),
+                  MensagemEmail.proxima_tentativa <= agora).
+            values(status=StatusEmail.ENVIANDO,
+                   lote=lote,
+                   proxima_tentativa=agora + timedelta(seconds=self.lease_timeout)).
+            execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return db.session.execute(
+            sa.select(MensagemEmail).where(MensagemEmail.lote == lote)
+        ).scalars().all()
+
+    def _backoff(self, tentativas: int) -> timedelta:
+        atraso = self.retry_backoff * (2 ** (tentativas - 1))
+        return timedelta(seconds=atraso * random.uniform(0.8, 1.2))
+
+    def _after_commit(self, session) -> None:
+        if session.info.pop(self.PENDING_KEY, False):
+            self._wakeup.set()
+
+
+emails_cli = AppGroup('emails', help="Gerencia a fila de envio de e-mails.")
+
+
+@emails_cli.command('worker')
+@click.option('--threads', default=1, show_default=True, help="Quantidade de threads de envio.")
+def worker_command(threads: int):
+    """Processa a fila de e-mails continuamente, em primeiro plano."""
+    fila: EmailQueue = current_app.extensions['email_queue']
+    fila.worker_threads = threads
+    fila.start()
+    click.echo(f"{threads} worker(s) de e-mail rodando. Ctrl+C para encerrar.")
+    try:
+        for worker in list(fila._threads):
+            worker.join()
+    except KeyboardInterrupt:
+        fila.stop()
+
+
+@emails_cli.command('flush')
+def flush_command():
+    """Envia todas as mensagens prontas e encerra."""
+    fila: EmailQueue = current_app.extensions['email_queue']
+    total = 0
+    while (enviados := fila.process_batch()) > 0:
+        total += enviados
+    click.echo(f"{total} mensagem(ns) processada(s).")
@@ -0,0 +1,54 @@
+"""
+Serialização JSON da aplicação (`app.json`) com o orjson, quando instalado.
+
+O orjson serializa `UUID`, `datetime` e `date` nativamente e gera os bytes da
+resposta diretamente, sem passar por `str`. Valores `Decimal` são convertidos
+em texto, como no provedor padrão do Flask, para não perder precisão. Sem o
+orjson, o provedor padrão do Flask é usado.
+"""
+from decimal import Decimal
+from typing import Any
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+
+def _converter(valor: Any) -> Any:
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return DefaultJSONProvider.default(valor)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provedor JSON baseado no orjson. As chaves não são ordenadas: a ordem dos
+    campos é a ordem em que foram montados.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_converter, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        dados = self._prepare_response_obj(args, kwargs)
+        opcoes = orjson.OPT_NON_STR_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            opcoes |= orjson.OPT_INDENT_2
+        return self._app.response_class(orjson.dumps(dados, default=_converter, option=opcoes) + b'\n',
+                                        mimetype=self.mimetype)
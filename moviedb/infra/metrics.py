@@ -0,0 +1,217 @@
+"""
+Métricas de desempenho no formato do Prometheus.
+
+São registrados, por endpoint, o tempo de resposta, a quantidade de consultas
+SQL e o tempo gasto no banco, além do tempo de renderização de cada template e
+do tempo de envio dos lotes de e-mail. As métricas são expostas em `/metrics`.
+
+Com vários workers (gunicorn, por exemplo), cada processo tem seus próprios
+contadores. Para agregá-los, defina a variável de ambiente
+`PROMETHEUS_MULTIPROC_DIR` apontando para um diretório vazio *antes* de iniciar
+o servidor, e remova os arquivos dos workers que terminarem com o hook do
+gunicorn:
+
+    from prometheus_client import multiprocess
+
+    def child_exit(server, worker):
+        multiprocess.mark_process_dead(worker.pid)
+"""
+import os
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+from flask import Flask, Response, before_render_template, g, has_request_context, request, \
+    template_rendered
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, \
+    generate_latest, multiprocess
+
+from moviedb.infra import query_timing
+
+# quantidade de consultas por requisição
+_QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf'))
+
+
+def request_timings() -> Optional[Dict[str, Any]]:
+    """
+    Obtém os tempos acumulados da requisição corrente.
+
+    Returns:
+        Dicionário com `inicio` (perf_counter do início da requisição), `db`
+        (segundos no banco), `consultas` (quantidade de consultas) e `template`
+        (segundos renderizando templates), ou None fora de uma requisição.
+    """
+    if not has_request_context():
+        return None
+    return g.get('request_timings')
+
+
+class Metrics:
+    """
+    Coleta de métricas de desempenho da aplicação.
+
+    As chaves de configuração usadas são:
+
+    - METRICS_ENABLED: true
+    - METRICS_ENDPOINT: "/metrics"
+    - SERVER_TIMING_ENABLED: true (adiciona o cabeçalho `Server-Timing` com os
+      tempos de banco, template e aplicação, visíveis nas ferramentas de
+      desenvolvedor do navegador)
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.server_timing = True
+        self.registry = CollectorRegistry()
+        self.request_duration = Histogram('moviedb_http_request_duration_seconds',
+                                          'Tempo de resposta das requisições',
+                                          ['endpoint', 'method', 'status'],
+                                          registry=self.registry)
+        self.request_queries = Histogram('moviedb_http_request_db_queries',
+                                         'Consultas SQL por requisição',
+                                         ['endpoint'],
+                                         buckets=_QUERY_BUCKETS,
+                                         registry=self.registry)
+        self.request_db_time = Histogram('moviedb_http_request_db_seconds',
+                                         'Tempo gasto no banco por requisição',
+                                         ['endpoint'],
+                                         registry=self.registry)
+        self.queries = Counter('moviedb_db_queries',
+                               'Consultas SQL executadas',
+                               registry=self.registry)
+        self.query_time = Counter('moviedb_db_query_seconds',
+                                  'Tempo total das consultas SQL',
+                                  registry=self.registry)
+        self.template_duration = Histogram('moviedb_template_render_seconds',
+                                           'Tempo de renderização dos templates',
+                                           ['template'],
+                                           registry=self.registry)
+        self.email_duration = Histogram('moviedb_email_send_seconds',
+                                        'Tempo de envio dos lotes de e-mail',
+                                        ['transport'],
+                                        registry=self.registry)
+        self.emails = Counter('moviedb_emails',
+                              'E-mails enviados, por resultado',
+                              ['transport', 'result'],
+                              registry=self.registry)
+        self.rate_limited = Counter('moviedb_rate_limited_requests',
+                                    'Requisições recusadas pelo limitador de taxa',
+                                    ['endpoint', 'scope'],
+                                    registry=self.registry)
+
+    def init_app(self, app: Flask, db: Any = None) -> None:
+        """
+        Registra os hooks de requisição, de template e do SQLAlchemy, e a rota
+        das métricas.
+
+        Args:
+            app: A aplicação Flask.
+            db: A extensão Flask-SQLAlchemy cujos engines serão monitorados.
+        """
+        self.enabled = bool(app.config.get('METRICS_ENABLED', True))
+        self.server_timing = bool(app.config.get('SERVER_TIMING_ENABLED', True))
+        app.extensions['metrics'] = self
+        if not (self.enabled or self.server_timing):
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render_template, app)
+        template_rendered.connect(self._template_rendered, app)
+        if self.enabled:
+            app.add_url_rule(app.config.get('METRICS_ENDPOINT', '/metrics'),
+                             'metrics', self.export)
+
+        if db is not None:
+            with app.app_context():
+                for engine in db.engines.values():
+                    query_timing.observar(engine, self._observe_query)
+
+    def export(self) -> Response:
+        """
+        Gera as métricas no formato texto do Prometheus, agregando os valores de
+        todos os processos quando `PROMETHEUS_MULTIPROC_DIR` estiver definido.
+        """
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self.registry
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+    def observe_email(self, transport: str, duracao: float, enviados: int, falhas: int) -> None:
+        """
+        Registra o envio de um lote de e-mails.
+
+        Args:
+            transport: O nome do transporte usado.
+            duracao: O tempo de envio do lote, em segundos.
+            enviados: Quantidade de mensagens aceitas.
+            falhas: Quantidade de mensagens recusadas.
+        """
+        if not self.enabled:
+            return
+        self.email_duration.labels(transport).observe(duracao)
+        if enviados:
+            self.emails.labels(transport, 'enviado').inc(enviados)
+        if falhas:
+            self.emails.labels(transport, 'falhou').inc(falhas)
+
+    def observe_rate_limited(self, endpoint: str, escopo: str) -> None:
+        """
+        Registra uma requisição recusada pelo limitador de taxa.
+
+        Args:
+            endpoint: O endpoint da requisição.
+            escopo: O balde que estava vazio ('ip', 'email' ou 'total').
+        """
+        if self.enabled:
+            self.rate_limited.labels(endpoint, escopo).inc()
+
+    def _before_request(self) -> None:
+        g.request_timings = {'inicio': perf_counter(), 'db': 0.0, 'consultas': 0, 'template': 0.0}
+
+    def _after_request(self, response: Response) -> Response:
+        tempos = request_timings()
+        if tempos is None:
+            return response
+        total = perf_counter() - tempos['inicio']
+        if self.enabled:
+            endpoint = request.endpoint or 'desconhecido'
+            self.request_duration.labels(endpoint, request.method,
+                                         str(response.status_code)).observe(total)
+            self.request_queries.labels(endpoint).observe(tempos['consultas'])
+            self.request_db_time.labels(endpoint).observe(tempos['db'])
+        if self.server_timing:
+            # respostas em streaming ainda não terminaram: os tempos são parciais
+            aplicacao = max(total - tempos['db'] - tempos['template'], 0.0)
+            response.headers.add('Server-Timing', ', '.join([
+                f'db;dur={tempos["db"] * 1e3:.1f};desc="{tempos["consultas"]} consultas"',
+                f'tpl;dur={tempos["template"] * 1e3:.1f}',
+                f'app;dur={aplicacao * 1e3:.1f}',
+                f'total;dur={total * 1e3:.1f}',
+            ]))
+        return response
+
+    def _before_render_template(self, app, template, context, **extra) -> None:
+        if has_request_context():
+            g.setdefault('template_starts', []).append(perf_counter())
+
+    def _template_rendered(self, app, template, context, **extra) -> None:
+        if not has_request_context() or not g.get('template_starts'):
+            return
+        duracao = perf_counter() - g.template_starts.pop()
+        if self.enabled:
+            self.template_duration.labels(template.name or 'desconhecido').observe(duracao)
+        tempos = request_timings()
+        # templates renderizados dentro de outro já estão contidos no tempo dele
+        if tempos is not None and not g.template_starts:
+            tempos['template'] += duracao
+
+    def _observe_query(self, conn, statement, parameters, executemany, duracao: float) -> None:
+        if self.enabled:
+            self.queries.inc()
+            self.query_time.inc(duracao)
+        tempos = request_timings()
+        if tempos is not None:
+            tempos['db'] += duracao
+            tempos['consultas'] += 1
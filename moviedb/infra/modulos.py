@@ -1,9 +1,35 @@
 from flask_bootstrap import Bootstrap5
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
+from moviedb.infra.assets import StaticAssets
+from moviedb.infra.compression import Compression
+from moviedb.infra.database import RoutingSession
+from moviedb.infra.email_queue import EmailQueue
+from moviedb.infra.metrics import Metrics
+from moviedb.infra.page_cache import PageCache
+from moviedb.infra.password_hashing import PasswordHasher
+from moviedb.infra.posters import PosterStore
+from moviedb.infra.rate_limit import RateLimiter
+from moviedb.infra.row_counts import RowCountCache
+from moviedb.infra.slow_queries import SlowQueryLog
+from moviedb.infra.startup import LazyMigrate
+from moviedb.infra.tokens import TokenService
+from moviedb.infra.user_cache import UserLoaderCache
+
 bootstrap = Bootstrap5()
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = LazyMigrate()
 login_manager = LoginManager()
+user_cache = UserLoaderCache()
+email_queue = EmailQueue()
+password_hasher = PasswordHasher()
+token_service = TokenService()
+row_counts = RowCountCache()
+metrics = Metrics()
+slow_queries = SlowQueryLog()
+page_cache = PageCache()
+static_assets = StaticAssets()
+compression = Compression()
+rate_limiter = RateLimiter()
+poster_store = PosterStore()
@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Callable, Dict, Optional
+
+from flask import Flask, Response, current_app, g, make_response, request, session
+from flask_login import current_user
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """
+    Uma resposta renderizada armazenada pelo `PageCache`.
+    """
+    body: bytes
+    content_type: str
+    etag: str
+    expires: float
+
+
+class PageCache:
+    """
+    Cache em memória das páginas renderizadas para usuários anônimos, com ETag
+    forte e suporte a requisições condicionais (`304 Not Modified`).
+
+    Só são armazenadas as respostas 200 de requisições GET/HEAD feitas por
+    usuários não autenticados, sem mensagens flash pendentes, e que não alteram
+    a sessão nem definem cookies. Por isso as páginas com formulários protegidos
+    por CSRF (cujo token é gerado por sessão) não são armazenadas enquanto a
+    proteção estiver ativa. As entradas são indexadas pelo endpoint, pelos
+    argumentos da rota e da query string e pelo host.
+
+    As chaves de configuração usadas são:
+
+    - PAGE_CACHE_ENABLED: true
+    - PAGE_CACHE_TTL: 60 (segundos)
+    - PAGE_CACHE_MAX_ENTRIES: 256
+    - PAGE_CACHE_MAX_BYTES: 8388608
+    """
+
+    def __init__(self, ttl: float = 60, max_entries: int = 256, max_bytes: int = 8 * 1024 * 1024):
+        self.enabled = True
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, CachedPage] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Configura o cache a partir do dicionário de configuração da aplicação.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        self.enabled = bool(app.config.get('PAGE_CACHE_ENABLED', True))
+        self.ttl = float(app.config.get('PAGE_CACHE_TTL', self.ttl))
+        self.max_entries = int(app.config.get('PAGE_CACHE_MAX_ENTRIES', self.max_entries))
+        self.max_bytes = int(app.config.get('PAGE_CACHE_MAX_BYTES', self.max_bytes))
+        app.extensions['page_cache'] = self
+
+    def cached(self, view: Callable) -> Callable:
+        """
+        Decorador de views que serve a página do cache quando possível. As
+        requisições que não são GET/HEAD passam direto para a view.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self._cacheable_request():
+                return view(*args, **kwargs)
+
+            chave = self._key()
+            pagina = self.get(chave)
+            if pagina is not None:
+                return self._response(pagina, 'HIT')
+
+            response = make_response(view(*args, **kwargs))
+            if not self._cacheable_response(response):
+                return response
+            corpo = response.get_data()
+            pagina = CachedPage(body=corpo,
+                                content_type=response.content_type,
+                                etag=hashlib.sha256(corpo).hexdigest(),
+                                expires=monotonic() + self.ttl)
+            self.put(chave, pagina)
+            return self._response(pagina, 'MISS')
+
+        return wrapper
+
+    def get(self, chave: tuple) -> Optional[CachedPage]:
+        with self._lock:
+            pagina = self._entries.get(chave)
+            if pagina is None or pagina.expires < monotonic():
+                if pagina is not None:
+                    self._remove(chave)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(chave)
+            self.hits += 1
+            return pagina
+
+    def put(self, chave: tuple, pagina: CachedPage) -> None:
+        if len(pagina.body) > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._entries:
+                self._remove(chave)
+            self._entries[chave] = pagina
+            self._bytes += len(pagina.body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, endpoint: str) -> None:
+        """
+        Remove todas as páginas de um endpoint.
+
+        Args:
+            endpoint: O nome do endpoint, por exemplo 'root.index'.
+        """
+        with self._lock:
+            for chave in [chave for chave in self._entries if chave[0] == endpoint]:
+                self._remove(chave)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'size': len(self._entries),
+                    'bytes': self._bytes,
+                    'hit_ratio': (self.hits / total) if total else 0.0}
+
+    def _remove(self, chave: tuple) -> None:
+        pagina = self._entries.pop(chave)
+        self._bytes -= len(pagina.body)
+
+    def _cacheable_request(self) -> bool:
+        return (self.enabled and
+                request.method in ('GET', 'HEAD') and
+                '_flashes' not in session and
+                not current_user.is_authenticated)
+
+    @staticmethod
+    def _key() -> tuple:
+        return (request.endpoint,
+                request.host,
+                tuple(sorted((request.view_args or {}).items())),
+                tuple(sorted(request.args.items(multi=True))))
+
+    @staticmethod
+    def _cacheable_response(response: Response) -> bool:
+        csrf_field = current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token')
+        return (response.status_code == 200 and
+                not response.is_streamed and
+                'Set-Cookie' not in response.headers and
+                not session.modified and
+                g.get(csrf_field) is None)
+
+    @staticmethod
+    def _response(pagina: CachedPage, situacao: str) -> Response:
+        response = Response(pagina.body, content_type=pagina.content_type)
+        response.set_etag(pagina.etag)
+        # o navegador pode guardar a página, mas deve revalidá-la a cada uso
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Cookie')
+        response.headers['X-Cache'] = situacao
+        return response.make_conditional(request)
@@ -0,0 +1,192 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+from flask import Flask
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Levantada quando a fila do serviço de hashing está cheia e nenhuma vaga foi
+    liberada dentro do tempo limite configurado.
+    """
+
+
+class PasswordHasher:
+    """
+    Serviço de hashing de senhas executado em um pool de processos.
+
+    Os algoritmos de hashing de senha são propositalmente caros em CPU; rodá-los
+    em outro processo evita que uma rajada de logins monopolize o GIL do worker.
+    A thread da requisição apenas espera pelo resultado. A quantidade de
+    operações em andamento é limitada: quando a fila está cheia por mais de
+    PASSWORD_HASH_QUEUE_TIMEOUT segundos, `PasswordHashingBusy` é levantada e a
+    aplicação responde com 503. Os processos do pool são criados com
+    "forkserver" (ou "spawn"), então scripts que criam a aplicação precisam
+    proteger o ponto de entrada com `if __name__ == '__main__':`.
+
+    As chaves de configuração usadas são:
+
+    - PASSWORD_HASH_METHOD: "scrypt" (qualquer método aceito por
+      `werkzeug.security.generate_password_hash`, como "pbkdf2:sha256:600000")
+    - PASSWORD_HASH_WORKERS: 2 (0 calcula os hashes na própria thread)
+    - PASSWORD_HASH_QUEUE_SIZE: 32
+    - PASSWORD_HASH_QUEUE_TIMEOUT: 5 (segundos)
+    """
+
+    def __init__(self):
+        self.method = 'scrypt'
+        self.workers = 2
+        self.queue_size = 32
+        self.queue_timeout = 5.0
+        self.hashes = 0
+        self.hash_time = 0.0
+        self.hash_time_max = 0.0
+        self.rejected = 0
+        self.rehashed = 0
+        self._in_flight = 0
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+        self._pool_pid: Optional[int] = None
+        self._method_prefix: Optional[str] = None
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Configura o serviço a partir do dicionário de configuração da aplicação e
+        registra o tratamento de `PasswordHashingBusy`.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = int(app.config.get('PASSWORD_HASH_WORKERS', self.workers))
+        self.queue_size = int(app.config.get('PASSWORD_HASH_QUEUE_SIZE', self.queue_size))
+        self.queue_timeout = float(app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', self.queue_timeout))
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._method_prefix = None
+        app.extensions['password_hasher'] = self
+
+        @app.errorhandler(PasswordHashingBusy)
+        def hashing_busy(e):
+            app.logger.warning("Fila de hashing de senhas cheia, requisição rejeitada")
+            return "Serviço sobrecarregado, tente novamente em instantes", 503, {'Retry-After': '5'}
+
+    def hash(self, password: str) -> str:
+        """
+        Gera o hash de uma senha com o método configurado.
+
+        Args:
+            password: A senha em texto puro.
+
+        Returns:
+            O hash no formato do werkzeug ("método$sal$hash").
+
+        Raises:
+            PasswordHashingBusy: Se a fila estiver cheia.
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """
+        Verifica se a senha corresponde ao hash armazenado.
+
+        Raises:
+            PasswordHashingBusy: Se a fila estiver cheia.
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def verify_and_update(self, password_hash: str, password: str) -> tuple[bool, Optional[str]]:
+        """
+        Verifica a senha e, se ela estiver correta mas o hash usar parâmetros
+        antigos, gera um novo hash com os parâmetros atuais.
+
+        Args:
+            password_hash: O hash armazenado.
+            password: A senha em texto puro.
+
+        Returns:
+            Uma tupla (senha correta, novo hash ou None se não houver atualização).
+        """
+        if not self.verify(password_hash, password):
+            return False, None
+        if not self.needs_rehash(password_hash):
+            return True, None
+        novo_hash = self.hash(password)
+        with self._lock:
+            self.rehashed += 1
+        return True, novo_hash
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        Indica se um hash foi gerado com parâmetros diferentes dos configurados.
+
+        Args:
+            password_hash: O hash armazenado.
+
+        Returns:
+            True se o hash deve ser recalculado com o método atual.
+        """
+        if self._method_prefix is None:
+            # o werkzeug expande "scrypt" para "scrypt:32768:8:1", por exemplo
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna as métricas do serviço, para dimensionar a quantidade de workers.
+
+        Returns:
+            Dicionário com 'queue_depth', 'hashes', 'rejected', 'rehashed',
+            'avg_latency' e 'max_latency' (em segundos).
+        """
+        with self._lock:
+            return {'queue_depth': self._in_flight,
+                    'queue_size': self.queue_size,
+                    'workers': self.workers,
+                    'hashes': self.hashes,
+                    'rejected': self.rejected,
+                    'rehashed': self.rehashed,
+                    'avg_latency': (self.hash_time / self.hashes) if self.hashes else 0.0,
+                    'max_latency': self.hash_time_max}
+
+    def _executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        # um pool criado antes de um fork não pode ser usado pelo processo filho
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    metodos = multiprocessing.get_all_start_methods()
+                    contexto = multiprocessing.get_context(
+                        'forkserver' if 'forkserver' in metodos else 'spawn')
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=contexto)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashingBusy()
+        with self._lock:
+            self._in_flight += 1
+        inicio = perf_counter()
+        try:
+            executor = self._executor()
+            if executor is None:
+                return func(*args)
+            return executor.submit(func, *args).result()
+        finally:
+            duracao = perf_counter() - inicio
+            with self._lock:
+                self._in_flight -= 1
+                self.hashes += 1
+                self.hash_time += duracao
+                self.hash_time_max = max(self.hash_time_max, duracao)
+            self._slots.release()
@@ -0,0 +1,382 @@
+"""
+Armazenamento dos pôsteres dos filmes e geração das miniaturas.
+
+Os arquivos originais são guardados em um repositório endereçado pelo conteúdo
+(o nome é o SHA-256 dos bytes), dentro da pasta `instance/`; o campo
+`Filme.poster_principal` guarda esse hash. Para cada pôster são geradas
+miniaturas WebP e JPEG nas larguras configuradas, em um pool de processos
+(decodificar e redimensionar imagens é caro em CPU). Uma miniatura ausente
+(por exemplo, depois de uma largura ser acrescentada à configuração) é gerada
+na primeira vez em que é pedida.
+
+Como o endereço de cada miniatura muda quando o conteúdo muda, elas são
+servidas com `Cache-Control: immutable` e validade de um ano. Com
+`USE_X_SENDFILE` ativo, `send_file` delega a transferência ao servidor web
+(cabeçalho `X-Sendfile`).
+
+Layout do repositório:
+
+    <POSTER_STORAGE_DIR>/originais/ab/abcdef...
+    <POSTER_STORAGE_DIR>/miniaturas/ab/abcdef.../320.webp
+"""
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup
+
+EXTENSOES = {'webp': 'webp', 'jpeg': 'jpg'}
+FORMATOS = {extensao: formato for formato, extensao in EXTENSOES.items()}
+_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class PosterInvalido(ValueError):
+    """
+    Levantada quando o arquivo ingerido não é uma imagem que o Pillow consiga ler.
+    """
+
+
+def _gravar(destino: str, dados: bytes) -> None:
+    # grava em um temporário e renomeia: leitores nunca veem um arquivo parcial
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), prefix='.tmp-')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(dados)
+        os.replace(temporario, destino)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def gerar_miniaturas(origem: str, pedidos: List[Tuple[int, str, str]], qualidade: int) -> List[str]:
+    """
+    Gera as miniaturas de uma imagem. Executada nos processos do pool.
+
+    As larguras são processadas da maior para a menor, cada uma reduzida a
+    partir da anterior. Imagens menores que a largura pedida não são ampliadas.
+
+    Args:
+        origem: O caminho do arquivo original.
+        pedidos: Tuplas (largura, formato, caminho de destino), com formato
+            'webp' ou 'jpeg'.
+        qualidade: A qualidade de compressão (1 a 100).
+
+    Returns:
+        Os caminhos gerados.
+    """
+    import io
+
+    from PIL import Image, ImageOps
+
+    with Image.open(origem) as original:
+        maior = max(largura for largura, _, _ in pedidos)
+        # na decodificação JPEG, reduz a imagem já no decodificador
+        # (a menor dimensão é mantida acima da largura, pois a rotação EXIF pode trocá-las)
+        original.draft('RGB', (maior, maior))
+        imagem = ImageOps.exif_transpose(original)
+        if imagem.mode not in ('RGB', 'RGBA'):
+            imagem = imagem.convert('RGBA' if imagem.has_transparency_data else 'RGB')
+
+        gerados = []
+        for largura, formato, destino in sorted(pedidos, key=lambda pedido: -pedido[0]):
+            if imagem.width > largura:
+                altura = max(1, round(imagem.height * largura / imagem.width))
+                imagem = imagem.resize((largura, altura), Image.Resampling.LANCZOS)
+            saida = imagem
+            if formato == 'jpeg' and imagem.mode == 'RGBA':
+                saida = Image.new('RGB', imagem.size, (255, 255, 255))
+                saida.paste(imagem, mask=imagem.getchannel('A'))
+            buffer = io.BytesIO()
+            opcoes = {'quality': qualidade, 'optimize': True, 'progressive': True} \
+                if formato == 'jpeg' else {'quality': qualidade, 'method': 4}
+            saida.save(buffer, format=formato.upper(), **opcoes)
+            _gravar(destino, buffer.getvalue())
+            gerados.append(destino)
+    return gerados
+
+
+def _verificar_imagem(dados: bytes) -> None:
+    import io
+
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(dados)) as imagem:
+            imagem.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise PosterInvalido(f"arquivo de imagem inválido: {e}") from e
+
+
+class PosterStore:
+    """
+    Repositório de pôsteres endereçado pelo conteúdo, com miniaturas geradas
+    em um pool de processos.
+
+    As chaves de configuração usadas são:
+
+    - POSTER_STORAGE_DIR: "<instance>/posters"
+    - POSTER_WIDTHS: [160, 320, 640]
+    - POSTER_FORMATS: ["webp", "jpeg"]
+    - POSTER_QUALITY: 80
+    - POSTER_WORKERS: 2 (0 gera as miniaturas na própria thread)
+    """
+
+    def __init__(self):
+        self.diretorio: Optional[str] = None
+        self.larguras: Tuple[int, ...] = (160, 320, 640)
+        self.formatos: Tuple[str, ...] = ('webp', 'jpeg')
+        self.qualidade = 80
+        self.workers = 2
+        self.geradas = 0
+        self._lock = threading.Lock()
+        self._pool: Optional[Executor] = None
+        self._pool_pid: Optional[int] = None
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Configura o repositório e registra o grupo de comandos `flask posters`.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        self.diretorio = app.config.get('POSTER_STORAGE_DIR') or os.path.join(app.instance_path, 'posters')
+        self.larguras = tuple(sorted(int(largura) for largura in
+                                     app.config.get('POSTER_WIDTHS', self.larguras)))
+        self.formatos = tuple(formato for formato in app.config.get('POSTER_FORMATS', self.formatos)
+                              if formato in EXTENSOES)
+        self.qualidade = int(app.config.get('POSTER_QUALITY', self.qualidade))
+        self.workers = int(app.config.get('POSTER_WORKERS', self.workers))
+        app.extensions['poster_store'] = self
+        app.cli.add_command(posters_cli)
+
+        app.add_template_global(self.srcset, 'poster_srcset')
+        app.add_template_global(self.url, 'poster_url')
+
+    def caminho_original(self, digest: str) -> str:
+        return os.path.join(self.diretorio, 'originais', digest[:2], digest)
+
+    def caminho_miniatura(self, digest: str, largura: int, formato: str) -> str:
+        return os.path.join(self.diretorio, 'miniaturas', digest[:2], digest,
+                            f"{largura}.{EXTENSOES[formato]}")
+
+    def existe(self, digest: str) -> bool:
+        return bool(_DIGEST.match(digest)) and os.path.exists(self.caminho_original(digest))
+
+    def ingerir(self, dados: bytes) -> str:
+        """
+        Armazena um pôster e gera todas as suas miniaturas. Um arquivo já
+        armazenado não é gravado nem processado novamente.
+
+        Args:
+            dados: O conteúdo do arquivo de imagem.
+
+        Returns:
+            O SHA-256 do conteúdo, que identifica o pôster.
+
+        Raises:
+            PosterInvalido: Se o conteúdo não for uma imagem válida.
+        """
+        digest = hashlib.sha256(dados).hexdigest()
+        if not self.existe(digest):
+            _verificar_imagem(dados)
+            _gravar(self.caminho_original(digest), dados)
+        self.gerar([digest])
+        return digest
+
+    def gerar(self, digests: Iterable[str]) -> int:
+        """
+        Gera, no pool de processos, as miniaturas que ainda não existem.
+
+        Args:
+            digests: Os pôsteres a processar.
+
+        Returns:
+            A quantidade de miniaturas geradas.
+        """
+        tarefas = []
+        for digest in digests:
+            pedidos = [(largura, formato, self.caminho_miniatura(digest, largura, formato))
+                       for largura in self.larguras for formato in self.formatos]
+            pedidos = [pedido for pedido in pedidos if not os.path.exists(pedido[2])]
+            if pedidos:
+                tarefas.append((self.caminho_original(digest), pedidos))
+        geradas = sum(len(resultado) for resultado in self._executar(tarefas))
+        with self._lock:
+            self.geradas += geradas
+        return geradas
+
+    def miniatura(self, digest: str, largura: int, formato: str) -> Optional[str]:
+        """
+        Obtém o caminho de uma miniatura, gerando-a se ainda não existir.
+
+        Args:
+            digest: O pôster.
+            largura: Uma das larguras configuradas.
+            formato: Um dos formatos configurados ('webp' ou 'jpeg').
+
+        Returns:
+            O caminho do arquivo, ou None se o pôster não existir ou a largura
+            ou o formato não estiverem configurados.
+        """
+        if largura not in self.larguras or formato not in self.formatos or not self.existe(digest):
+            return None
+        caminho = self.caminho_miniatura(digest, largura, formato)
+        if not os.path.exists(caminho):
+            self._executar([(self.caminho_original(digest), [(largura, formato, caminho)])])
+            with self._lock:
+                self.geradas += 1
+        return caminho
+
+    def digests(self) -> List[str]:
+        """
+        Lista os pôsteres armazenados.
+        """
+        raiz = os.path.join(self.diretorio, 'originais')
+        if not os.path.isdir(raiz):
+            return []
+        return sorted(nome for prefixo in os.listdir(raiz)
+                      for nome in os.listdir(os.path.join(raiz, prefixo)) if _DIGEST.match(nome))
+
+    def url(self, digest: str, largura: int = 320, formato: str = 'jpeg') -> str:
+        """
+        Monta o endereço da miniatura na largura configurada mais próxima de `largura`.
+        """
+        from flask import url_for
+
+        largura = min(self.larguras, key=lambda configurada: abs(configurada - largura))
+        return url_for('posters.miniatura', digest=digest, largura=largura, extensao=EXTENSOES[formato])
+
+    def srcset(self, digest: str, formato: str = 'webp') -> str:
+        """
+        Monta o atributo `srcset` com as miniaturas de todas as larguras.
+        """
+        return ', '.join(f"{self.url(digest, largura, formato)} {largura}w" for largura in self.larguras)
+
+    def _executar(self, tarefas: List[Tuple[str, List[Tuple[int, str, str]]]]) -> List[List[str]]:
+        """
+        Executa `gerar_miniaturas` para cada tarefa (origem, pedidos) no pool de
+        processos. Se o pool quebrar (um processo do pool terminou de forma
+        anormal), ele é descartado, para ser recriado na próxima chamada, e as
+        tarefas pendentes são executadas nesta thread.
+        """
+        executor = self._executor()
+        if executor is None:
+            return [gerar_miniaturas(origem, pedidos, self.qualidade) for origem, pedidos in tarefas]
+        try:
+            futuros = [executor.submit(gerar_miniaturas, origem, pedidos, self.qualidade)
+                       for origem, pedidos in tarefas]
+            return [futuro.result() for futuro in futuros]
+        except BrokenProcessPool:
+            current_app.logger.warning("pool de miniaturas quebrado; gerando nesta thread")
+            with self._lock:
+                if self._pool is executor:
+                    self._pool = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            resultados = []
+            for origem, pedidos in tarefas:
+                # as miniaturas já gravadas não são geradas de novo
+                pendentes = [pedido for pedido in pedidos if not os.path.exists(pedido[2])]
+                resultados.append(gerar_miniaturas(origem, pendentes, self.qualidade) if pendentes
+                                  else [pedido[2] for pedido in pedidos])
+            return resultados
+
+    def _executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        # um pool criado antes de um fork não pode ser usado pelo processo filho
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    metodos = multiprocessing.get_all_start_methods()
+                    contexto = multiprocessing.get_context(
+                        'forkserver' if 'forkserver' in metodos else 'spawn')
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=contexto)
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+
+posters_cli = AppGroup('posters', help="Pôsteres dos filmes e suas miniaturas.")
+
+
+@posters_cli.command('ingest')
+@click.argument('filme_id')
+@click.argument('arquivo', type=click.File('rb'))
+def ingest_command(filme_id, arquivo):
+    """Armazena o pôster de um filme e gera as miniaturas."""
+    from moviedb import db
+    from moviedb.models.filmes import Filme
+
+    filme = Filme.get_by_id(filme_id)
+    if filme is None:
+        raise click.ClickException(f"Filme inexistente: {filme_id}")
+    try:
+        digest = current_app.extensions['poster_store'].ingerir(arquivo.read())
+    except PosterInvalido as e:
+        raise click.ClickException(str(e))
+    filme.poster_principal = digest
+    db.session.commit()
+    click.echo(digest)
+
+
+@posters_cli.command('ingest-dir')
+@click.argument('diretorio', type=click.Path(exists=True, file_okay=False))
+def ingest_dir_command(diretorio):
+    """
+    Armazena os pôsteres cujos nomes de arquivo estão em `poster_principal`,
+    procurando-os em DIRETORIO, e substitui o nome pelo hash.
+    """
+    import sqlalchemy as sa
+
+    from moviedb import db
+    from moviedb.models.filmes import Filme
+
+    store: PosterStore = current_app.extensions['poster_store']
+    filmes = db.session.execute(sa.select(Filme).where(Filme.poster_principal.is_not(None))).scalars()
+    arquivos: Dict[str, List[Filme]] = {}
+    for filme in filmes:
+        if not _DIGEST.match(filme.poster_principal):
+            arquivos.setdefault(filme.poster_principal, []).append(filme)
+
+    ingeridos = ausentes = invalidos = 0
+    for nome, filmes_do_arquivo in arquivos.items():
+        caminho = os.path.join(diretorio, nome)
+        if not os.path.isfile(caminho):
+            ausentes += 1
+            continue
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+        digest = hashlib.sha256(dados).hexdigest()
+        if not store.existe(digest):
+            try:
+                _verificar_imagem(dados)
+            except PosterInvalido as e:
+                click.echo(f"{nome}: {e}", err=True)
+                invalidos += 1
+                continue
+            _gravar(store.caminho_original(digest), dados)
+        for filme in filmes_do_arquivo:
+            filme.poster_principal = digest
+        ingeridos += 1
+    db.session.commit()
+
+    # as miniaturas de todos os arquivos são geradas em paralelo no pool
+    geradas = store.gerar(store.digests())
+    click.echo(f"{ingeridos} pôsteres armazenados, {ausentes} não encontrados, "
+               f"{invalidos} inválidos; {geradas} miniaturas geradas")
+
+
+@posters_cli.command('generate')
+def generate_command():
+    """Gera as miniaturas que ainda não existem (por exemplo, de uma nova largura)."""
+    store: PosterStore = current_app.extensions['poster_store']
+    digests = store.digests()
+    click.echo(f"{store.gerar(digests)} miniaturas geradas para {len(digests)} pôsteres")
@@ -0,0 +1,189 @@
+"""
+Verificação dos planos de execução das consultas mais frequentes.
+
+Cada consulta registrada em `consultas_quentes()` é uma chamada ao método do
+repositório que a executa; os comandos que ele envia ao banco são capturados com
+um evento `before_cursor_execute` e analisados com `EXPLAIN QUERY PLAN` (SQLite)
+ou `EXPLAIN` (PostgreSQL). A verificação falha se algum deles fizer uma
+varredura completa de uma tabela. O teste `tests/test_query_plans.py` roda a
+verificação em um banco populado.
+"""
+import re
+import uuid
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+import sqlalchemy as sa
+
+# "SCAN filmes" é uma varredura completa; "SCAN filmes USING INDEX ..." percorre
+# um índice (ordenação com LIMIT) e "SCAN ... VIRTUAL TABLE" é o FTS5
+_SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)($| (?!USING|VIRTUAL))')
+_POSTGRESQL_FULL_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+# comandos cujo plano interessa; os demais (INSERT, PRAGMA, SET...) são ignorados
+_CONSULTAS = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+def consultas_quentes() -> Dict[str, Callable[[], Any]]:
+    """
+    Retorna as consultas mais frequentes da aplicação, como chamadas aos métodos
+    que as executam. Deve ser chamada dentro do contexto da aplicação.
+
+    As chamadas são feitas de verdade: a da fila de e-mails reserva as mensagens
+    prontas para envio, então a verificação deve rodar em um banco de testes.
+
+    Returns:
+        Dicionário nome -> função sem argumentos que executa a consulta.
+    """
+    from moviedb.blueprints.api import ORDENACOES
+    from moviedb.infra.catalogo import exportar_filmes
+    from moviedb.infra.modulos import email_queue
+    from moviedb.models import Filme, User
+
+    consultas: Dict[str, Callable[[], Any]] = {
+        'User.get_by_id': partial(User.get_by_id, uuid.uuid4()),
+        'User.get_by_email': partial(User.get_by_email, 'fulano@example.com'),
+        'Filme.get_by_id': partial(Filme.get_by_id, uuid.uuid4()),
+        'Filme.get_by_titulo': partial(Filme.get_by_titulo, 'Cidade de Deus'),
+        'Filme.listar_por_ano': partial(Filme.listar_por_ano, 2002),
+        'Filme.listar_por_ano(lancado)': partial(Filme.listar_por_ano, 2002, lancado=True),
+        'Filme.buscar': partial(Filme.buscar, 'cidade de deus'),
+        'exportação (ano)': lambda: list(exportar_filmes('csv', ano_de=2000, ano_ate=2002)),
+        'fila de e-mails': email_queue._claim_batch,
+    }
+
+    # as páginas seguintes partem de um cursor posicionado no meio da ordenação
+    meio = Filme(id=uuid.uuid4(), titulo_nacional='M', titulo_original='M', ano_lancamento=2000)
+    for ordem in ORDENACOES:
+        for descendente in (False, True):
+            nome = f"Filme.paginate({ordem}{', desc' if descendente else ''})"
+            cursor = Filme._encode_cursor(meio, ordem, descendente, False)
+            consultas[nome] = partial(Filme.paginate, order_by=ordem, descending=descendente)
+            consultas[f"{nome} com cursor"] = partial(Filme.paginate, order_by=ordem,
+                                                      descending=descendente, cursor=cursor)
+    return consultas
+
+
+def capturar(funcao: Callable[[], Any]) -> List[Tuple[sa.Engine, str, Any]]:
+    """
+    Executa `funcao` e captura as consultas que ela envia a qualquer um dos
+    engines da aplicação (inclusive as réplicas de leitura).
+
+    Args:
+        funcao: Função sem argumentos.
+
+    Returns:
+        Lista de (engine, comando SQL, parâmetros), com o comando e os
+        parâmetros na forma em que foram passados ao driver.
+    """
+    from moviedb import db
+
+    comandos: List[Tuple[sa.Engine, str, Any]] = []
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(_CONSULTAS):
+            comandos.append((conn.engine, statement, parameters))
+
+    engines = set(db.engines.values())
+    for engine in engines:
+        sa.event.listen(engine, 'before_cursor_execute', antes)
+    try:
+        funcao()
+    finally:
+        for engine in engines:
+            sa.event.remove(engine, 'before_cursor_execute', antes)
+    return comandos
+
+
+def explicar_sql(dbapi_connection: Any, dialeto: str, statement: str, parameters: Any) -> List[str]:
+    """
+    Obtém o plano de execução de um comando SQL já compilado, usando diretamente
+    a conexão DBAPI (por exemplo, dentro de um evento `after_cursor_execute`).
+
+    No PostgreSQL, um erro no EXPLAIN abortaria a transação em andamento na
+    conexão; por isso ele é executado dentro de um SAVEPOINT, desfeito em caso
+    de erro.
+
+    Args:
+        dbapi_connection: A conexão DBAPI.
+        dialeto: O nome do dialeto ('sqlite', 'postgresql', ...).
+        statement: O comando SQL, com os marcadores de parâmetro do driver.
+        parameters: Os parâmetros do comando.
+
+    Returns:
+        As linhas do plano em texto, ou uma lista vazia se o dialeto não for
+        suportado.
+    """
+    prefixo = {'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN '}.get(dialeto)
+    if prefixo is None:
+        return []
+    # em autocommit não há transação a proteger (nem SAVEPOINT possível)
+    protegido = dialeto == 'postgresql' and not getattr(dbapi_connection, 'autocommit', False)
+    cursor = dbapi_connection.cursor()
+    try:
+        if protegido:
+            cursor.execute('SAVEPOINT explicar_sql')
+        try:
+            cursor.execute(prefixo + statement, parameters)
+            plano = [str(linha[-1]) for linha in cursor.fetchall()]
+        except Exception:
+            if protegido:
+                cursor.execute('ROLLBACK TO SAVEPOINT explicar_sql')
+                cursor.execute('RELEASE SAVEPOINT explicar_sql')
+            raise
+        if protegido:
+            cursor.execute('RELEASE SAVEPOINT explicar_sql')
+        return plano
+    finally:
+        cursor.close()
+
+
+def varreduras_completas(dialeto: str, plano: List[str]) -> List[str]:
+    """
+    Lista as varreduras completas de tabela em um plano obtido com `explicar_sql`.
+
+    Returns:
+        As descrições dos passos do plano que percorrem uma tabela inteira.
+    """
+    if dialeto == 'postgresql':
+        return [f"Seq Scan on {encontrado.group(1)}" for passo in plano
+                for encontrado in [_POSTGRESQL_FULL_SCAN.search(passo)] if encontrado]
+    return [passo for passo in plano if _SQLITE_FULL_SCAN.match(passo)]
+
+
+def verificar_planos(consultas: Dict[str, Callable[[], Any]] = None,
+                     relatar: Callable[[str, List[str], List[str]], None] = None) -> Dict[str, List[str]]:
+    """
+    Verifica se alguma consulta quente faz varredura completa de tabela. Deve
+    ser chamada dentro do contexto da aplicação.
+
+    No PostgreSQL as varreduras sequenciais são desencorajadas durante a
+    verificação (`enable_seqscan = off`), de forma que um Seq Scan no plano
+    indica a falta de um índice utilizável, e não apenas uma tabela pequena.
+
+    Args:
+        consultas: As consultas a verificar (padrão: `consultas_quentes()`).
+        relatar: Função chamada com (nome, plano, varreduras) para cada consulta;
+            o plano reúne os passos de todos os comandos que ela enviou.
+
+    Returns:
+        Dicionário nome -> varreduras completas, apenas para as consultas que falharam.
+    """
+    falhas: Dict[str, List[str]] = {}
+    for nome, funcao in (consultas or consultas_quentes()).items():
+        plano: List[str] = []
+        varreduras: List[str] = []
+        for engine, statement, parameters in capturar(funcao):
+            dialeto = engine.dialect.name
+            with engine.connect() as connection:
+                if dialeto == 'postgresql':
+                    connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+                passos = explicar_sql(connection.connection.dbapi_connection, dialeto,
+                                      statement, parameters)
+            plano.extend(passos)
+            varreduras.extend(varreduras_completas(dialeto, passos))
+        if relatar is not None:
+            relatar(nome, plano, varreduras)
+        if varreduras:
+            falhas[nome] = varreduras
+    return falhas
@@ -0,0 +1,60 @@
+"""
+Cronometragem dos comandos SQL, compartilhada pelas métricas
+(`moviedb.infra.metrics`) e pelo registro de consultas lentas
+(`moviedb.infra.slow_queries`).
+
+Cada engine recebe um único par de eventos `before_cursor_execute` /
+`after_cursor_execute`, que mede a duração de cada comando e a repassa a todas
+as funções registradas com `observar`.
+"""
+import weakref
+from time import perf_counter
+from typing import Any, Callable, List
+
+import sqlalchemy as sa
+
+QUERY_START_KEY = 'query_timing_start'
+
+# funções chamadas com (conexão, comando, parâmetros, executemany, duração)
+Observador = Callable[[sa.Connection, str, Any, bool, float], None]
+
+_observadores: 'weakref.WeakKeyDictionary[sa.Engine, List[Observador]]' = weakref.WeakKeyDictionary()
+
+
+def observar(engine: sa.Engine, funcao: Observador) -> None:
+    """
+    Registra uma função para receber a duração de cada comando executado no
+    engine. Registrar a mesma função duas vezes não tem efeito.
+
+    Args:
+        engine: O engine monitorado.
+        funcao: Chamada com (conexão, comando, parâmetros, executemany, duração
+            em segundos) após cada comando.
+    """
+    funcoes = _observadores.get(engine)
+    if funcoes is None:
+        funcoes = _observadores[engine] = []
+        sa.event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        sa.event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        sa.event.listen(engine, 'handle_error', _handle_error)
+    if funcao not in funcoes:
+        funcoes.append(funcao)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault(QUERY_START_KEY, []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    inicios = conn.info.get(QUERY_START_KEY)
+    if not inicios:
+        return
+    duracao = perf_counter() - inicios.pop()
+    for funcao in _observadores.get(conn.engine, ()):
+        funcao(conn, statement, parameters, executemany, duracao)
+
+
+def _handle_error(exception_context) -> None:
+    conexao = exception_context.connection
+    if conexao is not None and conexao.info.get(QUERY_START_KEY):
+        conexao.info[QUERY_START_KEY].pop()
@@ -0,0 +1,267 @@
+"""
+Limitação de taxa (token bucket) dos endpoints de autenticação.
+
+Login, cadastro e pedido de nova senha calculam hashes de senha ou enviam
+e-mails; uma rajada de requisições automatizadas ocuparia todos os workers.
+Cada submissão (POST) desses endpoints consome uma ficha de cada balde: o do
+IP do cliente, o do e-mail informado no formulário (normalizado) e, se
+configurado, um balde total do endpoint, que limita a carga do servidor como um
+todo. Se algum balde estiver vazio, a requisição é recusada com
+`429 Too Many Requests` e `Retry-After`, antes de qualquer acesso ao banco ou
+cálculo de hash, e nenhuma ficha é consumida.
+
+Os baldes ficam em um arquivo SQLite local, compartilhado pelos workers do
+mesmo servidor; os baldes de uma requisição são consumidos em uma única
+transação, atômica entre processos.
+"""
+import functools
+import math
+import os
+import random
+import sqlite3
+import threading
+from collections import Counter
+from time import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+_SQL_TABELA = """CREATE TABLE IF NOT EXISTS baldes (
+    chave TEXT PRIMARY KEY,
+    fichas REAL NOT NULL,
+    atualizado REAL NOT NULL,
+    permitido INTEGER NOT NULL,
+    expira REAL NOT NULL)"""
+
+# as expressões do SET usam os valores anteriores de todas as colunas
+_SQL_CONSUMIR = """INSERT INTO baldes (chave, fichas, atualizado, permitido, expira)
+VALUES (:chave, :capacidade - 1, :agora, 1, :agora + 1 / :taxa)
+ON CONFLICT (chave) DO UPDATE SET
+    fichas = min(:capacidade, fichas + (:agora - atualizado) * :taxa) -
+             (min(:capacidade, fichas + (:agora - atualizado) * :taxa) >= 1),
+    permitido = min(:capacidade, fichas + (:agora - atualizado) * :taxa) >= 1,
+    atualizado = :agora,
+    expira = :agora + (:capacidade - min(:capacidade, fichas + (:agora - atualizado) * :taxa) +
+             (min(:capacidade, fichas + (:agora - atualizado) * :taxa) >= 1)) / :taxa
+RETURNING fichas, permitido"""
+
+
+class SQLiteBucketStore:
+    """
+    Baldes de fichas armazenados em um arquivo SQLite, compartilhado pelos
+    processos do servidor. Cada thread (e cada processo, após um fork) usa
+    a sua própria conexão.
+    """
+
+    def __init__(self, caminho: str, busy_timeout: float = 1.0):
+        self.caminho = caminho
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+    def consumir(self, chave: str, capacidade: float, taxa: float,
+                 agora: Optional[float] = None) -> Tuple[bool, float]:
+        """
+        Consome uma ficha do balde, reabastecido continuamente.
+
+        Args:
+            chave: A identificação do balde.
+            capacidade: Quantidade máxima de fichas (a rajada permitida).
+            taxa: Fichas repostas por segundo.
+            agora: O instante do consumo (padrão: `time.time()`).
+
+        Returns:
+            Se a ficha foi consumida e, caso não tenha sido, quantos segundos
+            faltam para haver uma ficha disponível.
+        """
+        vazio, espera = self.consumir_todos([(chave, capacidade, taxa)], agora)
+        return vazio is None, espera
+
+    def consumir_todos(self, baldes: List[Tuple[str, float, float]],
+                       agora: Optional[float] = None) -> Tuple[Optional[int], float]:
+        """
+        Consome uma ficha de cada balde, ou de nenhum: se algum deles estiver
+        vazio, a transação é desfeita e os demais ficam como estavam.
+
+        Args:
+            baldes: Tuplas (chave, capacidade, taxa), como em `consumir`.
+            agora: O instante do consumo (padrão: `time.time()`).
+
+        Returns:
+            O índice do primeiro balde vazio, ou None se as fichas foram
+            consumidas, e quantos segundos faltam para haver uma ficha nele.
+        """
+        agora = time() if agora is None else agora
+        conexao = self._conexao()
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            for indice, (chave, capacidade, taxa) in enumerate(baldes):
+                fichas, permitido = conexao.execute(_SQL_CONSUMIR, {
+                    'chave': chave, 'capacidade': capacidade, 'taxa': taxa, 'agora': agora}).fetchone()
+                if not permitido:
+                    conexao.execute("ROLLBACK")
+                    return indice, (1 - fichas) / taxa
+            conexao.execute("COMMIT")
+        except BaseException:
+            if conexao.in_transaction:
+                conexao.execute("ROLLBACK")
+            raise
+        # baldes cheios há muito tempo equivalem a baldes inexistentes
+        if random.random() < 0.001:
+            conexao.execute("DELETE FROM baldes WHERE expira < ?", (agora,))
+        return None, 0.0
+
+    def limpar(self) -> None:
+        """
+        Remove todos os baldes.
+        """
+        self._conexao().execute("DELETE FROM baldes")
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or self._local.pid != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=self.busy_timeout,
+                                      isolation_level=None, check_same_thread=False)
+            conexao.execute("PRAGMA journal_mode = WAL")
+            # perder os últimos consumos em uma queda de energia é aceitável
+            conexao.execute("PRAGMA synchronous = OFF")
+            conexao.execute(_SQL_TABELA)
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+
+class RateLimiter:
+    """
+    Limitador de taxa dos endpoints caros, aplicado com o decorador `limit`.
+
+    Os limites são dados como `[requisições, segundos]`: o balde comporta
+    `requisições` fichas e é reabastecido à razão de `requisições / segundos`
+    por segundo. Um limite nulo desativa o balde correspondente.
+
+    As chaves de configuração usadas são:
+
+    - RATE_LIMIT_ENABLED: true
+    - RATE_LIMIT_STORAGE: "<instance>/rate_limit.db"
+    - RATE_LIMIT_IP: [10, 60] (por IP do cliente e endpoint)
+    - RATE_LIMIT_EMAIL: [5, 300] (por e-mail informado e endpoint)
+    - RATE_LIMIT_TOTAL: null (por endpoint, somando todos os clientes, por
+      exemplo [60, 10]; desativado por padrão, pois um único cliente que
+      esgote esse balde bloqueia o endpoint para todos os outros)
+    - RATE_LIMIT_TRUSTED_PROXIES: 0 (quantos proxies reversos confiáveis há à
+      frente da aplicação; com 1 ou mais, o IP do cliente é o informado em
+      `X-Forwarded-For` pelo proxy mais externo confiável, e não o do próprio
+      proxy, que colocaria todos os clientes no mesmo balde)
+    """
+
+    ESCOPOS = ('ip', 'email', 'total')
+    LIMITES_PADRAO = {'ip': (10, 60), 'email': (5, 300), 'total': None}
+
+    def __init__(self):
+        self.enabled = True
+        self.store: Optional[SQLiteBucketStore] = None
+        self.limites: Dict[str, Optional[Tuple[float, float]]] = dict(self.LIMITES_PADRAO)
+        self.trusted_proxies = 0
+        self.rejected: Counter = Counter()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Configura os limites e o arquivo dos baldes.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        self.enabled = bool(app.config.get('RATE_LIMIT_ENABLED', True))
+        for escopo in self.ESCOPOS:
+            limite = app.config.get(f"RATE_LIMIT_{escopo.upper()}", self.LIMITES_PADRAO[escopo])
+            self.limites[escopo] = (float(limite[0]), float(limite[1])) if limite else None
+        self.trusted_proxies = int(app.config.get('RATE_LIMIT_TRUSTED_PROXIES', 0))
+        caminho = app.config.get('RATE_LIMIT_STORAGE') or os.path.join(app.instance_path, 'rate_limit.db')
+        self.store = SQLiteBucketStore(caminho)
+        app.extensions['rate_limiter'] = self
+
+    def limit(self, view: Callable) -> Callable:
+        """
+        Decorador de views que recusa com 429 as submissões acima do limite.
+        As requisições GET, HEAD e OPTIONS não são limitadas.
+        """
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if self.enabled and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+                self.check(request.endpoint or view.__name__)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    def check(self, endpoint: str) -> None:
+        """
+        Consome uma ficha de cada balde da requisição corrente, ou de nenhum se
+        algum deles estiver vazio.
+
+        Args:
+            endpoint: O endpoint que identifica os baldes.
+
+        Raises:
+            TooManyRequests: Se algum dos baldes estiver vazio.
+        """
+        escopos: List[str] = []
+        baldes: List[Tuple[str, float, float]] = []
+        for escopo, valor in self._identificacoes():
+            limite = self.limites.get(escopo)
+            if limite is None or valor is None:
+                continue
+            quantidade, segundos = limite
+            escopos.append(escopo)
+            baldes.append((f"{endpoint}|{escopo}|{valor}", quantidade, quantidade / segundos))
+        if not baldes:
+            return
+        try:
+            vazio, espera = self.store.consumir_todos(baldes)
+        except sqlite3.Error:
+            # sem o arquivo dos baldes, a aplicação continua atendendo
+            current_app.logger.exception("falha no limitador de taxa")
+            return
+        if vazio is not None:
+            self._rejeitar(endpoint, escopos[vazio], espera)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'enabled': self.enabled,
+                'rejected': {f"{endpoint} ({escopo})": quantidade
+                             for (endpoint, escopo), quantidade in self.rejected.items()}}
+
+    def _rejeitar(self, endpoint: str, escopo: str, espera: float) -> None:
+        self.rejected[(endpoint, escopo)] += 1
+        metrics = current_app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.observe_rate_limited(endpoint, escopo)
+        current_app.logger.info("limite de taxa (%s) atingido em %s por %s",
+                                escopo, endpoint, self.ip_do_cliente())
+        raise TooManyRequests(description="Muitas tentativas. Aguarde antes de tentar novamente.",
+                              retry_after=max(1, math.ceil(espera)))
+
+    def ip_do_cliente(self) -> Optional[str]:
+        """
+        O IP do cliente da requisição corrente. Atrás de `trusted_proxies`
+        proxies, é o valor que o mais externo deles acrescentou ao
+        `X-Forwarded-For` (o n-ésimo a partir da direita), como no `ProxyFix`
+        do Werkzeug; os valores mais à esquerda podem ter sido forjados pelo
+        cliente e são ignorados.
+        """
+        if self.trusted_proxies <= 0:
+            return request.remote_addr
+        encaminhados = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',')
+                        if ip.strip()]
+        if len(encaminhados) < self.trusted_proxies:
+            return request.remote_addr
+        return encaminhados[-self.trusted_proxies]
+
+    def _identificacoes(self) -> List[Tuple[str, Optional[str]]]:
+        from moviedb.models.autenticacao import normalizar_email
+
+        email = (request.form.get('email') or '').strip()
+        if email:
+            try:
+                email = normalizar_email(email)
+            except ValueError:
+                email = email.lower()
+        return [('ip', self.ip_do_cliente()), ('email', email or None), ('total', '*')]
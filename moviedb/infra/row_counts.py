@@ -0,0 +1,154 @@
+import threading
+from time import monotonic
+from typing import Any, Dict, Optional, Set
+
+import sqlalchemy as sa
+from flask import Flask
+
+
+class RowCountCache:
+    """
+    Cache em memória da quantidade de linhas de cada tabela, usado por
+    `BasicRepositoryMixin.count(approximate=True)`.
+
+    A contagem é mantida a cada commit: as inserções e remoções feitas pelo ORM
+    ajustam o valor em cache, e os comandos INSERT/UPDATE/DELETE executados
+    diretamente (por exemplo, a importação do catálogo) descartam a entrada da
+    tabela afetada, que é recontada na próxima consulta. O cache é local ao
+    processo: as alterações feitas por outro processo só são percebidas quando a
+    entrada expira, por isso o valor é aproximado.
+
+    As chaves de configuração usadas são:
+
+    - ROW_COUNT_CACHE_ENABLED: true
+    - ROW_COUNT_CACHE_TTL: 60 (segundos)
+    """
+
+    PENDING_KEY = 'row_count_cache_pending'
+
+    def __init__(self, ttl: float = 60):
+        self.enabled = True
+        self.ttl = ttl
+        self._entries: Dict[str, tuple[float, int]] = {}
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app: Flask, session: Any = None) -> None:
+        """
+        Configura o cache a partir do dicionário de configuração da aplicação e
+        registra os eventos do SQLAlchemy que o mantêm atualizado.
+
+        Args:
+            app: A aplicação Flask.
+            session: A sessão (ou scoped_session) cujos commits serão monitorados.
+        """
+        self.enabled = bool(app.config.get('ROW_COUNT_CACHE_ENABLED', True))
+        self.ttl = float(app.config.get('ROW_COUNT_CACHE_TTL', self.ttl))
+        app.extensions['row_counts'] = self
+
+        if session is not None and not self._listening:
+            sa.event.listen(session, 'after_flush', self._collect_changes)
+            sa.event.listen(session, 'do_orm_execute', self._collect_statement)
+            sa.event.listen(session, 'after_commit', self._apply_changes)
+            sa.event.listen(session, 'after_soft_rollback', self._discard_changes)
+            self._listening = True
+
+    def get(self, tabela: str) -> Optional[int]:
+        """
+        Obtém a contagem em cache de uma tabela.
+
+        Args:
+            tabela: O nome da tabela.
+
+        Returns:
+            A quantidade de linhas, ou None se não houver entrada válida.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entrada = self._entries.get(tabela)
+            if entrada is None:
+                return None
+            if entrada[0] < monotonic():
+                del self._entries[tabela]
+                return None
+            return entrada[1]
+
+    def put(self, tabela: str, quantidade: int) -> int:
+        """
+        Armazena a contagem de uma tabela.
+
+        Args:
+            tabela: O nome da tabela.
+            quantidade: A quantidade de linhas.
+
+        Returns:
+            A própria quantidade, para permitir o encadeamento.
+        """
+        if self.enabled:
+            with self._lock:
+                self._entries[tabela] = (monotonic() + self.ttl, quantidade)
+        return quantidade
+
+    def can_populate(self, session) -> bool:
+        """
+        Indica se uma contagem feita agora na sessão pode ser guardada em cache.
+
+        Enquanto a transação tiver alterações ainda não confirmadas (objetos
+        novos, alterados ou removidos, ou comandos já enviados ao banco), a
+        contagem incluiria linhas que o commit voltaria a somar, ou que um
+        rollback descartaria; nesse caso ela é devolvida sem ser armazenada.
+
+        Args:
+            session: A sessão em que a contagem será feita.
+
+        Returns:
+            True se a sessão não tiver alterações pendentes.
+        """
+        if session.new or session.dirty or session.deleted:
+            return False
+        pendentes = session.info.get(self.PENDING_KEY)
+        return not pendentes or not (pendentes['deltas'] or pendentes['stale'])
+
+    def invalidate(self, tabela: str) -> None:
+        with self._lock:
+            self._entries.pop(tabela, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _pending(self, session) -> Dict[str, Any]:
+        return session.info.setdefault(self.PENDING_KEY, {'deltas': {}, 'stale': set()})
+
+    def _collect_changes(self, session, flush_context) -> None:
+        deltas: Dict[str, int] = self._pending(session)['deltas']
+        for obj in session.new:
+            tabela = sa.inspect(obj).mapper.local_table.name
+            deltas[tabela] = deltas.get(tabela, 0) + 1
+        for obj in session.deleted:
+            tabela = sa.inspect(obj).mapper.local_table.name
+            deltas[tabela] = deltas.get(tabela, 0) - 1
+
+    def _collect_statement(self, orm_execute_state) -> None:
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            tabela = getattr(orm_execute_state.statement, 'table', None)
+            if tabela is not None and getattr(tabela, 'name', None):
+                stale: Set[str] = self._pending(orm_execute_state.session)['stale']
+                stale.add(tabela.name)
+
+    def _apply_changes(self, session) -> None:
+        pendentes = session.info.pop(self.PENDING_KEY, None)
+        if not pendentes:
+            return
+        with self._lock:
+            for tabela in pendentes['stale']:
+                self._entries.pop(tabela, None)
+            for tabela, delta in pendentes['deltas'].items():
+                entrada = self._entries.get(tabela)
+                if entrada is not None:
+                    self._entries[tabela] = (entrada[0], max(entrada[1] + delta, 0))
+
+    def _discard_changes(self, session, previous_transaction) -> None:
+        if previous_transaction.parent is None:
+            session.info.pop(self.PENDING_KEY, None)
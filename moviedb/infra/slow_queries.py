@@ -0,0 +1,112 @@
+import logging
+import os
+import sys
+from typing import Any, Optional
+
+from flask import Flask
+
+from moviedb.infra import query_timing
+
+logger = logging.getLogger('moviedb.sql')
+
+_PACOTE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# os módulos que medem as consultas não são a origem delas
+_IGNORADOS = frozenset({__file__, query_timing.__file__})
+
+
+def formato_dos_parametros(parameters: Any, executemany: bool = False) -> str:
+    """
+    Descreve o formato dos parâmetros de um comando sem expor seus valores
+    (que podem conter senhas ou dados pessoais).
+
+    Args:
+        parameters: Os parâmetros enviados ao driver.
+        executemany: Se o comando foi executado com `executemany`.
+
+    Returns:
+        Uma descrição como "(str, int)" ou "500 x (str, int)".
+    """
+    if executemany:
+        linhas = list(parameters or [])
+        return f"{len(linhas)} x {formato_dos_parametros(linhas[0]) if linhas else '()'}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{chave}: {type(valor).__name__}"
+                               for chave, valor in parameters.items()) + '}'
+    return '(' + ', '.join(type(valor).__name__ for valor in (parameters or ())) + ')'
+
+
+def local_da_chamada() -> Optional[str]:
+    """
+    Encontra, na pilha de execução, a linha do código da aplicação que originou
+    a consulta, ignorando o SQLAlchemy, o Flask, este módulo e a cronometragem
+    das consultas.
+
+    Returns:
+        "arquivo:linha (função)", relativo ao pacote `moviedb`, ou None.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        arquivo = frame.f_code.co_filename
+        if arquivo.startswith(_PACOTE) and arquivo not in _IGNORADOS:
+            return f"{os.path.relpath(arquivo, _PACOTE)}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """
+    Registra no log (logger `moviedb.sql`) as consultas que demoram mais que o
+    limite configurado, com o comando, o formato dos parâmetros, o ponto do
+    código que a originou e o plano de execução obtido do banco.
+
+    As chaves de configuração usadas são:
+
+    - SLOW_QUERY_THRESHOLD: 0.2 (segundos; 0 desativa o registro)
+    - SLOW_QUERY_EXPLAIN: true (inclui o plano de execução das consultas SELECT)
+    """
+
+    def __init__(self, threshold: float = 0.2):
+        self.threshold = threshold
+        self.explain = True
+
+    def init_app(self, app: Flask, db: Any = None) -> None:
+        """
+        Configura o limite e registra os eventos nos engines da aplicação.
+
+        Args:
+            app: A aplicação Flask.
+            db: A extensão Flask-SQLAlchemy cujos engines serão monitorados.
+        """
+        self.threshold = float(app.config.get('SLOW_QUERY_THRESHOLD', self.threshold))
+        self.explain = bool(app.config.get('SLOW_QUERY_EXPLAIN', True))
+        app.extensions['slow_queries'] = self
+        if self.threshold <= 0 or db is None:
+            return
+
+        with app.app_context():
+            for engine in db.engines.values():
+                query_timing.observar(engine, self._observe_query)
+
+    def _observe_query(self, conn, statement, parameters, executemany, duracao: float) -> None:
+        if duracao < self.threshold:
+            return
+
+        plano = []
+        if self.explain and not executemany and statement.lstrip()[:6].upper().startswith(('SELECT', 'WITH')):
+            plano = self._plano(conn, statement, parameters)
+        logger.warning("Consulta lenta (%.1f ms) em %s\n%s\nparâmetros: %s%s",
+                       duracao * 1e3,
+                       local_da_chamada() or 'local desconhecido',
+                       statement,
+                       formato_dos_parametros(parameters, executemany),
+                       ''.join(f"\n    {linha}" for linha in plano))
+
+    @staticmethod
+    def _plano(conn, statement: str, parameters: Any) -> list:
+        from moviedb.infra.query_plans import explicar_sql
+
+        try:
+            return explicar_sql(conn.connection.dbapi_connection, conn.dialect.name,
+                                statement, parameters)
+        except Exception as e:
+            return [f"(plano indisponível: {e})"]
@@ -0,0 +1,105 @@
+"""
+Tempo de inicialização da aplicação.
+
+- `LazyMigrate` adia a importação do Flask-Migrate (e do Alembic, que responde
+  por boa parte do tempo de importação da aplicação) até que um comando
+  `flask db ...` seja de fato executado; os workers do servidor nunca o carregam.
+- `aquecer` faz, uma única vez, o trabalho que cada worker faria nas primeiras
+  requisições (conexão inicial com o banco, compilação dos templates). Com um
+  servidor que carrega a aplicação antes do fork (`gunicorn --preload`), o
+  resultado é herdado por todos os workers.
+
+Veja `benchmarks/startup.py` para medir o custo de importação de cada módulo.
+"""
+import os
+from time import perf_counter
+from typing import Any, Dict, Optional
+
+import click
+from flask import Flask
+
+from moviedb.infra.templates import precompilar_templates
+
+
+class LazyMigrate:
+    """
+    Substituto de `flask_migrate.Migrate` que só importa o Flask-Migrate quando
+    o grupo de comandos `flask db` é invocado.
+    """
+
+    def __init__(self):
+        self.migrate: Optional[Any] = None
+
+    def init_app(self, app: Flask, db: Any = None, **kwargs) -> None:
+        """
+        Registra o grupo `flask db`, com os mesmos argumentos de `Migrate.init_app`.
+
+        Args:
+            app: A aplicação Flask.
+            db: A extensão Flask-SQLAlchemy.
+            **kwargs: Argumentos repassados a `Migrate` (por exemplo, `compare_type`).
+        """
+        app.cli.add_command(_LazyMigrateGroup(self, app, db, kwargs))
+
+    def load(self, app: Flask, db: Any, kwargs: Dict[str, Any]) -> click.Command:
+        if 'migrate' not in app.extensions:
+            from flask_migrate import Migrate
+
+            self.migrate = Migrate()
+            self.migrate.init_app(app, db, **kwargs)
+        return app.cli.commands['db']
+
+
+class _LazyMigrateGroup(click.Group):
+    """
+    Grupo `db` provisório: ao ser invocado, carrega o Flask-Migrate (que registra
+    o grupo verdadeiro no lugar deste) e repassa a ele os argumentos.
+    """
+
+    def __init__(self, lazy: LazyMigrate, app: Flask, db: Any, kwargs: Dict[str, Any]):
+        super().__init__('db', help="Perform database migrations.")
+        self.lazy = lazy
+        self.app = app
+        self.db = db
+        self.kwargs = kwargs
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        grupo = self.lazy.load(self.app, self.db, self.kwargs)
+        return grupo.make_context(info_name, args, parent=parent, **extra)
+
+
+def aquecer(app: Flask, db: Any) -> Dict[str, float]:
+    """
+    Executa o trabalho de aquecimento: abre uma conexão com cada banco (o que
+    também inicializa o dialeto do SQLAlchemy) e compila todos os templates.
+
+    As conexões abertas aqui não são reaproveitadas pelos processos filhos: um
+    hook `os.register_at_fork` descarta, no filho, o pool herdado, para que dois
+    processos nunca compartilhem um socket.
+
+    Args:
+        app: A aplicação Flask.
+        db: A extensão Flask-SQLAlchemy.
+
+    Returns:
+        O tempo gasto em cada etapa, em segundos.
+    """
+    tempos: Dict[str, float] = {}
+
+    inicio = perf_counter()
+    with app.app_context():
+        engines = list(db.engines.values())
+        for engine in engines:
+            with engine.connect():
+                pass
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=lambda: [engine.dispose(close=False) for engine in engines])
+    tempos['banco'] = perf_counter() - inicio
+
+    inicio = perf_counter()
+    precompilar_templates(app)
+    tempos['templates'] = perf_counter() - inicio
+
+    app.logger.info("aquecimento: %s",
+                    ', '.join(f"{etapa} {duracao * 1e3:.1f} ms" for etapa, duracao in tempos.items()))
+    return tempos
@@ -0,0 +1,99 @@
+"""
+Compilação dos templates Jinja.
+
+O código compilado dos templates é gravado em disco (`FileSystemBytecodeCache`),
+de forma que um worker novo carrega os templates sem compilá-los novamente.
+Opcionalmente, todos os templates são compilados e carregados na inicialização
+(TEMPLATE_PRELOAD), evitando que a primeira requisição de cada página (ou o
+primeiro e-mail de cadastro) pague a compilação. O comando
+`flask templates check` informa o tempo de compilação de cada template.
+"""
+import os
+from time import perf_counter
+from typing import Dict, List
+
+import click
+from flask import Flask, current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+
+
+def configurar_templates(app: Flask) -> None:
+    """
+    Configura o cache de bytecode e, se solicitado, pré-carrega os templates.
+
+    As chaves de configuração usadas são:
+
+    - TEMPLATE_BYTECODE_CACHE: true
+    - TEMPLATE_BYTECODE_CACHE_DIR: "<instance>/jinja_cache"
+    - TEMPLATE_PRELOAD: false
+
+    Args:
+        app: A aplicação Flask.
+    """
+    app.cli.add_command(templates_cli)
+    if app.config.get('TEMPLATE_BYTECODE_CACHE', True):
+        diretorio = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR') or \
+            os.path.join(app.instance_path, 'jinja_cache')
+        os.makedirs(diretorio, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(diretorio)
+    if app.config.get('TEMPLATE_PRELOAD', False):
+        tempos = precompilar_templates(app)
+        app.logger.debug("%d templates carregados em %.1f ms",
+                         len(tempos), sum(tempos.values()) * 1e3)
+
+
+def templates_da_aplicacao(app: Flask) -> List[str]:
+    """
+    Lista os templates usados pela aplicação: os de `moviedb/templates` e os do
+    Bootstrap-Flask para o Bootstrap 5 (as macros importadas pelos templates).
+    """
+    nomes = set(app.jinja_loader.list_templates()) if app.jinja_loader else set()
+    nomes.update(nome for nome in app.jinja_env.list_templates() if nome.startswith('bootstrap5/'))
+    return sorted(nomes)
+
+
+def precompilar_templates(app: Flask) -> Dict[str, float]:
+    """
+    Carrega todos os templates no cache do ambiente Jinja (compilando-os, ou
+    lendo o código compilado do cache de bytecode).
+
+    Returns:
+        O tempo de carga de cada template, em segundos.
+    """
+    tempos: Dict[str, float] = {}
+    for nome in templates_da_aplicacao(app):
+        inicio = perf_counter()
+        app.jinja_env.get_template(nome)
+        tempos[nome] = perf_counter() - inicio
+    return tempos
+
+
+templates_cli = AppGroup('templates', help="Compilação dos templates Jinja.")
+
+
+@templates_cli.command('check')
+@click.option('--top', default=20, show_default=True, help="Quantidade de templates listados.")
+def check(top: int):
+    """Informa o tempo de compilação e de carga de cada template."""
+    ambiente = current_app.jinja_env
+    resultados = []
+    for nome in templates_da_aplicacao(current_app):
+        fonte, arquivo, _ = ambiente.loader.get_source(ambiente, nome)
+        inicio = perf_counter()
+        ambiente.compile(fonte, nome, arquivo)
+        compilacao = perf_counter() - inicio
+
+        # carga pelo caminho normal: usa o cache de bytecode, se houver
+        ambiente.cache.clear()
+        inicio = perf_counter()
+        ambiente.get_template(nome)
+        resultados.append((nome, compilacao, perf_counter() - inicio))
+
+    click.echo(f"{'template':<48} {'compilação ms':>14} {'carga ms':>10}")
+    for nome, compilacao, carga in sorted(resultados, key=lambda item: -item[1])[:top]:
+        click.echo(f"{nome:<48} {compilacao * 1e3:>14.2f} {carga * 1e3:>10.2f}")
+    click.echo(f"{'total (' + str(len(resultados)) + ' templates)':<48} "
+               f"{sum(r[1] for r in resultados) * 1e3:>14.2f} {sum(r[2] for r in resultados) * 1e3:>10.2f}")
+    cache = ambiente.bytecode_cache
+    click.echo(f"cache de bytecode: {cache.directory if cache is not None else 'desativado'}")
@@ -1,11 +1,214 @@
+import base64
+import random
+import secrets
+from enum import Enum
 from time import time
 from typing import Any, Optional, Dict
 
 import jwt
-from flask import current_app
+from flask import Flask, current_app
 
 
-def create_jwt_token(action: str = "",
+class UsedTokenStore:
+    """
+    Registro dos identificadores (`jti`) de tokens já utilizados, na tabela
+    `tokens_utilizados` do banco da aplicação, compartilhada por todos os
+    workers e preservada entre reinícios.
+
+    `add` apenas insere o registro na sessão corrente (`db.session`): ele é
+    gravado pelo mesmo commit que aplica a alteração autorizada pelo token. Se
+    outro worker gravar o mesmo `jti` antes, a inserção viola a chave primária
+    e o token é recusado. De tempos em tempos, os registros de tokens expirados
+    são removidos na mesma transação.
+    """
+
+    PROBABILIDADE_LIMPEZA = 0.01
+
+    def __contains__(self, jti: str) -> bool:
+        from moviedb import db
+        from moviedb.models.autenticacao import TokenUtilizado
+        return db.session.get(TokenUtilizado, jti) is not None
+
+    def add(self, jti: str, exp: int) -> bool:
+        """
+        Marca um token como utilizado. Cabe a quem chamou fazer o commit da
+        sessão, junto com a alteração autorizada pelo token.
+
+        Args:
+            jti: O identificador do token.
+            exp: O instante (epoch) em que o token expira.
+
+        Returns:
+            True se o token ainda não havia sido utilizado, False caso contrário
+            (neste caso a sessão é desfeita).
+        """
+        from sqlalchemy import delete
+        from sqlalchemy.exc import IntegrityError
+        from moviedb import db
+        from moviedb.models.autenticacao import TokenUtilizado
+
+        if jti in self:
+            return False
+        db.session.add(TokenUtilizado(jti=jti, expira=exp))
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        if random.random() < self.PROBABILIDADE_LIMPEZA:
+            db.session.execute(delete(TokenUtilizado).where(TokenUtilizado.expira < int(time())))
+        return True
+
+
+class TokenService:
+    """
+    Emissão e verificação de JWTs com chaves preparadas uma única vez.
+
+    As chaves de verificação são indexadas pelo `kid` presente no cabeçalho do
+    token, o que permite a rotação: uma nova chave é adicionada a JWT_KEYS e
+    indicada em JWT_KID, e os tokens assinados com as chaves anteriores continuam
+    válidos até expirarem. Tokens de uso único (validação de e-mail, troca de
+    senha) têm seu `jti` registrado em um `UsedTokenStore` ao serem consumidos.
+
+    As chaves de configuração usadas são:
+
+    - JWT_KEYS: {"kid": "segredo", ...} (se ausente, usa SECRET_KEY com o kid "default")
+    - JWT_KID: o kid usado para assinar novos tokens (default: a primeira chave)
+    """
+
+    ALGORITHM = 'HS256'
+
+    def __init__(self):
+        self.keys: Dict[str, jwt.PyJWK] = {}
+        self.current_kid: Optional[str] = None
+        self.used_tokens = UsedTokenStore()
+
+    def init_app(self, app: Flask) -> None:
+        """
+        Prepara as chaves a partir do dicionário de configuração da aplicação.
+
+        Args:
+            app: A aplicação Flask.
+        """
+        segredos = dict(app.config.get('JWT_KEYS') or {})
+        if not segredos:
+            segredos = {'default': app.config['SECRET_KEY']}
+        self.keys = {kid: self._prepare_key(kid, segredo) for kid, segredo in segredos.items()}
+        self.current_kid = app.config.get('JWT_KID') or next(iter(self.keys))
+        if self.current_kid not in self.keys:
+            raise ValueError(f"JWT_KID '{self.current_kid}' não está em JWT_KEYS")
+        app.extensions['token_service'] = self
+
+    def create(self,
+               action: Any = "",
+               sub: Any = None,
+               expires_in: int = 600,
+               extra_data: Optional[Dict[str, str]] = None) -> str:
+        """
+        Cria um token JWT assinado com a chave corrente. Veja `create_jwt_token`.
+        """
+        if not hasattr(type(sub), '__str__'):
+            raise ValueError(f"Tipo de objeto 'sub' invalido: {type(sub)}")
+
+        agora = int(time())
+        payload = {
+            'sub': str(sub),
+            'iat': agora,
+            'nbf': agora,
+            'exp': agora + expires_in,
+            'jti': secrets.token_urlsafe(12),
+            'action': (action.name if isinstance(action, Enum) else str(action)).lower()
+        }
+
+        if extra_data is not None and isinstance(extra_data, dict):
+            payload['extraData'] = extra_data
+
+        return jwt.encode(payload=payload,
+                          key=self.keys[self.current_kid],
+                          algorithm=self.ALGORITHM,
+                          headers={'kid': self.current_kid})
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Verifica um token JWT e retorna suas reivindicações. Veja `verify_jwt_token`.
+        """
+        claims: Dict[str, Any] = {'valid': False}
+        try:
+            kid = jwt.get_unverified_header(token).get('kid', self.current_kid)
+            chave = self.keys.get(kid)
+            if chave is None:
+                raise jwt.InvalidKeyError(f"kid desconhecido: {kid}")
+            payload = jwt.decode(token,
+                                 key=chave,
+                                 algorithms=[self.ALGORITHM])
+
+            jti = payload.get('jti')
+            if jti is not None and jti in self.used_tokens:
+                current_app.logger.warning("JWT reutilizado (jti=%s)", jti)
+                claims.update({'reason': "reused"})
+                return claims
+
+            claims.update({'valid': True,
+                           'sub': payload.get('sub', None),
+                           'action': self._parse_action(payload.get('action', None)),
+                           'jti': jti,
+                           'exp': payload.get('exp', None)})
+
+            if 'iat' in payload:
+                claims.update({'age': int(time()) - int(payload.get('iat'))})
+
+            if 'extraData' in payload:
+                claims.update({'extra_data': payload.get('extraData')})
+
+        except jwt.ExpiredSignatureError as e:
+            current_app.logger.error("JWT expired: %s", e)
+            claims.update({'reason': "expired"})
+
+        except jwt.InvalidSignatureError as e:
+            current_app.logger.error("JWT invalid signature: %s", e)
+            claims.update({'reason': "bad_signature"})
+
+        except (jwt.InvalidTokenError, jwt.InvalidKeyError) as e:
+            current_app.logger.error("JWT invalid: %s", e)
+            claims.update({'reason': "invalid"})
+
+        except ValueError as e:
+            current_app.logger.error("ValueError: %s", e)
+            claims.update({'reason': "valueerror"})
+
+        return claims
+
+    def consume(self, claims: Dict[str, Any]) -> bool:
+        """
+        Marca como utilizado o token cujas reivindicações foram obtidas com
+        `verify`, impedindo que ele seja usado novamente. O registro é gravado
+        no próximo commit de `db.session`.
+
+        Args:
+            claims: O dicionário retornado por `verify`.
+
+        Returns:
+            True se o token era válido e ainda não havia sido utilizado.
+        """
+        if not claims.get('valid', False) or claims.get('jti') is None:
+            return False
+        return self.used_tokens.add(claims['jti'], int(claims.get('exp') or time()))
+
+    @staticmethod
+    def _prepare_key(kid: str, segredo: str) -> jwt.PyJWK:
+        k = base64.urlsafe_b64encode(segredo.encode('utf-8')).rstrip(b'=').decode('ascii')
+        return jwt.PyJWK({'kty': 'oct', 'k': k, 'kid': kid}, algorithm=TokenService.ALGORITHM)
+
+    @staticmethod
+    def _parse_action(action: Optional[str]) -> Any:
+        from moviedb.models.enumeracoes import JWTAction
+        try:
+            return JWTAction[action.upper()]
+        except (KeyError, AttributeError):
+            return action
+
+
+def create_jwt_token(action: Any = "",
                      sub: Any = None,
                      expires_in: int = 600,
                      extra_data: Optional[Dict[str, str]] = None) -> str:
@@ -13,7 +216,8 @@ def create_jwt_token(action: str = "",
     Cria um token JWT com os parâmetros fornecidos.
 
     Args:
-        action: A ação para a qual o token está sendo usado (opcional).
+        action: A ação para a qual o token está sendo usado (opcional). Pode ser
+            um membro de `JWTAction`.
         sub: O assunto do token (por exemplo, email do usuário).
         expires_in: O tempo de expiração do token em segundos. Default de 10min
         extra_data: Dicionário com dados adicionais para incluir no payload (opcional).
@@ -23,24 +227,10 @@ def create_jwt_token(action: str = "",
     Raises:
         ValueError: Se o objeto 'sub' não puder ser convertido em string.
     """
-    if not hasattr(type(sub), '__str__'): # isinstance(sub, (str, int, float, uuid.UUID)):
-        raise ValueError(f"Tipo de objeto 'sub' invalido: {type(sub)}")
-
-    agora = int(time())
-    payload = {
-        'sub': str(sub),
-        'iat': agora,
-        'nbf': agora,
-        'exp': agora + expires_in,
-        'action': action.lower()
-    }
-
-    if extra_data is not None and isinstance(extra_data, dict):
-        payload['extraData'] = extra_data
-
-    return jwt.encode(payload=payload,
-                      key = current_app.config['SECRET_KEY'],
-                      algorithm='HS256')
+    return current_app.extensions['token_service'].create(action=action,
+                                                          sub=sub,
+                                                          expires_in=expires_in,
+                                                          extra_data=extra_data)
 
 def verify_jwt_token(token: str) -> Dict[str, Any]:
     """
@@ -52,40 +242,24 @@ def verify_jwt_token(token: str) -> Dict[str, Any]:
     Returns:
         Um dicionário contendo as reivindicações do token.
         O dicionário sempre conterá uma chave 'valid' (booleano).
-        Se o token for inválido, uma chave 'reason' pode estar presente.
-        Se o token for válido, ele conterá 'sub', 'action', 'age' e 'extra_data' (se presentes).
+        Se o token for inválido, uma chave 'reason' pode estar presente
+        ('expired', 'invalid', 'bad_signature', 'reused' ou 'valueerror').
+        Se o token for válido, ele conterá 'sub', 'action', 'jti', 'exp', 'age' e
+        'extra_data' (se presentes). A 'action' é convertida para `JWTAction`
+        quando possível.
     """
+    return current_app.extensions['token_service'].verify(token)
 
-    claims: Dict[str, Any] = {'valid': False}
-    try:
-        payload = jwt.decode(token,
-                             key = current_app.config.get('SECRET_KEY'),
-                             algorithms=['HS256'])
-
-        claims.update({'valid': True,
-                       'sub': payload.get('sub', None),
-                       'action': payload.get('action', None) })
-
-        if 'iat' in payload:
-            claims.update({'age': int(time()) - int(payload.get('iat'))})
-
-        if 'extra_data' in payload:
-            claims.update({'extraData': payload.get('extra_data')})
-
-    except jwt.ExpiredSignatureError as e:
-        current_app.logger.error(f"JWT expired: {e}")
-        claims.update({'reason': "expired"})
-
-    except jwt.InvalidTokenError as e:
-        current_app.logger.error(f"JWT invalid: {e}")
-        claims.update({'reason': "invalid"})
-
-    except jwt.InvalidSignatureError as e:
-        current_app.logger.error(f"JWT invalid signature: {e}")
-        claims.update({'reason': "bad_signature"})
+def consume_jwt_token(claims: Dict[str, Any]) -> bool:
+    """
+    Marca um token de uso único como utilizado. O registro é gravado pelo
+    próximo commit de `db.session`, que deve ser o mesmo da alteração
+    autorizada pelo token.
 
-    except ValueError as e:
-        current_app.logger.error(f"ValueError: {e}")
-        claims.update({'reason': "valueerror"})
+    Args:
+        claims: O dicionário retornado por `verify_jwt_token`.
 
-    return claims
+    Returns:
+        True se o token ainda não havia sido utilizado, False caso contrário.
+    """
+    return current_app.extensions['token_service'].consume(claims)
@@ -0,0 +1,206 @@
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Dict, Optional, Set
+
+import sqlalchemy as sa
+from flask import Flask
+from flask_login import UserMixin
+
+
+@dataclass(frozen=True)
+class UserSnapshot(UserMixin):
+    """
+    Cópia imutável dos dados de identidade de um usuário, usada pelo Flask-Login
+    como `current_user` sem precisar consultar o banco de dados a cada requisição.
+
+    Tem a mesma interface de `User` (`is_active` é uma propriedade, como espera
+    o Flask-Login). Para alterar o usuário, obtenha a entidade ORM com
+    `get_user()`.
+    """
+    id: uuid.UUID
+    nome: str
+    email: str
+    ativo: bool
+    login_id: str
+
+    @classmethod
+    def from_user(cls, usuario) -> 'UserSnapshot':
+        return cls(id=usuario.id,
+                   nome=usuario.nome,
+                   email=usuario.email,
+                   ativo=usuario.ativo,
+                   login_id=usuario.get_id())
+
+    @property
+    def is_active(self):
+        return self.ativo
+
+    def get_id(self):
+        return self.login_id
+
+    def get_user(self):
+        """
+        Carrega a entidade `User` correspondente a este snapshot.
+
+        Returns:
+            O objeto `User` associado à sessão atual, ou None se ele não existir mais.
+        """
+        from moviedb.models.autenticacao import User
+        return User.get_by_id(self.id)
+
+
+class UserLoaderCache:
+    """
+    Cache em memória, limitado em tamanho e com tempo de vida (TTL), dos usuários
+    carregados pelo callback `user_loader` do Flask-Login.
+
+    As entradas são indexadas pelo valor de `User.get_id()` e são invalidadas
+    automaticamente quando um commit altera os campos `token_sessao` ou `ativo`
+    de um usuário, ou quando o usuário é removido. O cache é local ao processo:
+    em implantações com vários workers, as alterações feitas por outro processo
+    só são percebidas quando a entrada expira.
+
+    As chaves de configuração usadas são:
+
+    - USER_CACHE_ENABLED: true
+    - USER_CACHE_TTL: 300 (segundos)
+    - USER_CACHE_MAX_ENTRIES: 1024
+    """
+
+    WATCHED_ATTRIBUTES = ('token_sessao', 'ativo')
+    PENDING_KEY = 'user_cache_pending'
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024):
+        self.enabled = True
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, tuple[float, UserSnapshot]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app: Flask, session: Any = None) -> None:
+        """
+        Configura o cache a partir do dicionário de configuração da aplicação e
+        registra os eventos do SQLAlchemy responsáveis pela invalidação.
+
+        Args:
+            app: A aplicação Flask.
+            session: A sessão (ou scoped_session) cujos commits serão monitorados.
+        """
+        self.enabled = bool(app.config.get('USER_CACHE_ENABLED', True))
+        self.ttl = float(app.config.get('USER_CACHE_TTL', self.ttl))
+        self.max_entries = int(app.config.get('USER_CACHE_MAX_ENTRIES', self.max_entries))
+        app.extensions['user_cache'] = self
+
+        if session is not None and not self._listening:
+            sa.event.listen(session, 'after_flush', self._collect_changes)
+            sa.event.listen(session, 'after_commit', self._apply_invalidations)
+            sa.event.listen(session, 'after_soft_rollback', self._discard_changes)
+            self._listening = True
+
+    def get(self, key: str) -> Optional[UserSnapshot]:
+        """
+        Obtém o snapshot associado a `key`, contabilizando acertos e falhas.
+
+        Args:
+            key: O identificador de sessão gerado por `User.get_id()`.
+
+        Returns:
+            O snapshot em cache, ou None se não existir ou estiver expirado.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, snapshot = entry
+                if expires_at > monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return snapshot
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, snapshot: UserSnapshot) -> UserSnapshot:
+        """
+        Armazena um snapshot, descartando as entradas menos usadas se o limite
+        de tamanho for excedido.
+
+        Args:
+            key: O identificador de sessão gerado por `User.get_id()`.
+            snapshot: Os dados do usuário a serem armazenados.
+
+        Returns:
+            O próprio snapshot, para permitir o encadeamento no `user_loader`.
+        """
+        if not self.enabled:
+            return snapshot
+        with self._lock:
+            self._entries[key] = (monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id: Any) -> None:
+        """
+        Remove todas as entradas de um usuário, independente do token de sessão.
+
+        Args:
+            user_id: O UUID (ou sua representação textual) do usuário.
+        """
+        prefixo = f"{str(user_id)}|"
+        with self._lock:
+            chaves = [chave for chave in self._entries if chave.startswith(prefixo)]
+            for chave in chaves:
+                del self._entries[chave]
+            self.invalidations += len(chaves)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retorna os contadores do cache.
+
+        Returns:
+            Dicionário com 'hits', 'misses', 'invalidations', 'size' e 'hit_ratio'.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'invalidations': self.invalidations,
+                    'size': len(self._entries),
+                    'hit_ratio': (self.hits / total) if total else 0.0}
+
+    def _collect_changes(self, session, flush_context) -> None:
+        from moviedb.models.autenticacao import User
+
+        pendentes: Set[Any] = session.info.setdefault(self.PENDING_KEY, set())
+        for obj in session.deleted:
+            if isinstance(obj, User):
+                pendentes.add(obj.id)
+        for obj in session.dirty:
+            if not isinstance(obj, User):
+                continue
+            estado = sa.inspect(obj)
+            if any(estado.attrs[nome].history.has_changes()
+                   for nome in self.WATCHED_ATTRIBUTES):
+                pendentes.add(obj.id)
+
+    def _apply_invalidations(self, session) -> None:
+        for user_id in session.info.pop(self.PENDING_KEY, ()):
+            self.invalidate(user_id)
+
+    def _discard_changes(self, session, previous_transaction) -> None:
+        if previous_transaction.parent is None:
+            session.info.pop(self.PENDING_KEY, None)
@@ -96,6 +96,10 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        # as tabelas do índice de busca textual não fazem parte do metadata
+        from moviedb.infra.busca import incluir_no_autogenerate
+        conf_args["include_name"] = incluir_no_autogenerate
 
     connectable = get_engine()
 
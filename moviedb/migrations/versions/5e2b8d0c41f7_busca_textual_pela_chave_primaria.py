@@ -0,0 +1,58 @@
+"""busca textual pela chave primaria
+
+Revision ID: 5e2b8d0c41f7
+Revises: c7a1013a84b1
+Create Date: 2026-10-18 21:31:40.512973
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from moviedb.infra.busca import criar_indice, remover_indice
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b8d0c41f7'
+down_revision = 'c7a1013a84b1'
+branch_labels = None
+depends_on = None
+
+# o índice FTS5 anterior ("external content"), ligado ao rowid implícito de filmes
+_SQLITE_DDL_ANTERIOR = [
+    """CREATE VIRTUAL TABLE filmes_fts USING fts5(
+        titulo_original, titulo_nacional, sinopse,
+        content='filmes', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER filmes_fts_ai AFTER INSERT ON filmes BEGIN
+        INSERT INTO filmes_fts(rowid, titulo_original, titulo_nacional, sinopse)
+        VALUES (new.rowid, new.titulo_original, new.titulo_nacional, new.sinopse);
+    END""",
+    """CREATE TRIGGER filmes_fts_ad AFTER DELETE ON filmes BEGIN
+        INSERT INTO filmes_fts(filmes_fts, rowid, titulo_original, titulo_nacional, sinopse)
+        VALUES ('delete', old.rowid, old.titulo_original, old.titulo_nacional, old.sinopse);
+    END""",
+    """CREATE TRIGGER filmes_fts_au AFTER UPDATE OF
+        titulo_original, titulo_nacional, sinopse ON filmes BEGIN
+        INSERT INTO filmes_fts(filmes_fts, rowid, titulo_original, titulo_nacional, sinopse)
+        VALUES ('delete', old.rowid, old.titulo_original, old.titulo_nacional, old.sinopse);
+        INSERT INTO filmes_fts(rowid, titulo_original, titulo_nacional, sinopse)
+        VALUES (new.rowid, new.titulo_original, new.titulo_nacional, new.sinopse);
+    END""",
+    "INSERT INTO filmes_fts(filmes_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    # só o SQLite muda: a tabela FTS5 passa a guardar o id de cada filme
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    remover_indice(op.get_bind())
+    criar_indice(op.get_bind())
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    remover_indice(op.get_bind())
+    for comando in _SQLITE_DDL_ANTERIOR:
+        op.execute(sa.text(comando))
@@ -0,0 +1,81 @@
+"""chave natural dos filmes
+
+Revision ID: 69fdd6a7d95f
+Revises: c3d1f0a2b9e4
+Create Date: 2026-10-18 20:40:52.176649
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+from moviedb.infra.busca import criar_indice, remover_indice
+
+
+# revision identifiers, used by Alembic.
+revision = '69fdd6a7d95f'
+down_revision = 'c3d1f0a2b9e4'
+branch_labels = None
+depends_on = None
+
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def combinar_duplicados(connection) -> None:
+    """
+    Combina os filmes com o mesmo título original e ano de lançamento, que
+    violariam a nova restrição de unicidade: fica a linha de menor `id`, com
+    as colunas vazias preenchidas pelas demais, na ordem do `id`.
+    """
+    filmes = sa.table('filmes', *(sa.column(nome) for nome in (
+        'id', 'titulo_original', 'titulo_nacional', 'ano_lancamento', 'lancado', 'duracao',
+        'sinopse', 'orcamento', 'faturamento_lancamento', 'poster_principal', 'link_trailer')))
+    chave = (filmes.c.titulo_original, filmes.c.ano_lancamento)
+    repetidas = (sa.select(*chave).group_by(*chave).having(sa.func.count() > 1)).subquery()
+    linhas = connection.execute(
+        sa.select(filmes).
+        join(repetidas, sa.and_(filmes.c.titulo_original == repetidas.c.titulo_original,
+                                filmes.c.ano_lancamento == repetidas.c.ano_lancamento)).
+        order_by(*chave, filmes.c.id)).mappings().all()
+
+    grupos = {}
+    for linha in linhas:
+        grupos.setdefault((linha['titulo_original'], linha['ano_lancamento']), []).append(linha)
+    for (titulo, ano), grupo in grupos.items():
+        mantida, *removidas = grupo
+        valores = {}
+        for nome, valor in mantida.items():
+            if valor is None:
+                valor = next((linha[nome] for linha in removidas if linha[nome] is not None), None)
+                if valor is not None:
+                    valores[nome] = valor
+        if valores:
+            connection.execute(filmes.update().where(filmes.c.id == mantida['id']).values(**valores))
+        connection.execute(filmes.delete().where(filmes.c.id.in_([linha['id'] for linha in removidas])))
+        logger.warning("filme '%s' (%s): %d linha(s) repetida(s) combinada(s) em %s",
+                       titulo, ano, len(removidas), mantida['id'])
+
+
+def upgrade():
+    combinar_duplicados(op.get_bind())
+    # no SQLite o batch recria a tabela, o que descarta os triggers do índice
+    # de busca textual
+    remover_indice(op.get_bind())
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('filmes', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_filmes_titulo_original_ano_lancamento', ['titulo_original', 'ano_lancamento'])
+
+    # ### end Alembic commands ###
+    criar_indice(op.get_bind())
+
+
+def downgrade():
+    remover_indice(op.get_bind())
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('filmes', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_filmes_titulo_original_ano_lancamento', type_='unique')
+
+    # ### end Alembic commands ###
+    criar_indice(op.get_bind())
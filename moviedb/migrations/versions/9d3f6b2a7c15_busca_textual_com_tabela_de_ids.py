@@ -0,0 +1,59 @@
+"""busca textual com tabela de ids
+
+Revision ID: 9d3f6b2a7c15
+Revises: 5e2b8d0c41f7
+Create Date: 2026-10-19 09:12:03.418266
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from moviedb.infra.busca import criar_indice, remover_indice
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3f6b2a7c15'
+down_revision = '5e2b8d0c41f7'
+branch_labels = None
+depends_on = None
+
+# o índice FTS5 anterior, com o id do filme em uma coluna UNINDEXED (os triggers
+# percorriam a tabela FTS5 inteira para localizar a linha)
+_SQLITE_DDL_ANTERIOR = [
+    """CREATE VIRTUAL TABLE filmes_fts USING fts5(
+        titulo_original, titulo_nacional, sinopse, id UNINDEXED,
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER filmes_fts_ai AFTER INSERT ON filmes BEGIN
+        INSERT INTO filmes_fts(titulo_original, titulo_nacional, sinopse, id)
+        VALUES (new.titulo_original, new.titulo_nacional, new.sinopse, new.id);
+    END""",
+    """CREATE TRIGGER filmes_fts_ad AFTER DELETE ON filmes BEGIN
+        DELETE FROM filmes_fts WHERE id = old.id;
+    END""",
+    """CREATE TRIGGER filmes_fts_au AFTER UPDATE OF
+        titulo_original, titulo_nacional, sinopse, id ON filmes BEGIN
+        UPDATE filmes_fts SET titulo_original = new.titulo_original,
+                              titulo_nacional = new.titulo_nacional,
+                              sinopse = new.sinopse,
+                              id = new.id
+        WHERE id = old.id;
+    END""",
+    """INSERT INTO filmes_fts(titulo_original, titulo_nacional, sinopse, id)
+        SELECT titulo_original, titulo_nacional, sinopse, id FROM filmes""",
+]
+
+
+def upgrade():
+    # só o SQLite muda: as linhas do índice passam a ser localizadas pelo rowid
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    remover_indice(op.get_bind())
+    criar_indice(op.get_bind())
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    remover_indice(op.get_bind())
+    for comando in _SQLITE_DDL_ANTERIOR:
+        op.execute(sa.text(comando))
@@ -0,0 +1,30 @@
+"""indices de paginacao dos filmes
+
+Revision ID: b8e4c0d7a2f1
+Revises: 9d3f6b2a7c15
+Create Date: 2026-10-18 21:40:12.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4c0d7a2f1'
+down_revision = '9d3f6b2a7c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # fora do modo batch: no SQLite ele recriaria a tabela e perderia os
+    # gatilhos da busca textual
+    op.create_index('ix_filmes_titulo_nacional_id', 'filmes', ['titulo_nacional', 'id'], unique=False)
+    op.create_index('ix_filmes_titulo_original_id', 'filmes', ['titulo_original', 'id'], unique=False)
+    op.create_index('ix_filmes_ano_lancamento_id', 'filmes', ['ano_lancamento', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_filmes_ano_lancamento_id', table_name='filmes')
+    op.drop_index('ix_filmes_titulo_original_id', table_name='filmes')
+    op.drop_index('ix_filmes_titulo_nacional_id', table_name='filmes')
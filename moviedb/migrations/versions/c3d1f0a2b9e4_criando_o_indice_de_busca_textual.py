@@ -0,0 +1,28 @@
+"""criando o indice de busca textual
+
+Revision ID: c3d1f0a2b9e4
+Revises: 4b517cc2942b
+Create Date: 2026-10-18 21:05:12.417310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from moviedb.infra.busca import criar_indice, remover_indice
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d1f0a2b9e4'
+down_revision = '4b517cc2942b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # cria a tabela FTS5 (SQLite) ou o índice GIN (PostgreSQL) e indexa os
+    # filmes já cadastrados
+    criar_indice(op.get_bind())
+
+
+def downgrade():
+    remover_indice(op.get_bind())
@@ -1,2 +1,3 @@
-from moviedb.models.autenticacao import User
-from moviedb.models.filmes import Filme
\ No newline at end of file
+from moviedb.models.autenticacao import User, TokenUtilizado
+from moviedb.models.filmes import Filme
+from moviedb.models.emails import MensagemEmail
@@ -1,17 +1,25 @@
+import functools
+import secrets
 import uuid
 
 from flask import current_app
 from flask_login import UserMixin
-from sqlalchemy import Column, Uuid, String, Boolean, select, func, DateTime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import Column, Uuid, String, Boolean, Integer, select, func, DateTime
 
 from moviedb.models.mixins import BasicRepositoryMixin
 from moviedb import db
+from moviedb.infra.modulos import password_hasher
 
+@functools.lru_cache(maxsize=4096)
 def normalizar_email(email: str) -> str:
     """
     Normaliza um endereço de e-mail utilizando a biblioteca email_validator.
 
+    O resultado é memorizado em um cache LRU limitado, de forma que o mesmo
+    endereço é validado uma única vez mesmo quando passa pelos validadores do
+    formulário, por `User.get_by_email` e pelo setter `User.email` na mesma
+    requisição. Endereços inválidos não são armazenados no cache.
+
     Args:
         email (str): Endereço de e-mail a ser normalizado.
 
@@ -35,6 +43,8 @@ class User(db.Model, BasicRepositoryMixin, UserMixin):
     nome = Column(String(60), nullable=False)
     email_normalizado = Column(String(255), nullable=False, unique=True)
     password_hash = Column(String(255), nullable=False)
+    # identifica as sessões do usuário (veja `get_id`); trocado junto com a senha
+    token_sessao = Column(String(32), nullable=False, default=lambda: secrets.token_hex(16))
     ativo = Column(Boolean, nullable=False, default=True)
     data_cadastro = Column(DateTime, server_default=func.now(), nullable=False)
 
@@ -52,13 +62,20 @@ class User(db.Model, BasicRepositoryMixin, UserMixin):
 
     @password.setter
     def password(self, value):
-        self.password_hash = generate_password_hash(value)
+        self.password_hash = password_hasher.hash(value)
+        # encerra as sessões abertas com a senha anterior
+        self.token_sessao = secrets.token_hex(16)
 
+    @property
     def is_active(self):
+        # propriedade, como em UserMixin: o Flask-Login a usa em login_user()
+        # e em is_authenticated
         return self.ativo
 
     def get_id(self):
-        return f"{str(self.id)}|{self.password[-15:]}"
+        # o token não depende do hash da senha: a atualização do hash no login
+        # (veja `check_password`) não encerra as outras sessões
+        return f"{str(self.id)}|{self.token_sessao}"
 
     @classmethod
     def get_by_email(cls, email):
@@ -68,33 +85,55 @@ class User(db.Model, BasicRepositoryMixin, UserMixin):
         ).scalar_one_or_none()
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """
+        Verifica a senha do usuário. Se ela estiver correta e o hash armazenado
+        usar parâmetros diferentes de PASSWORD_HASH_METHOD, o hash é atualizado;
+        cabe a quem chamou fazer o commit da sessão.
+
+        Args:
+            password (str): A senha em texto puro.
+
+        Returns:
+            True se a senha estiver correta, False caso contrário.
+        """
+        correta, novo_hash = password_hasher.verify_and_update(self.password_hash, password)
+        if novo_hash is not None:
+            self.password_hash = novo_hash
+        return correta
 
     def send_email(self,
                    subject: str,
                    body: str,) -> bool:
         """
-        Envia um e-mail para o usuário utilizando o serviço Postmark.
+        Coloca um e-mail para o usuário na fila de envio.
+
+        A mensagem é gravada junto com o próximo commit da sessão e enviada em
+        segundo plano pelos workers da fila (ver `moviedb.infra.email_queue`).
 
         Args:
             subject (str): Assunto do e-mail.
             body (str): Corpo do e-mail em texto simples.
 
         Returns:
-            True se conseguir enviar o e-mail, False caso contrário.
+            True se a mensagem foi colocada na fila.
         """
-        from postmarker.core import PostmarkClient
-        postmark = PostmarkClient(server_token=current_app.config["SERVER_TOKEN"])
-        conteudo = postmark.emails.Email(
-            From=current_app.config["EMAIL_SENDER"],
-            To=self.email,
-            Subject=subject,
-            TextBody=body
-        )
-        response = conteudo.send()
-        current_app.logger.debug(f"E-mail enviado para {self.email}")
-        current_app.logger.debug(f"Resposta: {response}")
-        if response["ErrorCode"] != 0:
-            current_app.logger.error(f"Erro ao enviar e-mail enviado para {self.email}: {response['Message']}")
-            return False
+        from moviedb.infra.modulos import email_queue
+        email_queue.enqueue(destinatario=self.email,
+                            assunto=subject,
+                            corpo=body)
+        current_app.logger.debug("E-mail para %s colocado na fila", self.email)
         return True
+
+
+class TokenUtilizado(db.Model):
+    """
+    Identificador (`jti`) de um token de uso único já utilizado.
+
+    O registro é gravado na mesma transação da alteração que o token autoriza
+    e compartilhado por todos os workers; pode ser removido depois de `expira`
+    (epoch), quando o próprio token deixa de ser aceito.
+    """
+    __tablename__ = 'tokens_utilizados'
+
+    jti = Column(String(64), primary_key=True)
+    expira = Column(Integer(), nullable=False, index=True)
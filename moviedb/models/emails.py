@@ -0,0 +1,32 @@
+import uuid
+
+from sqlalchemy import Column, Uuid, String, Integer, Text, DateTime, Enum, Index, func
+
+from moviedb.models.enumeracoes import StatusEmail
+from moviedb.models.mixins import BasicRepositoryMixin
+from moviedb import db
+
+class MensagemEmail(db.Model, BasicRepositoryMixin):
+    """
+    Mensagem de e-mail aguardando (ou que já passou pelo) envio.
+
+    A tabela funciona como uma fila persistente: os handlers das requisições
+    apenas inserem as mensagens, que são enviadas posteriormente pelos workers
+    de `moviedb.infra.email_queue`.
+    """
+    __tablename__ = 'fila_emails'
+    __table_args__ = (
+        Index('ix_fila_emails_status_proxima_tentativa', 'status', 'proxima_tentativa'),
+    )
+
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    destinatario = Column(String(255), nullable=False)
+    assunto = Column(String(255), nullable=False)
+    corpo = Column(Text(), nullable=False)
+    status = Column(Enum(StatusEmail), nullable=False, default=StatusEmail.PENDENTE)
+    tentativas = Column(Integer(), nullable=False, default=0)
+    proxima_tentativa = Column(DateTime, nullable=False, server_default=func.now())
+    lote = Column(Uuid(as_uuid=True), nullable=True)
+    ultimo_erro = Column(Text())
+    data_cadastro = Column(DateTime, server_default=func.now(), nullable=False)
+    data_envio = Column(DateTime)
@@ -5,3 +5,10 @@ class JWTAction(Enum):
     NO_ACTION      = 0
     VALIDAR_EMAIL  = 1
     RESET_PASSWORD = 2
+
+
+class StatusEmail(Enum):
+    PENDENTE = 0
+    ENVIANDO = 1
+    ENVIADO  = 2
+    FALHOU   = 3
@@ -1,12 +1,19 @@
 import uuid
+from typing import List, Optional, Self
 
-from sqlalchemy import Column, Uuid, String, Integer, Boolean, Text, DECIMAL
+import sqlalchemy as sa
 
+from sqlalchemy import Column, Uuid, String, Integer, Boolean, Text, DECIMAL, UniqueConstraint, \
+    Index, func
+
+from moviedb.infra import busca
 from moviedb.models.mixins import BasicRepositoryMixin
 from moviedb import db
 
 class Filme(db .Model, BasicRepositoryMixin):
     __tablename__ = 'filmes'
+    # chave natural usada no upsert da importação em lote
+    NATURAL_KEY = ('titulo_original', 'ano_lancamento')
 
     id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
     titulo_original = Column(String(250), nullable=False)
@@ -18,4 +25,67 @@ class Filme(db .Model, BasicRepositoryMixin):
     orcamento = Column(DECIMAL)
     faturamento_lancamento = Column(DECIMAL(precision=2), default=0)
     poster_principal = Column(String(250))
-    link_trailer = Column(String(250))
\ No newline at end of file
+    link_trailer = Column(String(250))
+    # incrementada a cada alteração; usada nos ETags da API e no controle de concorrência
+    versao = Column(Integer(), nullable=False, default=1, server_default='1')
+
+    __table_args__ = (
+        UniqueConstraint(*NATURAL_KEY, name='uq_filmes_titulo_original_ano_lancamento'),
+        Index('ix_filmes_ano_lancamento_lancado', ano_lancamento, lancado),
+        # buscas por título sem diferenciar maiúsculas: WHERE lower(titulo) = lower(:x)
+        Index('ix_filmes_titulo_original_lower', func.lower(titulo_original)),
+        Index('ix_filmes_titulo_nacional_lower', func.lower(titulo_nacional)),
+        # paginação por cursor da API: ORDER BY coluna, id e (coluna, id) > (:v, :k)
+        Index('ix_filmes_titulo_nacional_id', titulo_nacional, id),
+        Index('ix_filmes_titulo_original_id', titulo_original, id),
+        Index('ix_filmes_ano_lancamento_id', ano_lancamento, id),
+    )
+    __mapper_args__ = {'version_id_col': versao}
+
+    @classmethod
+    def get_by_titulo(cls, titulo: str) -> List[Self]:
+        """
+        Obtém os filmes cujo título original ou nacional é igual a `titulo`, sem
+        diferenciar maiúsculas de minúsculas.
+        """
+        # a conversão é feita pelo banco nos dois lados: o str.lower() do Python
+        # não coincide com o lower() do SQLite (só ASCII) fora do ASCII
+        titulo = func.lower(sa.bindparam('titulo', titulo, type_=sa.String()))
+        return list(db.session.execute(
+            sa.select(cls).
+            where(sa.or_(func.lower(cls.titulo_original) == titulo,
+                         func.lower(cls.titulo_nacional) == titulo))
+        ).scalars().all())
+
+    @classmethod
+    def listar_por_ano(cls, ano: int, lancado: Optional[bool] = None) -> List[Self]:
+        """
+        Obtém os filmes de um ano de lançamento, opcionalmente filtrando pela
+        situação de lançamento.
+        """
+        stmt = sa.select(cls).where(cls.ano_lancamento == ano)
+        if lancado is not None:
+            stmt = stmt.where(cls.lancado == lancado)
+        return list(db.session.execute(stmt.order_by(cls.titulo_nacional)).scalars().all())
+
+    @classmethod
+    def buscar(cls, texto: str, limite: int = 20, deslocamento: int = 0) -> List[Self]:
+        """
+        Busca filmes pelos títulos e pela sinopse, ignorando acentos e ordenando
+        pela relevância. Veja `moviedb.infra.busca`.
+
+        Args:
+            texto: O texto digitado pelo usuário.
+            limite: Quantidade máxima de resultados.
+            deslocamento: Quantidade de resultados a pular.
+
+        Returns:
+            A lista de filmes encontrados.
+        """
+        stmt = busca.buscar(cls, texto, limite, deslocamento)
+        if stmt is None:
+            return []
+        return list(db.session.execute(stmt).scalars().all())
+
+
+busca.registrar_eventos(Filme.__table__)
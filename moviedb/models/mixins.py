@@ -1,27 +1,222 @@
 import uuid
-from typing import Optional, Self
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional, Self
 
 import sqlalchemy as sa
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
 
 from moviedb import db
 
 
+@dataclass
+class CursorPage:
+    """
+    Uma página de resultados da paginação por cursor.
+
+    Os cursores são opacos e assinados com a SECRET_KEY da aplicação; devem ser
+    repassados sem alteração a `paginate()` para obter a página seguinte ou a
+    anterior.
+    """
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def _encode_value(valor: Any) -> Any:
+    if isinstance(valor, uuid.UUID):
+        return {'u': str(valor)}
+    if isinstance(valor, Decimal):
+        return {'d': str(valor)}
+    if isinstance(valor, datetime):
+        return {'t': valor.isoformat()}
+    if isinstance(valor, date):
+        return {'D': valor.isoformat()}
+    return valor
+
+
+def _decode_value(valor: Any) -> Any:
+    if not isinstance(valor, dict):
+        return valor
+    tipo, texto = next(iter(valor.items()))
+    return {'u': uuid.UUID,
+            'd': Decimal,
+            't': datetime.fromisoformat,
+            'D': date.fromisoformat}[tipo](texto)
+
+
 class BasicRepositoryMixin:
 
+    CURSOR_SALT = 'moviedb-cursor-paginacao'
+
     @classmethod
     def is_empty(cls) -> bool:
-        return not db.session.execute(sa.select(cls).limit(1)).scalar_one_or_none()
+        return not cls.exists()
+
+    @classmethod
+    def exists(cls, *filters: Any) -> bool:
+        """
+        Verifica se existe algum registro que satisfaça as condições, com um
+        `SELECT EXISTS`, sem carregar nenhuma entidade.
+
+        Args:
+            *filters: Condições aplicadas à consulta (opcional).
+
+        Returns:
+            True se existir ao menos um registro.
+        """
+        subconsulta = sa.select(sa.literal(1)).select_from(cls).where(*filters)
+        return bool(db.session.scalar(sa.select(subconsulta.exists())))
+
+    @classmethod
+    def count(cls, *filters: Any, approximate: bool = False) -> int:
+        """
+        Conta os registros que satisfazem as condições, com um `SELECT COUNT(*)`.
+
+        Args:
+            *filters: Condições aplicadas à consulta (opcional).
+            approximate: Se True e não houver condições, usa a contagem mantida
+                em cache por `RowCountCache`, que pode estar levemente
+                desatualizada em relação a outros processos. Uma contagem feita
+                com alterações pendentes na sessão não é guardada no cache.
+
+        Returns:
+            A quantidade de registros.
+        """
+        stmt = sa.select(sa.func.count()).select_from(cls).where(*filters)
+        if not approximate or filters:
+            return db.session.scalar(stmt)
+
+        from moviedb.infra.modulos import row_counts
+
+        tabela = sa.inspect(cls).local_table.name
+        quantidade = row_counts.get(tabela)
+        if quantidade is None:
+            if not row_counts.can_populate(db.session):
+                return db.session.scalar(stmt)
+            quantidade = row_counts.put(tabela, db.session.scalar(stmt))
+        return quantidade
 
     @classmethod
-    def get_by_id(cls, cls_id) -> Optional[Self] | None:
+    def get_by_id(cls, cls_id, options: Iterable[Any] = ()) -> Optional[Self] | None:
         try:
             obj_id = uuid.UUID(str(cls_id))
         except ValueError:
             obj_id = cls_id
 
-        return db.session.get(cls, obj_id)
+        return db.session.get(cls, obj_id, options=list(options))
+
+    @classmethod
+    def paginate(cls,
+                 order_by: str = 'id',
+                 descending: bool = False,
+                 per_page: int = 20,
+                 cursor: Optional[str] = None,
+                 filters: Iterable[Any] = (),
+                 options: Iterable[Any] = ()) -> CursorPage:
+        """
+        Pagina os registros por cursor (keyset), em vez de OFFSET.
+
+        A ordenação é feita pela coluna `order_by` e, para desempate, pela chave
+        primária. Cada página é obtida com uma condição `(coluna, id) > (valor, id)`,
+        que usa o índice da coluna (quando existir) e tem custo independente da
+        profundidade da página.
+
+        Args:
+            order_by: Nome da coluna de ordenação; deve ser NOT NULL.
+            descending: Se True, ordena de forma decrescente.
+            per_page: Quantidade de registros por página.
+            cursor: Cursor obtido de uma página anterior (`next_cursor` ou
+                `prev_cursor`), ou None para a primeira página.
+            filters: Condições adicionais aplicadas à consulta.
+            options: Opções de carga do ORM (por exemplo, `load_only`).
+
+        Returns:
+            Um `CursorPage` com os registros e os cursores de navegação.
+
+        Raises:
+            ValueError: Se a coluna não existir, aceitar nulos, ou se o cursor for
+                inválido ou pertencer a outra ordenação.
+        """
+        coluna = cls._paginate_column(order_by)
+        chave = sa.inspect(cls).primary_key[0]
 
+        para_tras = False
+        condicoes = list(filters)
+        if cursor is not None:
+            dados = cls._decode_cursor(cursor)
+            if dados.get('c') != order_by or dados.get('o') != bool(descending):
+                raise ValueError("Cursor não corresponde à ordenação solicitada")
+            para_tras = dados.get('b', False)
+            posicao = sa.tuple_(coluna, chave)
+            valores = sa.tuple_(sa.literal(_decode_value(dados['v']), coluna.type),
+                                sa.literal(_decode_value(dados['k']), chave.type))
+            # andar para frente em ordem decrescente equivale a andar para trás
+            # em ordem crescente
+            if para_tras != bool(descending):
+                condicoes.append(posicao < valores)
+            else:
+                condicoes.append(posicao > valores)
 
+        inverter = para_tras != bool(descending)
+        ordem = [coluna.desc(), chave.desc()] if inverter else [coluna.asc(), chave.asc()]
+        stmt = sa.select(cls).options(*options).where(*condicoes).order_by(*ordem).limit(per_page + 1)
+        itens = list(db.session.execute(stmt).scalars().all())
 
+        mais = len(itens) > per_page
+        itens = itens[:per_page]
+        if para_tras:
+            itens.reverse()
 
+        pagina = CursorPage(items=itens)
+        if not itens:
+            return pagina
+        if mais or para_tras:
+            pagina.next_cursor = cls._encode_cursor(itens[-1], order_by, descending, False)
+        if (mais and para_tras) or (cursor is not None and not para_tras):
+            pagina.prev_cursor = cls._encode_cursor(itens[0], order_by, descending, True)
+        return pagina
 
+    @classmethod
+    def _paginate_column(cls, order_by: str):
+        coluna = sa.inspect(cls).columns.get(order_by)
+        if coluna is None:
+            raise ValueError(f"Coluna de ordenação inexistente: '{order_by}'")
+        if coluna.nullable:
+            raise ValueError(f"A coluna de ordenação '{order_by}' aceita nulos")
+        return getattr(cls, order_by)
+
+    @classmethod
+    def _cursor_serializer(cls) -> URLSafeSerializer:
+        return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=cls.CURSOR_SALT)
+
+    @classmethod
+    def _encode_cursor(cls, obj: Any, order_by: str, descending: bool, para_tras: bool) -> str:
+        chave = sa.inspect(cls).primary_key[0]
+        return cls._cursor_serializer().dumps({
+            'c': order_by,
+            'o': bool(descending),
+            'b': para_tras,
+            'v': _encode_value(getattr(obj, order_by)),
+            'k': _encode_value(getattr(obj, chave.key)),
+        })
+
+    @classmethod
+    def _decode_cursor(cls, cursor: str) -> dict:
+        try:
+            dados = cls._cursor_serializer().loads(cursor)
+        except BadSignature:
+            raise ValueError("Cursor inválido")
+        if not isinstance(dados, dict) or not {'c', 'o', 'v', 'k'}.issubset(dados):
+            raise ValueError("Cursor inválido")
+        return dados
@@ -0,0 +1,71 @@
+"""
+Fixtures dos testes. Cada teste recebe uma aplicação própria, criada com
+`create_app` sobre um banco SQLite em um diretório temporário, sem threads nem
+processos auxiliares (fila de e-mails, hash de senhas e miniaturas rodam na
+própria thread).
+"""
+import json
+import uuid
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def criar_app(tmp_path):
+    """
+    Fábrica de aplicações: `criar_app(**configuracao)` sobrepõe a configuração
+    padrão dos testes.
+    """
+    from moviedb import create_app
+
+    def criar(**configuracao):
+        arquivo = tmp_path / f"config-{uuid.uuid4().hex}.json"
+        arquivo.write_text(json.dumps({
+            'SECRET_KEY': 'testes',
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'moviedb.db'}",
+            'APP_NAME': 'MovieDB',
+            'APP_BASE_URL': 'http://localhost',
+            'EMAIL_SENDER': 'testes@example.com',
+            'EMAIL_TRANSPORT': 'fake',
+            'EMAIL_WORKER_THREADS': 0,
+            'PASSWORD_HASH_WORKERS': 0,
+            'POSTER_WORKERS': 0,
+            'POSTER_STORAGE_DIR': str(tmp_path / 'posters'),
+            'RATE_LIMIT_STORAGE': str(tmp_path / 'rate_limit.db'),
+            'STATIC_ASSETS_ENABLED': False,
+            'TEMPLATE_BYTECODE_CACHE': False,
+            'WTF_CSRF_ENABLED': False,
+            'LOG_LEVEL': 'WARNING',
+            **configuracao}))
+        return create_app(str(arquivo))
+
+    return criar
+
+
+@pytest.fixture
+def app(criar_app):
+    return criar_app()
+
+
+@pytest.fixture
+def popular():
+    """
+    Função que cria as tabelas e insere `quantidade` filmes ("Filme 0", ...),
+    dentro do contexto da aplicação.
+    """
+    def inserir(quantidade: int) -> None:
+        from moviedb import db
+        from moviedb.models import Filme
+
+        # só o banco principal: as réplicas registradas por outras aplicações
+        # do processo continuam na extensão
+        db.create_all(bind_key=None)
+        if quantidade:
+            db.session.execute(sa.insert(Filme), [
+                {'id': uuid.uuid4(), 'titulo_original': f"Filme {i}", 'titulo_nacional': f"Filme {i}",
+                 'ano_lancamento': 1950 + i % 75, 'lancado': True, 'duracao': 90}
+                for i in range(quantidade)])
+            db.session.commit()
+
+    return inserir
@@ -0,0 +1,56 @@
+"""
+API JSON dos filmes: erros, requisições condicionais e ETags das respostas
+comprimidas.
+"""
+import pytest
+
+
+@pytest.fixture
+def cliente(app, popular):
+    with app.app_context():
+        popular(30)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('url, status', [('/api/filmes?per_page=abc', 400),
+                                         ('/api/filmes?fields=nada', 400),
+                                         ('/api/inexistente', 404),
+                                         ('/api/filmes/123', 404)])
+def test_erros_em_json(cliente, url, status):
+    resposta = cliente.get(url)
+    assert resposta.status_code == status
+    assert resposta.is_json and set(resposta.json) == {'erro', 'mensagem'}
+
+
+def test_erro_em_json_mantem_os_cabecalhos(cliente):
+    resposta = cliente.post('/api/filmes')
+    assert resposta.status_code == 405 and resposta.is_json
+    assert set(resposta.headers['Allow'].split(', ')) == {'GET', 'HEAD', 'OPTIONS'}
+
+
+def test_erros_fora_da_api_continuam_em_html(cliente):
+    resposta = cliente.get('/inexistente')
+    assert resposta.status_code == 404 and resposta.mimetype == 'text/html'
+
+
+@pytest.mark.parametrize('codificacao', ['gzip', 'br', None])
+def test_etag_forte_por_codificacao(cliente, codificacao):
+    cabecalhos = {'Accept-Encoding': codificacao} if codificacao else {}
+    resposta = cliente.get('/api/filmes', headers=cabecalhos)
+    etag, fraco = resposta.get_etag()
+    assert not fraco
+    assert resposta.headers.get('Content-Encoding') == codificacao
+    assert etag.endswith(f"-{codificacao}") == (codificacao is not None)
+
+    condicional = cliente.get('/api/filmes', headers={**cabecalhos, 'If-None-Match': f'"{etag}"'})
+    assert condicional.status_code == 304
+    assert condicional.get_etag() == (etag, False)
+
+
+def test_ordenacoes_tem_indice_com_desempate_pelo_id():
+    from moviedb.blueprints.api import ORDENACOES
+    from moviedb.models import Filme
+
+    indices = {tuple(coluna.name for coluna in indice.columns) for indice in Filme.__table__.indexes}
+    for ordem in ORDENACOES:
+        assert ordem == 'id' or (ordem, 'id') in indices, ordem
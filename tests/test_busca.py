@@ -0,0 +1,59 @@
+"""
+Busca textual (`moviedb.infra.busca`): sincronização do índice FTS5 com a
+tabela `filmes` e ordenação por relevância.
+"""
+import sqlalchemy as sa
+
+
+def test_indice_acompanha_insercao_alteracao_e_remocao(app, popular):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(20)
+        filme = Filme(titulo_original="Central do Brasil", titulo_nacional="Central do Brasil",
+                      ano_lancamento=1998, lancado=True, duracao=113)
+        db.session.add(filme)
+        db.session.commit()
+        assert Filme.buscar("central") == [filme]
+
+        filme.titulo_nacional = "Estação Central"
+        db.session.commit()
+        assert Filme.buscar("estacao") == [filme]
+
+        db.session.delete(filme)
+        db.session.commit()
+        assert Filme.buscar("central") == []
+        assert db.session.execute(sa.text("SELECT count(*) FROM filmes_fts")).scalar_one() == 20
+        assert db.session.execute(sa.text("SELECT count(*) FROM filmes_fts_ids")).scalar_one() == 20
+
+
+def test_indice_sobrevive_ao_vacuum(app, popular):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(200)
+        db.session.execute(sa.delete(Filme).where(Filme.titulo_original.like("Filme 1%")))
+        db.session.commit()
+        with db.engine.connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').exec_driver_sql('VACUUM')
+        assert [filme.titulo_original for filme in Filme.buscar("Filme 42")] == ["Filme 42"]
+
+
+def test_titulos_pesam_mais_que_a_sinopse_e_acentos_sao_ignorados(app, popular):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(10)
+        na_sinopse = Filme(titulo_original="Outro", titulo_nacional="Outro", ano_lancamento=2001,
+                           lancado=True, duracao=90, sinopse="Um coração partido")
+        no_titulo = Filme(titulo_original="Coração", titulo_nacional="Coração", ano_lancamento=2002,
+                          lancado=True, duracao=90)
+        db.session.add_all([na_sinopse, no_titulo])
+        db.session.commit()
+
+        assert Filme.buscar("coracao") == [no_titulo, na_sinopse]
+        # a última palavra é tratada como prefixo
+        assert Filme.buscar("cora") == [no_titulo, na_sinopse]
@@ -0,0 +1,73 @@
+"""
+Importação do catálogo com upsert pela chave natural (`moviedb.infra.catalogo`).
+"""
+import io
+
+import sqlalchemy as sa
+
+
+def _importar(texto: str, formato: str = 'csv', tamanho_lote: int = 100):
+    from moviedb.infra.catalogo import importar_filmes
+
+    erros = []
+    resultado = importar_filmes(io.StringIO(texto), formato, tamanho_lote,
+                                relatar_erro=lambda numero, mensagem: erros.append(numero))
+    return resultado, erros
+
+
+def _filmes():
+    from moviedb import db
+    from moviedb.models import Filme
+
+    db.session.expire_all()
+    return {(f.titulo_original, f.ano_lancamento): f
+            for f in db.session.execute(sa.select(Filme)).scalars()}
+
+
+def test_reimportacao_atualiza_pela_chave_natural(app, popular):
+    with app.app_context():
+        popular(0)
+        resultado, erros = _importar(
+            "titulo_original,titulo_nacional,ano_lancamento,lancado,duracao,sinopse\n"
+            "Cidade de Deus,Cidade de Deus,2002,sim,130,Rio\n"
+            "Central do Brasil,Central do Brasil,1998,sim,113,\n"
+            "Sem Ano,Sem Ano,,sim,90,\n")
+        assert (resultado['lidas'], resultado['gravadas'], resultado['invalidas']) == (3, 2, 1)
+        assert erros == [4]
+        original = _filmes()[("Cidade de Deus", 2002)]
+        assert (original.versao, original.sinopse) == (1, "Rio")
+
+        _importar("titulo_original,titulo_nacional,ano_lancamento,lancado,duracao,sinopse\n"
+                  "Cidade de Deus,City of God,2002,sim,130,Rio de Janeiro\n")
+        filmes = _filmes()
+        assert len(filmes) == 2
+        atualizado = filmes[("Cidade de Deus", 2002)]
+        assert atualizado.id == original.id
+        assert (atualizado.titulo_nacional, atualizado.sinopse, atualizado.versao) == \
+            ("City of God", "Rio de Janeiro", 2)
+
+
+def test_colunas_ausentes_nao_sao_apagadas(app, popular):
+    with app.app_context():
+        popular(0)
+        _importar('{"titulo_original": "Cidade de Deus", "titulo_nacional": "Cidade de Deus", '
+                  '"ano_lancamento": 2002, "lancado": true, "duracao": 130, "sinopse": "Rio", '
+                  '"orcamento": 3300000}\n', formato='ndjson')
+        # só a duração é informada: sinopse e orçamento continuam como estavam
+        _importar('{"titulo_original": "Cidade de Deus", "titulo_nacional": "Cidade de Deus", '
+                  '"ano_lancamento": 2002, "lancado": true, "duracao": 135}\n', formato='ndjson')
+        filme = _filmes()[("Cidade de Deus", 2002)]
+        assert (filme.duracao, filme.sinopse, filme.orcamento, filme.versao) == (135, "Rio", 3300000, 2)
+
+
+def test_linhas_repetidas_no_lote_sao_combinadas(app, popular):
+    with app.app_context():
+        popular(0)
+        resultado, _ = _importar(
+            '{"titulo_original": "Cidade de Deus", "titulo_nacional": "Cidade de Deus", '
+            '"ano_lancamento": 2002, "lancado": true, "duracao": 130, "sinopse": "Rio"}\n'
+            '{"titulo_original": "Cidade de Deus", "titulo_nacional": "City of God", '
+            '"ano_lancamento": 2002, "lancado": true, "duracao": 135}\n', formato='ndjson')
+        assert resultado['gravadas'] == 1
+        filme = _filmes()[("Cidade de Deus", 2002)]
+        assert (filme.titulo_nacional, filme.duracao, filme.sinopse) == ("City of God", 135, "Rio")
@@ -0,0 +1,101 @@
+"""
+Fila persistente de e-mails (`moviedb.infra.email_queue`), processada na
+própria thread do teste com o transporte em memória.
+"""
+from datetime import timedelta
+
+import pytest
+import sqlalchemy as sa
+
+from moviedb.infra.email_queue import EmailTransport
+
+
+class TransporteComFalha(EmailTransport):
+    def __init__(self, erro: str):
+        self.erro = erro
+        self.lotes = 0
+
+    def send_batch(self, mensagens):
+        self.lotes += 1
+        return [self.erro] * len(mensagens)
+
+
+@pytest.fixture
+def fila(app):
+    from moviedb import db
+    from moviedb.infra.modulos import email_queue
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield email_queue
+
+
+def _mensagens():
+    from moviedb import db
+    from moviedb.models.emails import MensagemEmail
+
+    db.session.expire_all()
+    return db.session.execute(sa.select(MensagemEmail)).scalars().all()
+
+
+def test_mensagem_so_e_gravada_no_commit_e_enviada_em_lote(fila):
+    from moviedb import db
+    from moviedb.models.enumeracoes import StatusEmail
+
+    fila.enqueue("fulano@example.com", "Assunto", "Corpo")
+    db.session.rollback()
+    assert _mensagens() == [] and fila.process_batch() == 0
+
+    for i in range(3):
+        fila.enqueue(f"fulano{i}@example.com", "Assunto", "Corpo")
+    db.session.commit()
+
+    assert fila.process_batch() == 3
+    assert sorted(m['To'] for m in fila.transport.outbox) == \
+        ["fulano0@example.com", "fulano1@example.com", "fulano2@example.com"]
+    assert {m.status for m in _mensagens()} == {StatusEmail.ENVIADO}
+    assert fila.process_batch() == 0
+
+
+def test_falhas_sao_reagendadas_ate_o_limite_de_tentativas(fila, monkeypatch):
+    from moviedb import db
+    from moviedb.infra import email_queue
+    from moviedb.models.enumeracoes import StatusEmail
+
+    monkeypatch.setattr(fila, 'transport', TransporteComFalha("caixa cheia"))
+    monkeypatch.setattr(fila, 'max_attempts', 2)
+    fila.enqueue("fulano@example.com", "Assunto", "Corpo")
+    db.session.commit()
+
+    assert fila.process_batch() == 1
+    [mensagem] = _mensagens()
+    assert (mensagem.status, mensagem.tentativas, mensagem.ultimo_erro) == \
+        (StatusEmail.PENDENTE, 1, "caixa cheia")
+    assert mensagem.proxima_tentativa > email_queue.agora_utc()
+    assert fila.process_batch() == 0
+
+    # passado o backoff, a mensagem volta a ser enviada
+    mensagem.proxima_tentativa = email_queue.agora_utc() - timedelta(seconds=1)
+    db.session.commit()
+    assert fila.process_batch() == 1
+    [mensagem] = _mensagens()
+    assert (mensagem.status, mensagem.tentativas) == (StatusEmail.FALHOU, 2)
+    assert fila.transport.lotes == 2
+
+
+def test_mensagem_presa_em_envio_e_retomada_apos_o_prazo(fila):
+    from moviedb import db
+    from moviedb.infra import email_queue
+    from moviedb.models.enumeracoes import StatusEmail
+
+    fila.enqueue("fulano@example.com", "Assunto", "Corpo")
+    db.session.commit()
+    # reserva o lote, como um worker que morre antes de enviar
+    [reservada] = fila._claim_batch()
+    assert reservada.status == StatusEmail.ENVIANDO
+    assert fila.process_batch() == 0
+
+    reservada.proxima_tentativa = email_queue.agora_utc() - timedelta(seconds=1)
+    db.session.commit()
+    assert fila.process_batch() == 1
+    assert [m.status for m in _mensagens()] == [StatusEmail.ENVIADO]
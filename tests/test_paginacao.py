@@ -0,0 +1,52 @@
+"""
+Paginação por cursor (`BasicRepositoryMixin.paginate`).
+"""
+import pytest
+import sqlalchemy as sa
+
+
+def test_percorre_todas_as_paginas_na_ordem(app, popular):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(95)
+        esperados = db.session.execute(sa.select(Filme.id).order_by(Filme.id)).scalars().all()
+
+        vistos, cursor = [], None
+        while True:
+            pagina = Filme.paginate(per_page=20, cursor=cursor)
+            vistos += [filme.id for filme in pagina.items]
+            cursor = pagina.next_cursor
+            if cursor is None:
+                break
+
+        assert vistos == esperados
+
+
+def test_volta_para_a_pagina_anterior(app, popular):
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(50)
+        primeira = Filme.paginate(order_by='titulo_nacional', descending=True, per_page=10)
+        segunda = Filme.paginate(order_by='titulo_nacional', descending=True, per_page=10,
+                                 cursor=primeira.next_cursor)
+        anterior = Filme.paginate(order_by='titulo_nacional', descending=True, per_page=10,
+                                  cursor=segunda.prev_cursor)
+
+        titulos = [filme.titulo_nacional for filme in primeira.items + segunda.items]
+        assert titulos == sorted(titulos, reverse=True)
+        assert [filme.id for filme in anterior.items] == [filme.id for filme in primeira.items]
+
+
+@pytest.mark.parametrize('cursor', ['invalido', None])
+def test_recusa_cursor_invalido_ou_de_outra_ordenacao(app, popular, cursor):
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(30)
+        if cursor is None:
+            cursor = Filme.paginate(order_by='id', per_page=10).next_cursor
+        with pytest.raises(ValueError):
+            Filme.paginate(order_by='titulo_nacional', per_page=10, cursor=cursor)
@@ -0,0 +1,92 @@
+"""
+Hashing de senhas (`moviedb.infra.password_hashing`): pool de processos, limite
+da fila e atualização do hash no login.
+"""
+import pytest
+
+EMAIL = 'fulano@example.com'
+SENHA = 'senha-dos-testes'
+
+
+def test_hash_no_pool_de_processos(criar_app):
+    from moviedb.infra.modulos import password_hasher
+
+    criar_app(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_METHOD='pbkdf2:sha256:1000')
+    password_hash = password_hasher.hash(SENHA)
+    assert password_hash.startswith('pbkdf2:sha256:1000$')
+    assert password_hasher.verify(password_hash, SENHA)
+    assert not password_hasher.verify(password_hash, 'outra senha')
+    assert password_hasher.stats()['hashes'] >= 3
+
+
+def test_fila_cheia_rejeita_com_503(criar_app):
+    from moviedb import db
+    from moviedb.infra.modulos import password_hasher
+    from moviedb.infra.password_hashing import PasswordHashingBusy
+
+    app = criar_app(PASSWORD_HASH_QUEUE_SIZE=1, PASSWORD_HASH_QUEUE_TIMEOUT=0.01)
+    with app.app_context():
+        db.create_all(bind_key=None)
+    rejeitadas = password_hasher.stats()['rejected']
+    # ocupa a única vaga, como um hash em andamento
+    password_hasher._slots.acquire()
+    try:
+        with pytest.raises(PasswordHashingBusy):
+            password_hasher.hash(SENHA)
+        resposta = app.test_client().post('/auth/register', data={
+            'nome': 'Fulano', 'email': EMAIL, 'password': SENHA, 'password2': SENHA})
+    finally:
+        password_hasher._slots.release()
+    assert resposta.status_code == 503 and resposta.headers['Retry-After'] == '5'
+    assert password_hasher.stats()['rejected'] == rejeitadas + 2
+
+
+def test_login_atualiza_hash_com_parametros_antigos(criar_app):
+    from moviedb import db
+    from moviedb.infra.modulos import password_hasher
+    from moviedb.models import User
+
+    antigo = criar_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000')
+    with antigo.app_context():
+        db.create_all(bind_key=None)
+        usuario = User(nome='Fulano', email=EMAIL, password=SENHA)
+        db.session.add(usuario)
+        db.session.commit()
+
+    app = criar_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:2000')
+    resposta = app.test_client().post('/auth/login', data={'email': EMAIL, 'password': SENHA})
+    assert resposta.status_code == 200
+    with app.app_context():
+        password_hash = User.get_by_email(EMAIL).password_hash
+    assert password_hash.startswith('pbkdf2:sha256:2000$')
+    assert not password_hasher.needs_rehash(password_hash)
+
+
+def test_sessoes_sobrevivem_a_atualizacao_do_hash_mas_nao_a_troca_de_senha(criar_app):
+    from moviedb import db
+    from moviedb.infra.modulos import user_cache
+    from moviedb.models import User
+
+    antigo = criar_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000')
+    with antigo.app_context():
+        db.create_all(bind_key=None)
+        usuario = User(nome='Fulano', email=EMAIL, password=SENHA)
+        db.session.add(usuario)
+        db.session.commit()
+        sessao_aberta = usuario.get_id()
+
+    app = criar_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:2000')
+    assert app.test_client().post('/auth/login', data={'email': EMAIL, 'password': SENHA}).status_code == 200
+
+    def carregar(id_login):
+        user_cache.clear()
+        with app.test_request_context('/'):
+            return app.login_manager._user_callback(id_login)
+
+    assert carregar(sessao_aberta) is not None
+    with app.app_context():
+        usuario = User.get_by_email(EMAIL)
+        assert usuario.password_hash.startswith('pbkdf2:sha256:2000$')
+        usuario.password = 'outra-senha'
+        db.session.commit()
+    assert carregar(sessao_aberta) is None
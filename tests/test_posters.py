@@ -0,0 +1,85 @@
+"""
+Pôsteres e miniaturas (`moviedb.infra.posters`) e a rota que as serve.
+"""
+import io
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+
+def _imagem(largura: int = 800, altura: int = 1200, cor=(200, 30, 30)) -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (largura, altura), cor).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def store(app):
+    from moviedb.infra.modulos import poster_store
+
+    with app.app_context():
+        yield poster_store
+
+
+def test_ingestao_gera_todas_as_miniaturas_sem_ampliar(store):
+    from PIL import Image
+
+    digest = store.ingerir(_imagem(largura=400, altura=600))
+    assert store.digests() == [digest]
+    for largura in store.larguras:
+        for formato in store.formatos:
+            with Image.open(store.caminho_miniatura(digest, largura, formato)) as miniatura:
+                assert miniatura.format == formato.upper()
+                assert miniatura.width == min(largura, 400)
+
+    # o mesmo conteúdo tem o mesmo endereço e não é processado de novo
+    assert store.ingerir(_imagem(largura=400, altura=600)) == digest
+    assert store.gerar([digest]) == 0
+
+
+def test_arquivo_que_nao_e_imagem_e_recusado(store):
+    from moviedb.infra.posters import PosterInvalido
+
+    with pytest.raises(PosterInvalido):
+        store.ingerir(b"isto nao e uma imagem")
+    assert store.digests() == []
+
+
+def test_rota_gera_miniatura_ausente_e_serve_como_imutavel(app, store):
+    digest = store.ingerir(_imagem())
+    caminho = store.caminho_miniatura(digest, 320, 'webp')
+    os.unlink(caminho)
+
+    cliente = app.test_client()
+    resposta = cliente.get(f"/posters/{digest}/320.webp")
+    assert resposta.status_code == 200 and resposta.mimetype == 'image/webp'
+    assert resposta.cache_control.immutable and resposta.cache_control.max_age == 365 * 24 * 3600
+    assert os.path.exists(caminho)
+
+    for url in (f"/posters/{digest}/321.webp", f"/posters/{digest}/320.png", f"/posters/{'0' * 64}/320.jpg"):
+        assert cliente.get(url).status_code == 404
+
+
+class PoolQuebrado:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("processo do pool terminou")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_pool_quebrado_gera_na_propria_thread(store, monkeypatch):
+    pool = PoolQuebrado()
+    monkeypatch.setattr(store, 'workers', 1)
+    monkeypatch.setattr(store, '_pool', pool)
+    monkeypatch.setattr(store, '_pool_pid', os.getpid())
+
+    digest = store.ingerir(_imagem())
+    assert store.gerar([digest]) == 0
+    assert all(os.path.exists(store.caminho_miniatura(digest, largura, formato))
+               for largura in store.larguras for formato in store.formatos)
+    # o pool quebrado é descartado, para ser recriado na próxima chamada
+    assert store._pool is not pool
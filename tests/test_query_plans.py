@@ -0,0 +1,66 @@
+"""
+Planos de execução das consultas mais frequentes (`moviedb.infra.query_plans`)
+e uso dos índices de expressão pela busca por título.
+"""
+import uuid
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def banco_populado(app, popular):
+    from moviedb import db
+    from moviedb.models import User
+
+    with app.app_context():
+        popular(5000)
+        db.session.execute(sa.insert(User), [
+            {'id': uuid.uuid4(), 'nome': f"Usuário {i}", 'ativo': True,
+             'email_normalizado': f"usuario{i}@example.com", 'password_hash': '-'}
+            for i in range(100)])
+        db.session.commit()
+        db.session.execute(sa.text('ANALYZE'))
+        db.session.commit()
+    return app
+
+
+def test_consultas_quentes_sem_varredura_completa(banco_populado):
+    from moviedb.infra.query_plans import verificar_planos
+
+    planos = {}
+    with banco_populado.app_context():
+        falhas = verificar_planos(relatar=lambda nome, plano, varreduras: planos.update({nome: plano}))
+
+    assert falhas == {}
+    assert all(planos.values())
+    # os planos são os dos comandos realmente emitidos, com a ordenação por título
+    assert 'USE TEMP B-TREE FOR ORDER BY' in planos['Filme.listar_por_ano']
+
+
+def test_ordenacao_sem_indice_e_detectada(banco_populado):
+    from moviedb import db
+    from moviedb.infra.query_plans import verificar_planos
+
+    with banco_populado.app_context():
+        db.session.execute(sa.text('DROP INDEX ix_filmes_titulo_nacional_id'))
+        db.session.commit()
+        falhas = verificar_planos()
+
+    assert set(falhas) == {'Filme.paginate(titulo_nacional)', 'Filme.paginate(titulo_nacional, desc)',
+                           'Filme.paginate(titulo_nacional) com cursor',
+                           'Filme.paginate(titulo_nacional, desc) com cursor'}
+
+
+def test_get_by_titulo_ignora_maiusculas(app, popular):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(10)
+        db.session.add(Filme(titulo_original="Cidade de Deus", titulo_nacional="Cidade de Deus",
+                             ano_lancamento=2002, lancado=True, duracao=130))
+        db.session.commit()
+
+        assert [f.titulo_original for f in Filme.get_by_titulo("CIDADE DE DEUS")] == ["Cidade de Deus"]
+        assert Filme.get_by_titulo("Cidade") == []
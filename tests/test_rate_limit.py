@@ -0,0 +1,88 @@
+"""
+Limitação de taxa dos endpoints de autenticação (`moviedb.infra.rate_limit`).
+"""
+import pytest
+
+
+def test_balde_esvazia_e_e_reabastecido(tmp_path):
+    from moviedb.infra.rate_limit import SQLiteBucketStore
+
+    store = SQLiteBucketStore(str(tmp_path / 'baldes.db'))
+    # 2 fichas, repostas à razão de 1 a cada 10 segundos
+    assert store.consumir('k', 2, 0.1, agora=100) == (True, 0.0)
+    assert store.consumir('k', 2, 0.1, agora=100) == (True, 0.0)
+    permitido, espera = store.consumir('k', 2, 0.1, agora=101)
+    assert not permitido and espera == pytest.approx(9)
+    assert store.consumir('k', 2, 0.1, agora=110)[0]
+    assert store.consumir('outra', 2, 0.1, agora=110)[0]
+
+
+@pytest.fixture
+def cliente(criar_app):
+    from moviedb import db
+
+    app = criar_app(RATE_LIMIT_IP=[2, 60], RATE_LIMIT_EMAIL=[3, 300])
+    with app.app_context():
+        db.create_all(bind_key=None)
+    return app.test_client()
+
+
+def _login(cliente, email='fulano@example.com', ip='10.0.0.1', **cabecalhos):
+    return cliente.post('/auth/login', data={'email': email, 'password': 'senha'},
+                        environ_base={'REMOTE_ADDR': ip}, headers=cabecalhos)
+
+
+def test_submissoes_acima_do_limite_do_ip_recebem_429(cliente):
+    assert [_login(cliente, f"fulano{i}@example.com").status_code for i in range(3)] == [302, 302, 429]
+    resposta = _login(cliente, 'outro@example.com')
+    assert resposta.status_code == 429 and int(resposta.headers['Retry-After']) >= 1
+    # GET não é limitado, e outro IP tem o seu próprio balde
+    assert cliente.get('/auth/login', environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 200
+    assert _login(cliente, 'outro@example.com', ip='10.0.0.2').status_code == 302
+
+
+def test_limite_por_email_vale_para_todos_os_ips(cliente):
+    codigos = [_login(cliente, 'Fulano@Example.com', ip=f"10.0.0.{i}").status_code for i in range(4)]
+    assert codigos == [302, 302, 302, 429]
+
+
+@pytest.mark.parametrize('encaminhado, esperado', [
+    ('203.0.113.7', '203.0.113.7'),
+    ('1.2.3.4, 203.0.113.7', '203.0.113.7'),
+    ('', '10.0.0.1'),
+])
+def test_ip_do_cliente_atras_de_proxy(criar_app, encaminhado, esperado):
+    from moviedb.infra.modulos import rate_limiter
+
+    app = criar_app(RATE_LIMIT_TRUSTED_PROXIES=1)
+    with app.test_request_context(environ_base={'REMOTE_ADDR': '10.0.0.1'},
+                                  headers={'X-Forwarded-For': encaminhado}):
+        assert rate_limiter.ip_do_cliente() == esperado
+
+
+def test_requisicao_recusada_nao_consome_os_outros_baldes(criar_app):
+    from moviedb import db
+
+    app = criar_app(RATE_LIMIT_IP=[2, 60], RATE_LIMIT_EMAIL=[1, 300])
+    with app.app_context():
+        db.create_all(bind_key=None)
+    cliente = app.test_client()
+    codigos = [_login(cliente, email).status_code
+               for email in ('fulano@example.com', 'fulano@example.com', 'outro@example.com')]
+    # a segunda submissão esbarra no balde do e-mail e não gasta a ficha do IP
+    assert codigos == [302, 429, 302]
+
+
+def test_balde_total_so_quando_configurado(criar_app):
+    from moviedb import db
+    from moviedb.infra.modulos import rate_limiter
+
+    assert criar_app() and rate_limiter.limites['total'] is None
+    app = criar_app(RATE_LIMIT_TOTAL=[1, 60])
+    with app.app_context():
+        db.create_all(bind_key=None)
+    cliente = app.test_client()
+    assert _login(cliente, 'fulano@example.com', ip='10.0.0.1').status_code == 302
+    resposta = _login(cliente, 'outro@example.com', ip='10.0.0.2')
+    assert resposta.status_code == 429
+    assert rate_limiter.stats()['rejected']['auth.login (total)'] == 1
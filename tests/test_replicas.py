@@ -0,0 +1,91 @@
+"""
+Roteamento das consultas entre o banco principal e a réplica de leitura
+(`moviedb.infra.database.RoutingSession`).
+
+A réplica é uma cópia do banco principal populado que não recebe mais nenhuma
+escrita, como uma réplica atrasada; cada teste informa em quais bancos seus
+comandos foram executados.
+"""
+import shutil
+from collections import Counter
+
+import pytest
+import sqlalchemy as sa
+
+
+@pytest.fixture
+def replica(criar_app, popular, tmp_path):
+    """
+    Aplicação com uma réplica e o contador de comandos por banco
+    ('principal' ou 'réplica').
+    """
+    from moviedb import db
+
+    caminho = tmp_path / 'replica.db'
+    app = criar_app(DB_REPLICA_URIS=[f"sqlite:///{caminho}"])
+    with app.app_context():
+        popular(200)
+        nomes = {db.engine: 'principal', db.engines['replica_0']: 'réplica'}
+        for engine in nomes:
+            engine.dispose()
+    shutil.copy(tmp_path / 'moviedb.db', caminho)
+
+    comandos: Counter = Counter()
+    for engine, nome in nomes.items():
+        sa.event.listen(engine, 'before_cursor_execute',
+                        lambda *args, nome=nome: comandos.update([nome]))
+    yield app, comandos
+    for engine in nomes:
+        engine.dispose()
+
+
+def executar(replica, funcao):
+    app, comandos = replica
+    comandos.clear()
+    with app.app_context():
+        resultado = funcao()
+    return resultado, {nome for nome, quantidade in comandos.items() if quantidade}
+
+
+def test_leituras_do_catalogo_vao_para_a_replica(replica):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    def get_by_id():
+        primeiro = db.session.execute(sa.select(Filme).limit(1)).scalar_one()
+        return Filme.get_by_id(primeiro.id) is primeiro
+
+    for funcao in (lambda: len(Filme.paginate(per_page=20).items) == 20,
+                   lambda: len(Filme.listar_por_ano(1990)) > 0,
+                   lambda: len(Filme.buscar("Filme 1")) > 0,
+                   lambda: Filme.count() == 200,
+                   get_by_id):
+        assert executar(replica, funcao) == (True, {'réplica'})
+
+
+def test_outras_tabelas_e_for_update_vao_para_o_principal(replica):
+    from moviedb import db
+    from moviedb.models import Filme, User
+
+    assert executar(replica, lambda: User.get_by_email("ninguem@example.com") is None) == \
+        (True, {'principal'})
+    stmt = sa.select(Filme).limit(1).with_for_update()
+    assert executar(replica, lambda: db.session.execute(stmt).scalar_one_or_none() is not None) == \
+        (True, {'principal'})
+
+
+def test_leitura_apos_escrita_fica_no_principal_ate_o_fim_da_requisicao(replica):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    def escrever_e_ler():
+        db.session.add(Filme(titulo_original="Novo", titulo_nacional="Novo", ano_lancamento=2024,
+                             lancado=False, duracao=100))
+        db.session.commit()
+        # a réplica não tem o filme: só é encontrado se a leitura for ao principal
+        return (len(Filme.get_by_titulo("Novo")) == 1 and
+                len(Filme.listar_por_ano(2024, lancado=False)) == 1)
+
+    assert executar(replica, escrever_e_ler) == (True, {'principal'})
+    # na requisição seguinte a leitura volta à réplica, que continua atrasada
+    assert executar(replica, lambda: Filme.get_by_titulo("Novo")) == ([], {'réplica'})
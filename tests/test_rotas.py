@@ -0,0 +1,121 @@
+"""
+Rotas dos blueprints `root` e `auth` e carregamento do usuário pelo
+Flask-Login (os cenários medidos por `benchmarks/http_routes.py`).
+"""
+import pytest
+
+EMAIL = 'fulano@example.com'
+SENHA = 'senha-dos-testes'
+
+
+@pytest.fixture
+def usuarios(app):
+    """
+    Cria um usuário ativo (EMAIL/SENHA) e um inativo; retorna o e-mail do inativo.
+    """
+    from moviedb import db
+    from moviedb.models import User
+
+    with app.app_context():
+        db.create_all(bind_key=None)
+        for email, ativo in ((EMAIL, True), ('inativo@example.com', False)):
+            usuario = User()
+            usuario.nome = 'Fulano'
+            usuario.email = email
+            usuario.password = SENHA
+            usuario.ativo = ativo
+            db.session.add(usuario)
+        db.session.commit()
+    return 'inativo@example.com'
+
+
+@pytest.mark.parametrize('url', ['/', '/auth/login', '/auth/register'])
+def test_paginas_publicas(app, usuarios, url):
+    assert app.test_client().get(url).status_code == 200
+
+
+def test_login(app, usuarios):
+    from flask_login import current_user
+
+    cliente = app.test_client()
+    with cliente:
+        assert cliente.post('/auth/login', data={'email': EMAIL, 'password': SENHA}).status_code == 200
+        assert cliente.get('/').status_code == 200
+        assert current_user.is_authenticated
+
+
+def test_login_de_usuario_inativo(app, usuarios):
+    from flask_login import current_user
+
+    cliente = app.test_client()
+    with cliente:
+        resposta = cliente.post('/auth/login', data={'email': usuarios, 'password': SENHA})
+        assert resposta.status_code == 302
+        cliente.get('/')
+        assert not current_user.is_authenticated
+
+
+def test_cadastro(app, usuarios):
+    from moviedb.models import User
+
+    resposta = app.test_client().post('/auth/register', data={
+        'nome': 'Novo Usuário', 'email': 'novo@example.com', 'password': SENHA, 'password2': SENHA})
+    assert resposta.status_code == 302
+    with app.app_context():
+        assert User.get_by_email('novo@example.com') is not None
+
+
+def test_token_de_validacao_de_email_e_de_uso_unico(criar_app, usuarios):
+    from moviedb import db
+    from moviedb.infra.tokens import create_jwt_token
+    from moviedb.models import User
+    from moviedb.models.enumeracoes import JWTAction
+
+    primeira = criar_app()
+    with primeira.app_context():
+        token = create_jwt_token(action=JWTAction.VALIDAR_EMAIL, sub=usuarios, expires_in=3600)
+    resposta = primeira.test_client().get(f"/auth/valida_email/{token}")
+    assert resposta.headers['Location'] == '/auth/login'
+    with primeira.app_context():
+        usuario = User.get_by_email(usuarios)
+        assert usuario.ativo
+        usuario.ativo = False
+        db.session.commit()
+
+    # outro processo (outra aplicação, mesmo banco) também recusa o token já usado
+    segunda = criar_app()
+    segunda.test_client().get(f"/auth/valida_email/{token}")
+    with segunda.app_context():
+        assert not User.get_by_email(usuarios).ativo
+
+
+def test_token_de_nova_senha_e_de_uso_unico(app, usuarios):
+    from moviedb.infra.tokens import create_jwt_token
+    from moviedb.models import User
+    from moviedb.models.enumeracoes import JWTAction
+
+    with app.app_context():
+        token = create_jwt_token(action=JWTAction.RESET_PASSWORD, sub=EMAIL, expires_in=3600)
+    cliente = app.test_client()
+    for senha, destino in (('nova-senha-1', '/auth/login'), ('nova-senha-2', '/index')):
+        resposta = cliente.post(f"/auth/reset_password/{token}",
+                                data={'password': senha, 'password2': senha})
+        assert resposta.headers['Location'] == destino
+    # a segunda submissão foi recusada sem alterar a senha
+    with app.app_context():
+        usuario = User.get_by_email(EMAIL)
+        assert usuario.check_password('nova-senha-1') and not usuario.check_password('nova-senha-2')
+
+
+@pytest.mark.parametrize('limpar_cache', [False, True])
+def test_user_loader(app, usuarios, limpar_cache):
+    from moviedb.infra.modulos import user_cache
+    from moviedb.models import User
+
+    with app.app_context():
+        id_login = User.get_by_email(EMAIL).get_id()
+    with app.test_request_context('/'):
+        if limpar_cache:
+            user_cache.clear()
+        usuario = app.login_manager._user_callback(id_login)
+        assert usuario is not None and usuario.email == EMAIL and usuario.is_active
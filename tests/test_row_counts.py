@@ -0,0 +1,61 @@
+"""
+Contagem aproximada (`count(approximate=True)`) mantida por
+`moviedb.infra.row_counts.RowCountCache`.
+"""
+import sqlalchemy as sa
+
+
+def _filme(titulo: str):
+    from moviedb.models import Filme
+
+    return Filme(titulo_original=titulo, titulo_nacional=titulo, ano_lancamento=2000,
+                 lancado=True, duracao=90)
+
+
+def test_contagem_com_insercao_pendente_nao_conta_duas_vezes(app, popular):
+    # a contagem feita antes do commit inclui a linha pendente; guardá-la em
+    # cache faria o commit somá-la de novo
+    from moviedb import db
+    from moviedb.infra.modulos import row_counts
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(1)
+        row_counts.clear()
+        db.session.add(_filme("Pendente"))
+        assert Filme.count(approximate=True) == 2
+        db.session.commit()
+        assert Filme.count(approximate=True) == Filme.count() == 2
+
+        db.session.add(_filme("Outro"))
+        db.session.commit()
+        assert Filme.count(approximate=True) == Filme.count() == 3
+
+
+def test_rollback_nao_deixa_contagem_no_cache(app, popular):
+    from moviedb import db
+    from moviedb.infra.modulos import row_counts
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(3)
+        row_counts.clear()
+        db.session.add(_filme("Descartado"))
+        db.session.flush()
+        assert Filme.count(approximate=True) == 4
+        db.session.rollback()
+        assert Filme.count(approximate=True) == Filme.count() == 3
+
+
+def test_remocao_confirmada_ajusta_contagem(app, popular):
+    from moviedb import db
+    from moviedb.infra.modulos import row_counts
+    from moviedb.models import Filme
+
+    with app.app_context():
+        popular(3)
+        row_counts.clear()
+        assert Filme.count(approximate=True) == 3
+        db.session.delete(db.session.scalars(sa.select(Filme).limit(1)).one())
+        db.session.commit()
+        assert Filme.count(approximate=True) == Filme.count() == 2
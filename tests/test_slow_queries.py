@@ -0,0 +1,68 @@
+"""
+Registro das consultas lentas (`moviedb.infra.slow_queries`) e a cronometragem
+compartilhada com as métricas (`moviedb.infra.query_timing`).
+"""
+import logging
+
+import pytest
+import sqlalchemy as sa
+
+
+def test_consulta_lenta_registrada_com_plano_e_origem(criar_app, popular, caplog):
+    from moviedb import db
+    from moviedb.infra.modulos import metrics
+    from moviedb.models import Filme
+
+    app = criar_app(SLOW_QUERY_THRESHOLD=1e-9)
+    with app.app_context():
+        popular(10)
+        consultas = metrics.queries._value.get()
+        # a configuração do log da aplicação substitui os handlers da raiz
+        logger = logging.getLogger('moviedb.sql')
+        logger.addHandler(caplog.handler)
+        try:
+            Filme.listar_por_ano(1955)
+        finally:
+            logger.removeHandler(caplog.handler)
+
+    [registro] = [r for r in caplog.records if 'listar_por_ano' in r.getMessage()]
+    mensagem = registro.getMessage()
+    assert 'models/filmes.py' in mensagem and 'ORDER BY filmes.titulo_nacional' in mensagem
+    assert 'SEARCH filmes USING INDEX' in mensagem
+    # as métricas recebem a mesma medição, de um único par de eventos por engine
+    assert metrics.queries._value.get() == consultas + 1
+    with app.app_context():
+        assert len(db.engine.dispatch.after_cursor_execute) == 1
+
+
+class CursorFalso:
+    def __init__(self, comandos):
+        self.comandos = comandos
+
+    def execute(self, comando, parametros=None):
+        self.comandos.append(comando.split(' (')[0] if comando.startswith('EXPLAIN') else comando)
+        if comando.startswith('EXPLAIN'):
+            raise RuntimeError("relation does not exist")
+
+    def close(self):
+        pass
+
+
+class ConexaoFalsa:
+    autocommit = False
+
+    def __init__(self):
+        self.comandos = []
+
+    def cursor(self):
+        return CursorFalso(self.comandos)
+
+
+def test_explain_com_erro_nao_aborta_a_transacao_no_postgresql():
+    from moviedb.infra.query_plans import explicar_sql
+
+    conexao = ConexaoFalsa()
+    with pytest.raises(RuntimeError):
+        explicar_sql(conexao, 'postgresql', 'SELECT 1 FROM filmes', ())
+    assert conexao.comandos == ['SAVEPOINT explicar_sql', 'EXPLAIN SELECT 1 FROM filmes',
+                                'ROLLBACK TO SAVEPOINT explicar_sql', 'RELEASE SAVEPOINT explicar_sql']
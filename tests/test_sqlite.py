@@ -0,0 +1,46 @@
+"""
+Perfil de produção do SQLite (SQLITE_PRODUCTION): PRAGMAs aplicados às
+conexões e leituras concorrentes com uma transação de escrita aberta.
+"""
+import uuid
+
+import sqlalchemy as sa
+
+
+def test_pragmas_do_perfil_de_producao(criar_app):
+    from moviedb import db
+
+    app = criar_app(SQLITE_PRODUCTION=True, SQLITE_BUSY_TIMEOUT=1234)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert connection.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+            assert connection.exec_driver_sql('PRAGMA busy_timeout').scalar() == 1234
+
+
+def test_leituras_prosseguem_durante_uma_escrita(criar_app, popular):
+    from moviedb import db
+    from moviedb.models import Filme
+
+    # com um busy_timeout curto, uma leitura bloqueada falharia com "database is locked"
+    app = criar_app(SQLITE_PRODUCTION=True, SQLITE_BUSY_TIMEOUT=50)
+    with app.app_context():
+        popular(20000)
+        escrita = db.engine.connect()
+        transacao = escrita.begin()
+        try:
+            # atualiza o suficiente para exceder o cache de páginas da conexão
+            escrita.execute(sa.insert(Filme), [
+                {'id': uuid.uuid4(), 'titulo_original': f"Novo {i}", 'titulo_nacional': f"Novo {i}",
+                 'ano_lancamento': 2024, 'lancado': False, 'duracao': 100} for i in range(500)])
+            escrita.execute(sa.update(Filme).values(duracao=Filme.duracao + 1))
+
+            for _ in range(5):
+                assert len(db.session.execute(sa.select(Filme).order_by(Filme.id).limit(20)).all()) == 20
+                # a escrita ainda não confirmada não é vista
+                assert db.session.execute(sa.select(sa.func.count()).select_from(Filme)).scalar_one() == 20000
+                db.session.rollback()
+        finally:
+            transacao.rollback()
+            escrita.close()